@@ -0,0 +1,30 @@
+"""Add composite keyset index for expense listing
+
+Revision ID: 202610171200
+Revises: 202502171200
+Create Date: 2026-10-17 12:00:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171200"
+down_revision = "202502171200"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_expenses_user_id_transaction_date_created_at_id",
+        "expenses",
+        ["user_id", sa.text("transaction_date DESC"), sa.text("created_at DESC"), "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expenses_user_id_transaction_date_created_at_id", table_name="expenses")
@@ -0,0 +1,37 @@
+"""Add maintained live expense counter to users
+
+Revision ID: 202610171210
+Revises: 202610171200
+Create Date: 2026-10-17 12:10:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171210"
+down_revision = "202610171200"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("expense_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET expense_count = (
+            SELECT count(*) FROM expenses
+            WHERE expenses.user_id = users.id AND expenses.deleted_at IS NULL
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "expense_count")
@@ -0,0 +1,93 @@
+"""Partial indexes over live expenses and expenses_archive table
+
+Revision ID: 202610171220
+Revises: 202610171210
+Create Date: 2026-10-17 12:20:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "202610171220"
+down_revision = "202610171210"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_expenses_live_user_id_transaction_date_created_at_id",
+        "expenses",
+        ["user_id", sa.text("transaction_date DESC"), sa.text("created_at DESC"), "id"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+    op.create_index(
+        "ix_expenses_live_id_user_id",
+        "expenses",
+        ["id", "user_id"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+    op.create_index(
+        "ix_expenses_deleted_at",
+        "expenses",
+        ["deleted_at"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NOT NULL"),
+    )
+    # Superseded by the partial index above, which skips tombstoned rows.
+    op.drop_index("ix_expenses_user_id_transaction_date_created_at_id", table_name="expenses")
+
+    op.create_table(
+        "expenses_archive",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("description", sa.String(length=255), nullable=False),
+        sa.Column("transaction_date", sa.Date(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["category_id"],
+            ["categories.id"],
+            ondelete="RESTRICT",
+            name=op.f("fk_expenses_archive_category_id_categories"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            ondelete="CASCADE",
+            name=op.f("fk_expenses_archive_user_id_users"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_expenses_archive")),
+    )
+    op.create_index(
+        op.f("ix_expenses_archive_user_id"), "expenses_archive", ["user_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_expenses_archive_user_id"), table_name="expenses_archive")
+    op.drop_table("expenses_archive")
+    op.create_index(
+        "ix_expenses_user_id_transaction_date_created_at_id",
+        "expenses",
+        ["user_id", sa.text("transaction_date DESC"), sa.text("created_at DESC"), "id"],
+        unique=False,
+    )
+    op.drop_index("ix_expenses_deleted_at", table_name="expenses")
+    op.drop_index("ix_expenses_live_id_user_id", table_name="expenses")
+    op.drop_index("ix_expenses_live_user_id_transaction_date_created_at_id", table_name="expenses")
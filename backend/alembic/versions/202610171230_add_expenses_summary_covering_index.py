@@ -0,0 +1,31 @@
+"""Add covering index for expense summary aggregations
+
+Revision ID: 202610171230
+Revises: 202610171220
+Create Date: 2026-10-17 12:30:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171230"
+down_revision = "202610171220"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_expenses_live_user_id_transaction_date_covering",
+        "expenses",
+        ["user_id", "transaction_date", "category_id", "currency", "amount"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expenses_live_user_id_transaction_date_covering", table_name="expenses")
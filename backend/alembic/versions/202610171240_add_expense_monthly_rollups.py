@@ -0,0 +1,47 @@
+"""Add expense_monthly_rollups and backfill it from live expenses
+
+Revision ID: 202610171240
+Revises: 202610171230
+Create Date: 2026-10-17 12:40:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "202610171240"
+down_revision = "202610171230"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "expense_monthly_rollups",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("year_month", sa.String(length=7), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("total_amount", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("expense_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"], ondelete="RESTRICT"),
+        sa.PrimaryKeyConstraint("user_id", "year_month", "category_id", "currency"),
+    )
+    op.execute(
+        """
+        INSERT INTO expense_monthly_rollups
+            (user_id, year_month, category_id, currency, total_amount, expense_count)
+        SELECT user_id, to_char(transaction_date, 'YYYY-MM'), category_id, currency, SUM(amount), COUNT(*)
+        FROM expenses
+        WHERE deleted_at IS NULL
+        GROUP BY user_id, to_char(transaction_date, 'YYYY-MM'), category_id, currency
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("expense_monthly_rollups")
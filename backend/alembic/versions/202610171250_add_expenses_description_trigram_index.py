@@ -0,0 +1,34 @@
+"""Add trigram index for searching expense descriptions
+
+Revision ID: 202610171250
+Revises: 202610171240
+Create Date: 2026-10-17 12:50:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171250"
+down_revision = "202610171240"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_expenses_live_description_trgm",
+        "expenses",
+        ["description"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"description": "gin_trgm_ops"},
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expenses_live_description_trgm", table_name="expenses")
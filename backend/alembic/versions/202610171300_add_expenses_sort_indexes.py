@@ -0,0 +1,39 @@
+"""Add keyset indexes for sorting expenses by amount and creation time
+
+Revision ID: 202610171300
+Revises: 202610171250
+Create Date: 2026-10-17 13:00:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171300"
+down_revision = "202610171250"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_expenses_live_user_id_amount_created_at_id",
+        "expenses",
+        ["user_id", sa.text("amount DESC"), sa.text("created_at DESC"), "id"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+    op.create_index(
+        "ix_expenses_live_user_id_created_at_id",
+        "expenses",
+        ["user_id", sa.text("created_at DESC"), "id"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expenses_live_user_id_created_at_id", table_name="expenses")
+    op.drop_index("ix_expenses_live_user_id_amount_created_at_id", table_name="expenses")
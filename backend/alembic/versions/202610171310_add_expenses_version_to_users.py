@@ -0,0 +1,28 @@
+"""Add per-user expenses version counter
+
+Revision ID: 202610171310
+Revises: 202610171300
+Create Date: 2026-10-17 13:10:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171310"
+down_revision = "202610171300"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("expenses_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "expenses_version")
@@ -0,0 +1,77 @@
+"""Add expenses.updated_at and change_version for delta sync
+
+Revision ID: 202610171320
+Revises: 202610171310
+Create Date: 2026-10-17 13:20:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171320"
+down_revision = "202610171310"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10_000
+FIRST_BATCH = sa.text("SELECT id FROM expenses ORDER BY id LIMIT :batch_size")
+NEXT_BATCH = sa.text("SELECT id FROM expenses WHERE id > :after ORDER BY id LIMIT :batch_size")
+BACKFILL = sa.text(
+    """
+    UPDATE expenses
+    SET updated_at = COALESCE(deleted_at, created_at)
+    WHERE id BETWEEN :first AND :last AND updated_at IS NULL
+    """
+)
+
+
+def upgrade() -> None:
+    # Existing rows predate every sync token, so version 0 is right for all of them.
+    for table in ("expenses", "expenses_archive"):
+        op.add_column(
+            table,
+            sa.Column("change_version", sa.Integer(), server_default="0", nullable=False),
+        )
+    op.add_column("expenses", sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Walk the primary key in batches, each committed on its own, so the backfill never holds
+    # row locks on the whole table and each batch is an index range scan.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        ids = bind.execute(FIRST_BATCH, {"batch_size": BACKFILL_BATCH_SIZE}).scalars().all()
+        while ids:
+            bind.execute(BACKFILL, {"first": ids[0], "last": ids[-1]})
+            ids = (
+                bind.execute(NEXT_BATCH, {"after": ids[-1], "batch_size": BACKFILL_BATCH_SIZE})
+                .scalars()
+                .all()
+            )
+    # Rows written meanwhile by application instances that predate this column.
+    op.execute(
+        "UPDATE expenses SET updated_at = COALESCE(deleted_at, created_at) WHERE updated_at IS NULL"
+    )
+
+    op.alter_column("expenses", "updated_at", nullable=False)
+    op.create_index(
+        "ix_expenses_user_id_change_version_id",
+        "expenses",
+        ["user_id", "change_version", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_expenses_archive_user_id_change_version",
+        "expenses_archive",
+        ["user_id", "change_version"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expenses_archive_user_id_change_version", table_name="expenses_archive")
+    op.drop_index("ix_expenses_user_id_change_version_id", table_name="expenses")
+    op.drop_column("expenses", "updated_at")
+    for table in ("expenses_archive", "expenses"):
+        op.drop_column(table, "change_version")
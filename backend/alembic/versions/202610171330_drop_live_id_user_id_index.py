@@ -0,0 +1,39 @@
+"""Drop the redundant live (id, user_id) index and align expenses_archive.archived_at's default
+
+Revision ID: 202610171330
+Revises: 202610171320
+Create Date: 2026-10-17 13:30:00
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202610171330"
+down_revision = "202610171320"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Ownership lookups by id already go through the primary key; the partial index only
+    # added write amplification.
+    op.drop_index("ix_expenses_live_id_user_id", table_name="expenses")
+    # now() is already an absolute timestamp; timezone('utc', now()) turned it into a local
+    # one that was read back in the session's time zone.
+    op.alter_column("expenses_archive", "archived_at", server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "expenses_archive", "archived_at", server_default=sa.text("timezone('utc', now())")
+    )
+    op.create_index(
+        "ix_expenses_live_id_user_id",
+        "expenses",
+        ["id", "user_id"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
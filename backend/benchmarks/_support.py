@@ -0,0 +1,132 @@
+"""Shared helpers for the benchmark scripts.
+
+The benchmarks drive the real ASGI app through httpx, with the session dependency pointed at a
+throwaway aiosqlite database, the same stand-in the test-suite uses.
+"""
+
+from __future__ import annotations
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import TypeCompiler
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.dependencies import get_db_session, get_db_sessionmaker
+from app.main import app
+from app.models import Base, Category, Expense
+
+SEED_BATCH_SIZE = 5_000
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(_type: UUID[uuid.UUID], _compiler: TypeCompiler, **_kw: object) -> str:
+    # Same as tests/conftest.py: "UUID" has NUMERIC affinity in SQLite and mangles some hex ids.
+    return "CHAR(32)"
+
+
+@asynccontextmanager
+async def bench_database() -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        finally:
+            await engine.dispose()
+
+
+@asynccontextmanager
+async def bench_client(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[AsyncClient]:
+    async def override_get_session() -> AsyncIterator[AsyncSession]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = override_get_session
+    app.dependency_overrides[get_db_sessionmaker] = lambda: session_factory
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def register(
+    client: AsyncClient, email: str = "bench@example.com"
+) -> tuple[uuid.UUID, dict[str, str]]:
+    response = await client.post("/auth/register", json={"email": email, "password": "password123"})
+    response.raise_for_status()
+    data = response.json()
+    return uuid.UUID(data["user"]["id"]), {"Authorization": f"Bearer {data['access_token']}"}
+
+
+async def seed_category(session_factory: async_sessionmaker[AsyncSession]) -> int:
+    async with session_factory() as session:
+        category = Category(name=f"Bench {uuid.uuid4().hex[:8]}", slug=uuid.uuid4().hex)
+        session.add(category)
+        await session.commit()
+        return category.id
+
+
+async def seed_expenses(
+    session_factory: async_sessionmaker[AsyncSession],
+    user_id: uuid.UUID,
+    category_ids: list[int],
+    count: int,
+    describe: Callable[[random.Random, int], str] | None = None,
+) -> None:
+    rng = random.Random(1234)
+    start = date(2015, 1, 1)
+    async with session_factory() as session:
+        for offset in range(0, count, SEED_BATCH_SIZE):
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "category_id": rng.choice(category_ids),
+                    "amount": Decimal(rng.randint(100, 50_000)) / 100,
+                    "currency": "BRL",
+                    "description": (
+                        describe(rng, offset + index) if describe else f"Expense {offset + index}"
+                    ),
+                    "transaction_date": start + timedelta(days=rng.randint(0, 3_650)),
+                    "created_at": datetime.now(UTC),
+                }
+                for index in range(min(SEED_BATCH_SIZE, count - offset))
+            ]
+            await session.execute(insert(Expense), rows)
+        await session.commit()
+
+
+async def measure(fn: Callable[[], Awaitable[object]], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    median_ms = statistics.median(timings) * 1000
+    p95_ms = sorted(timings)[int(len(timings) * 0.95) - 1] * 1000
+    print(f"{label:<40} median {median_ms:8.2f} ms   p95 {p95_ms:8.2f} ms")
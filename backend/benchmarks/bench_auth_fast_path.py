@@ -0,0 +1,70 @@
+"""Requests/sec on the expense endpoints with and without the token-claims auth fast path.
+
+    poetry run python benchmarks/bench_auth_fast_path.py [--requests 2000] [--concurrency 20]
+
+"before" reinstates the old behaviour, where every request loads the caller's users row.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from _support import bench_client, bench_database, register, seed_category, seed_expenses
+from fastapi import Depends
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import get_current_principal, get_db_session, oauth2_scheme
+from app.main import app
+from app.models import User
+from app.principals import Principal
+
+
+async def legacy_principal(
+    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db_session)
+) -> Principal:
+    principal = await get_current_principal(token)
+    result = await session.execute(select(User).where(User.id == principal.id))
+    return Principal(id=result.scalar_one().id)
+
+
+async def requests_per_second(
+    client: AsyncClient, path: str, headers: dict[str, str], total: int, concurrency: int
+) -> float:
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for _ in remaining:
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+
+async def main(total: int, concurrency: int) -> None:
+    async with bench_database() as session_factory, bench_client(session_factory) as client:
+        user_id, headers = await register(client)
+        category_id = await seed_category(session_factory)
+        await seed_expenses(session_factory, user_id, [category_id], 200)
+        listing = await client.get("/expenses", params={"page_size": 1}, headers=headers)
+        expense_id = listing.json()["items"][0]["id"]
+
+        for path in ("/expenses?page_size=20", f"/expenses/{expense_id}"):
+            app.dependency_overrides[get_current_principal] = legacy_principal
+            before = await requests_per_second(client, path, headers, total, concurrency)
+            del app.dependency_overrides[get_current_principal]
+            after = await requests_per_second(client, path, headers, total, concurrency)
+            print(f"{path:<50} before {before:8.1f} req/s   after {after:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,75 @@
+"""Rows/sec of POST /expenses/bulk for streamed CSV and NDJSON uploads.
+
+    poetry run python benchmarks/bench_bulk_import.py [--rows 50000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Callable
+
+from _support import bench_client, bench_database, register, seed_category
+
+ROWS_PER_CHUNK = 500
+
+
+def csv_line(index: int, category_id: int) -> str:
+    return f"{index % 500 + 1}.25,BRL,Imported {index},2024-03-{index % 28 + 1:02d},{category_id}\n"
+
+
+def ndjson_line(index: int, category_id: int) -> str:
+    record = {
+        "amount": f"{index % 500 + 1}.25",
+        "currency": "BRL",
+        "description": f"Imported {index}",
+        "transaction_date": f"2024-03-{index % 28 + 1:02d}",
+        "category_id": category_id,
+    }
+    return json.dumps(record) + "\n"
+
+
+async def stream(
+    header: str, line: Callable[[int, int], str], rows: int, category_id: int
+) -> AsyncIterator[bytes]:
+    chunk = [header]
+    for index in range(rows):
+        chunk.append(line(index, category_id))
+        if len(chunk) == ROWS_PER_CHUNK:
+            yield "".join(chunk).encode()
+            chunk = []
+    yield "".join(chunk).encode()
+
+
+async def main(rows: int) -> None:
+    async with bench_database() as session_factory, bench_client(session_factory) as client:
+        _, headers = await register(client)
+        category_id = await seed_category(session_factory)
+
+        formats = {
+            "text/csv": ("amount,currency,description,transaction_date,category_id\n", csv_line),
+            "application/x-ndjson": ("", ndjson_line),
+        }
+        for media_type, (header, line) in formats.items():
+            started = time.perf_counter()
+            response = await client.post(
+                "/expenses/bulk",
+                content=stream(header, line, rows, category_id),
+                headers={**headers, "Content-Type": media_type},
+                timeout=None,
+            )
+            elapsed = time.perf_counter() - started
+            response.raise_for_status()
+            inserted = response.json()["inserted"]
+            print(
+                f"{media_type:<22} {inserted} rows in {elapsed:6.2f} s   {inserted / elapsed:9.0f} rows/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,79 @@
+"""Keeping a client in sync: re-downloading every page against `GET /expenses/changes`.
+
+    poetry run python benchmarks/bench_expense_changes.py [--rows 100000] [--changes 10]
+
+After seeding `--rows` expenses and taking a sync token, edits `--changes` of them and times
+(a) walking the whole `GET /expenses` cursor listing, which is what clients did before, and
+(b) one `GET /expenses/changes` call from the token, which reads only the edited rows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from _support import (
+    bench_client,
+    bench_database,
+    measure,
+    register,
+    report,
+    seed_category,
+    seed_expenses,
+)
+from httpx import AsyncClient
+
+REPEAT = 5
+
+
+async def full_download(client: AsyncClient, headers: dict[str, str]) -> int:
+    rows, cursor = 0, ""
+    while cursor is not None:
+        response = await client.get(
+            "/expenses", params={"cursor": cursor, "page_size": 100}, headers=headers
+        )
+        page = response.json()
+        rows += len(page["items"])
+        cursor = page["next_cursor"]
+    return rows
+
+
+async def main(rows: int, changes: int) -> None:
+    async with bench_database() as session_factory, bench_client(session_factory) as client:
+        user_id, headers = await register(client)
+        category_id = await seed_category(session_factory)
+        await seed_expenses(session_factory, user_id, [category_id], rows)
+
+        response = await client.get(
+            "/expenses/changes", params={"page_size": 1000}, headers=headers
+        )
+        token = response.json()["next_token"]
+        while response.json()["has_more"]:
+            response = await client.get(
+                "/expenses/changes", params={"since": token, "page_size": 1000}, headers=headers
+            )
+            token = response.json()["next_token"]
+
+        listing = await client.get("/expenses", params={"page_size": changes}, headers=headers)
+        for expense in listing.json()["items"]:
+            payload = {key: expense[key] for key in ("amount", "currency", "transaction_date")}
+            payload |= {"category_id": category_id, "description": "Edited"}
+            await client.put(f"/expenses/{expense['id']}", json=payload, headers=headers)
+
+        async def delta() -> None:
+            response = await client.get(
+                "/expenses/changes", params={"since": token}, headers=headers
+            )
+            assert len(response.json()["items"]) == changes
+
+        full = await measure(lambda: full_download(client, headers), REPEAT)
+        report(f"full download ({rows} rows)", full)
+        report(f"changes since token ({changes} rows)", await measure(delta, REPEAT))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--changes", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.changes))
@@ -0,0 +1,66 @@
+"""Compare offset and cursor paging of GET /expenses on shallow and deep pages.
+
+    poetry run python benchmarks/bench_keyset_pagination.py [--rows 12000] [--page-size 20]
+
+Offset paging gets slower as the page number grows; cursor paging should cost the same on page
+1 and page 500.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from _support import (
+    bench_client,
+    bench_database,
+    measure,
+    register,
+    report,
+    seed_category,
+    seed_expenses,
+)
+
+
+async def main(rows: int, page_size: int, deep_page: int, repeat: int) -> None:
+    async with bench_database() as session_factory, bench_client(session_factory) as client:
+        user_id, headers = await register(client)
+
+        category_id = await seed_category(session_factory)
+        await seed_expenses(session_factory, user_id, [category_id], rows)
+
+        cursors = {1: ""}
+        cursor = ""
+        for page in range(2, deep_page + 1):
+            page_response = await client.get(
+                "/expenses", params={"cursor": cursor, "page_size": page_size}, headers=headers
+            )
+            cursor = page_response.json()["next_cursor"]
+            cursors[page] = cursor
+
+        for page in (1, deep_page):
+
+            async def fetch_offset(page: int = page) -> None:
+                await client.get(
+                    "/expenses", params={"page": page, "page_size": page_size}, headers=headers
+                )
+
+            async def fetch_cursor(page: int = page) -> None:
+                await client.get(
+                    "/expenses",
+                    params={"cursor": cursors[page], "page_size": page_size},
+                    headers=headers,
+                )
+
+            report(f"offset page {page}", await measure(fetch_offset, repeat))
+            report(f"cursor page {page}", await measure(fetch_cursor, repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=12_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--deep-page", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page_size, args.deep_page, args.repeat))
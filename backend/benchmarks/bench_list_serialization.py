@@ -0,0 +1,93 @@
+"""CPU time to encode one `GET /expenses` page, old path against the app.rendering fast path.
+
+    poetry run python benchmarks/bench_list_serialization.py [--page-size 100] [--rounds 2000]
+
+Both sides start from what the database returned for the same page. "before" is the old
+handler: ORM entities, `ExpenseRead.model_validate` per row, then FastAPI's response_model
+validation and JSONResponse. "after" encodes the selected column tuples with the pre-built
+TypeAdapter. Only encoding is timed, so the difference is not diluted by query time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+from _support import bench_client, bench_database, register, seed_category, seed_expenses
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import select
+
+from app.main import app
+from app.models import Expense
+from app.pagination import keyset_order_by
+from app.rendering import expense_rows, render_page
+from app.routers.expenses import READ_COLUMNS
+from app.schemas.expense import ExpenseRead, PaginatedExpenses
+from app.sorting import DEFAULT_SORT, EXPENSE_SORTS
+
+REPEATS = 5
+
+
+def list_route() -> APIRoute:
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == "/expenses" and "GET" in route.methods:
+            return route
+    raise LookupError("GET /expenses is not registered")
+
+
+async def cpu_per_call(fn: Callable[[], Awaitable[bytes]], rounds: int) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.process_time()
+        for _ in range(rounds):
+            await fn()
+        timings.append((time.process_time() - started) / rounds)
+    return statistics.median(timings)
+
+
+async def main(page_size: int, rounds: int) -> None:
+    async with bench_database() as session_factory, bench_client(session_factory) as client:
+        user_id, _ = await register(client)
+        category_id = await seed_category(session_factory)
+        await seed_expenses(session_factory, user_id, [category_id], page_size)
+        page = (
+            select(Expense).order_by(*keyset_order_by(EXPENSE_SORTS[DEFAULT_SORT])).limit(page_size)
+        )
+        async with session_factory() as session:
+            entities = (await session.scalars(page)).all()
+            rows = (await session.execute(page.with_only_columns(*READ_COLUMNS))).all()
+
+    response_field = list_route().response_field
+
+    async def before() -> bytes:
+        content = PaginatedExpenses(
+            items=[ExpenseRead.model_validate(expense) for expense in entities],
+            total=page_size,
+            page=1,
+            page_size=page_size,
+        )
+        encoded = await serialize_response(field=response_field, response_content=content)
+        return bytes(JSONResponse(encoded).body)
+
+    async def after() -> bytes:
+        return render_page(
+            {"items": expense_rows(rows), "total": page_size, "page": 1, "page_size": page_size}
+        )
+
+    assert await before() == await after(), "encodings differ"
+    old = await cpu_per_call(before, rounds)
+    new = await cpu_per_call(after, rounds)
+    print(f"{page_size}-row page   before {old * 1e6:8.1f} µs   after {new * 1e6:8.1f} µs")
+    print(f"speed-up {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.page_size, args.rounds))
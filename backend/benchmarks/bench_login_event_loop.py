@@ -0,0 +1,81 @@
+"""Load test: /health latency while a burst of concurrent logins is being verified.
+
+    poetry run python benchmarks/bench_login_event_loop.py [--logins 40]
+
+"blocking" runs bcrypt directly on the event loop, as the handlers used to; "offloaded" uses
+the bounded password-hash pool. With offloading, /health latency should stay flat.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from _support import bench_client, bench_database, register
+from httpx import AsyncClient
+
+from app.dependencies import get_login_throttle
+from app.main import app
+from app.ratelimit import InMemoryTokenBucketBackend, LoginThrottle
+from app.routers import auth
+from app.security import verify_password
+
+
+async def blocking_verify(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def health_latencies_during_logins(client: AsyncClient, logins: int) -> list[float]:
+    credentials = {"email": "bench@example.com", "password": "password123"}
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    async def probe() -> None:
+        # Latency is measured from when the probe was due to fire, so time spent waiting for a
+        # blocked event loop counts against /health just as it would for a real client.
+        while not done.is_set():
+            due = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            await client.get("/health")
+            latencies.append(time.perf_counter() - due)
+
+    prober = asyncio.create_task(probe())
+    await asyncio.gather(*(client.post("/auth/login", json=credentials) for _ in range(logins)))
+    done.set()
+    await prober
+    return latencies
+
+
+def summarize(label: str, latencies: list[float]) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)]
+    print(
+        f"{label:<10} /health samples {len(ordered):4d}   "
+        f"median {statistics.median(ordered) * 1000:8.2f} ms   "
+        f"p99 {p99 * 1000:8.2f} ms   max {ordered[-1] * 1000:8.2f} ms"
+    )
+
+
+async def main(logins: int) -> None:
+    async with bench_database() as session_factory, bench_client(session_factory) as client:
+        await register(client)
+        # Every login below is for one email; throttled, most would answer 429 without bcrypt.
+        unthrottled = LoginThrottle(InMemoryTokenBucketBackend(max_keys=1), None, None)
+        app.dependency_overrides[get_login_throttle] = lambda: unthrottled
+
+        original = auth.verify_password_async
+        auth.verify_password_async = blocking_verify  # type: ignore[assignment]
+        try:
+            summarize("blocking", await health_latencies_during_logins(client, logins))
+        finally:
+            auth.verify_password_async = original
+        summarize("offloaded", await health_latencies_during_logins(client, logins))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -0,0 +1,89 @@
+"""Per-request cost of MetricsMiddleware.
+
+    poetry run python benchmarks/bench_metrics_middleware.py [--requests 20000]
+
+Calls a one-route FastAPI app straight through ASGI, with and without the middleware, so the
+difference is the instrumentation itself rather than HTTP client or database time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import _support  # noqa: F401 - puts src/ on sys.path
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message
+
+from app.metrics import MetricsMiddleware
+
+ROUNDS = 5
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int) -> dict[str, int]:
+        return {"id": item_id}
+
+    return app
+
+
+async def call(app: ASGIApp) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/1",
+        "raw_path": b"/items/1",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_: Message) -> None:
+        return None
+
+    await app(scope, receive, send)
+
+
+async def microseconds_per_request(app: ASGIApp, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(requests: int) -> None:
+    bare = build_app()
+    instrumented = MetricsMiddleware(build_app())
+    await microseconds_per_request(bare, 1_000)
+    await microseconds_per_request(instrumented, 1_000)
+
+    bare_runs, instrumented_runs = [], []
+    for _ in range(ROUNDS):
+        bare_runs.append(await microseconds_per_request(bare, requests))
+        instrumented_runs.append(await microseconds_per_request(instrumented, requests))
+
+    before = statistics.median(bare_runs)
+    after = statistics.median(instrumented_runs)
+    print(f"{'without middleware':<24} {before:8.1f} us/request")
+    print(f"{'with middleware':<24} {after:8.1f} us/request")
+    print(f"{'overhead':<24} {after - before:8.1f} us/request ({(after / before - 1) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
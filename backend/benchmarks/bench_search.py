@@ -0,0 +1,84 @@
+"""Latency of GET /expenses/search on a large table, alone and combined with filters.
+
+    poetry run python benchmarks/bench_search.py [--rows 1000000] [--page-size 50]
+
+Descriptions mix a few very common merchants with rare ones, so both the "many matches, stop
+at the first page" and the "few matches anywhere" cases are covered. Locally this runs on the
+SQLite FTS5 trigram table; on Postgres the same queries use the pg_trgm GIN index.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from _support import (
+    bench_client,
+    bench_database,
+    measure,
+    register,
+    report,
+    seed_category,
+    seed_expenses,
+)
+
+COMMON = ["Uber", "iFood", "Mercado Extra", "Padaria Pão Quente", "Posto Shell", "Farmácia"]
+RARE = ["Aeroporto GRU", "Livraria Cultura", "Oficina mecânica", "Consulta dermatologista"]
+RARE_SHARE = 0.001
+DETAILS = ["centro", "casa", "trabalho", "viagem", "fim de semana", "almoço", "jantar"]
+
+
+def describe(rng: random.Random, index: int) -> str:
+    merchant = rng.choice(RARE) if rng.random() < RARE_SHARE else rng.choice(COMMON)
+    return f"{merchant} {rng.choice(DETAILS)} #{index}"
+
+
+async def main(rows: int, page_size: int, repeat: int) -> None:
+    async with bench_database() as session_factory, bench_client(session_factory) as client:
+        user_id, headers = await register(client)
+        category_ids = [await seed_category(session_factory) for _ in range(5)]
+
+        started = time.perf_counter()
+        await seed_expenses(session_factory, user_id, category_ids, rows, describe=describe)
+        print(f"seeded {rows} rows in {time.perf_counter() - started:.1f} s")
+
+        first_page = await client.get(
+            "/expenses/search", params={"q": "uber", "page_size": page_size}, headers=headers
+        )
+        cursor = first_page.json()["next_cursor"]
+
+        cases = {
+            "common word": {"q": "uber"},
+            "common word, page 2": {"q": "uber", "cursor": cursor},
+            "rare word": {"q": "livraria"},
+            "two words": {"q": "mercado almoço"},
+            "substring": {"q": "dermato"},
+            "word + date range": {
+                "q": "farmácia",
+                "date_from": "2020-01-01",
+                "date_to": "2020-03-31",
+            },
+            "word + amount range": {"q": "posto", "amount_min": "400", "amount_max": "410"},
+            "word + category": {"q": "aeroporto", "category_id": category_ids[0]},
+            "no match": {"q": "inexistente"},
+        }
+        for label, params in cases.items():
+
+            async def search(params: dict[str, object] = params) -> None:
+                response = await client.get(
+                    "/expenses/search", params={**params, "page_size": page_size}, headers=headers
+                )
+                response.raise_for_status()
+
+            report(label, await measure(search, repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page_size, args.repeat))
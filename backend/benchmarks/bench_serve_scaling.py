@@ -0,0 +1,133 @@
+"""Requests/sec on the expense endpoints as `python -m app.serve` goes from 1 to N workers.
+
+    poetry run python benchmarks/bench_serve_scaling.py [--workers 1 2 4] [--seconds 10]
+        [--clients 4] [--concurrency 16]
+
+Seeds a temporary SQLite file, then for each worker count starts the real launcher on a free
+port and drives it over HTTP from `--clients` load-generator processes, so the load itself is not
+capped at one core. Run it on a machine with spare cores for the clients. SQLite stands in for
+Postgres: reads do not contend, but absolute numbers are not those of a production database.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from _support import bench_client, bench_database, register, seed_category, seed_expenses
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def start_server(database_url: str, workers: int, port: int) -> subprocess.Popen[bytes]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(SRC),
+        "DATABASE_URL": database_url,
+        "ARCHIVE_INTERVAL_SECONDS": "0",
+        "SERVER_MAX_REQUESTS": "0",
+    }
+    command = [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port)]
+    server = subprocess.Popen(
+        [*command, "--workers", str(workers)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == httpx.codes.OK:
+                # Every worker runs its lifespan before accepting; give the slower ones a moment.
+                time.sleep(1 + workers * 0.5)
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.kill()
+    raise TimeoutError("server did not start")
+
+
+async def _drive(url: str, headers: dict[str, str], seconds: float, concurrency: int) -> int:
+    done = 0
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30) as client:
+
+        async def worker() -> None:
+            nonlocal done
+            while time.monotonic() < deadline:
+                response = await client.get(url)
+                response.raise_for_status()
+                done += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return done
+
+
+def load_client(args: tuple[str, dict[str, str], float, int]) -> int:
+    return asyncio.run(_drive(*args))
+
+
+def requests_per_second(
+    url: str, headers: dict[str, str], seconds: float, clients: int, concurrency: int
+) -> float:
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        counts = pool.map(load_client, [(url, headers, seconds, concurrency)] * clients)
+    return sum(counts) / seconds
+
+
+async def main(options: argparse.Namespace) -> None:
+    async with bench_database() as session_factory:
+        async with bench_client(session_factory) as client:
+            user_id, headers = await register(client)
+            category_id = await seed_category(session_factory)
+            await seed_expenses(session_factory, user_id, [category_id], options.rows)
+            listing = await client.get("/expenses", params={"page_size": 1}, headers=headers)
+            expense_id = listing.json()["items"][0]["id"]
+        database_url = session_factory.kw["bind"].url.render_as_string(hide_password=False)
+
+        print(f"{os.cpu_count()} CPUs, {options.clients} clients x {options.concurrency}")
+        paths = ("/expenses?page_size=20", f"/expenses/{expense_id}")
+        for workers in options.workers:
+            port = free_port()
+            server = start_server(database_url, workers, port)
+            try:
+                for path in paths:
+                    rate = requests_per_second(
+                        f"http://127.0.0.1:{port}{path}",
+                        headers,
+                        options.seconds,
+                        options.clients,
+                        options.concurrency,
+                    )
+                    label = path.replace(expense_id, "{id}")
+                    print(f"{workers:>2} workers  {label:<28} {rate:9.1f} req/s")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=10_000)
+    asyncio.run(main(parser.parse_args()))
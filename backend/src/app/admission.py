@@ -0,0 +1,136 @@
+"""Admission control: cap concurrent requests per route class and shed the excess early.
+
+Requests are sorted into classes (`auth`, expense and category `reads`, `writes`), each with its
+own `AdmissionGate`: at most `limit` requests run at once, up to `max_waiting` more wait for a
+slot, and a request that waited `timeout` seconds (or found the queue full) is answered with 503
+and `Retry-After` without ever reaching a handler or the connection pool. A slow database then
+turns into quick 503s for the overflow instead of a pile-up that times out all at once.
+Paths outside the classes (`/health`, `/metrics`, `/internal`, docs) are never held back.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import admission_in_flight, admission_rejected, admission_waiting
+
+RETRY_AFTER_SECONDS = 1
+READ_METHODS = frozenset({"GET", "HEAD"})
+REJECTION_BODY = json.dumps({"detail": "Server is busy, retry shortly"}).encode()
+
+
+class AdmissionGate:
+    def __init__(self, name: str, limit: int, max_waiting: int, timeout: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting at most `timeout`; False when the request should be shed."""
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return True
+        if self.waiting >= self.max_waiting:
+            return False
+        self.waiting += 1
+        admission_waiting.inc((self.name,))
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+            admission_waiting.dec((self.name,))
+        return True
+
+    def release(self) -> None:
+        self._slots.release()
+
+
+class AdmissionControl:
+    def __init__(self, gates: dict[str, AdmissionGate]) -> None:
+        self.gates = gates
+
+    @classmethod
+    def from_settings(cls) -> AdmissionControl:
+        limits = {
+            "auth": settings.admission_auth_concurrency,
+            "reads": settings.admission_read_concurrency,
+            "writes": settings.admission_write_concurrency,
+        }
+        return cls(
+            {
+                route_class: AdmissionGate(
+                    route_class,
+                    limit,
+                    settings.admission_queue_size,
+                    settings.admission_queue_timeout_seconds,
+                )
+                for route_class, limit in limits.items()
+                # 0 leaves the class unlimited.
+                if limit > 0
+            }
+        )
+
+    def gate_for(self, method: str, path: str) -> AdmissionGate | None:
+        if path.startswith("/auth"):
+            route_class = "auth"
+        elif path.startswith(("/expenses", "/categories")):
+            route_class = "reads" if method in READ_METHODS else "writes"
+        else:
+            return None
+        return self.gates.get(route_class)
+
+
+admission_control = AdmissionControl.from_settings()
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; a slot is held until the response has been sent."""
+
+    def __init__(self, app: ASGIApp, control: AdmissionControl = admission_control) -> None:
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        gate = None
+        if scope["type"] == "http":
+            gate = self.control.gate_for(scope["method"], scope["path"])
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        labels = (gate.name,)
+        if not await gate.acquire():
+            admission_rejected.inc(labels)
+            await _reject(send)
+            return
+
+        admission_in_flight.inc(labels)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_in_flight.dec(labels)
+            gate.release()
+
+
+async def _reject(send: Send) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(REJECTION_BODY)).encode()),
+                (b"retry-after", str(RETRY_AFTER_SECONDS).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": REJECTION_BODY})
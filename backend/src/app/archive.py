@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+
+import structlog
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models import Expense, ExpenseArchive
+
+logger = structlog.get_logger(__name__)
+
+ARCHIVED_COLUMNS = (
+    "id",
+    "user_id",
+    "category_id",
+    "amount",
+    "currency",
+    "description",
+    "transaction_date",
+    "created_at",
+    "deleted_at",
+    "change_version",
+)
+
+
+async def archive_deleted_expenses(
+    session_factory: async_sessionmaker[AsyncSession],
+    *,
+    retention: timedelta | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """Move expenses soft-deleted before the retention window into `expenses_archive`.
+
+    Each batch is its own short transaction so the job never holds locks on many rows at once.
+    Returns the number of rows moved.
+    """
+    retention = retention or timedelta(days=settings.archive_retention_days)
+    batch_size = batch_size or settings.archive_batch_size
+    now = datetime.now(UTC)
+    cutoff = now - retention
+
+    moved = 0
+    while True:
+        async with session_factory() as session, session.begin():
+            batch = (
+                select(Expense.id)
+                .where(Expense.deleted_at.is_not(None), Expense.deleted_at < cutoff)
+                .order_by(Expense.deleted_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            ids = (await session.execute(batch)).scalars().all()
+            if not ids:
+                break
+
+            source = select(
+                *(getattr(Expense, column) for column in ARCHIVED_COLUMNS), literal(now)
+            ).where(Expense.id.in_(ids))
+            await session.execute(
+                insert(ExpenseArchive).from_select([*ARCHIVED_COLUMNS, "archived_at"], source)
+            )
+            await session.execute(delete(Expense).where(Expense.id.in_(ids)))
+
+        moved += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    return moved
+
+
+async def run_archiver(session_factory: async_sessionmaker[AsyncSession], interval: float) -> None:
+    while True:
+        try:
+            moved = await archive_deleted_expenses(session_factory)
+            if moved:
+                logger.info("archived deleted expenses", count=moved)
+        except Exception:
+            logger.exception("expense archiver run failed")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def archiver(session_factory: async_sessionmaker[AsyncSession]) -> AsyncIterator[None]:
+    if settings.archive_interval_seconds <= 0:
+        yield
+        return
+
+    task = asyncio.create_task(run_archiver(session_factory, settings.archive_interval_seconds))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal, engine
+
+    async def _main() -> None:
+        try:
+            moved = await archive_deleted_expenses(SessionLocal)
+            print(f"archived {moved} expenses")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_main())
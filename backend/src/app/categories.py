@@ -0,0 +1,87 @@
+"""Process-wide registry of expense categories.
+
+Categories are a small, nearly static set, so each process keeps a snapshot in memory and
+validates `category_id`s against it instead of querying `categories` on every write. The
+snapshot is loaded at startup, reloaded lazily once `CATEGORY_CACHE_TTL_SECONDS` have passed
+(0 keeps it until invalidated) and dropped whenever this process changes a category via the ORM.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Category
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryEntry:
+    id: int
+    name: str
+    slug: str
+
+
+class CategoryRegistry:
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._categories: dict[int, CategoryEntry] = {}
+        self._loaded_at: float | None = None
+        # Pre-rendered `GET /categories` response for the current snapshot.
+        self.body = b"[]"
+        self.etag = ""
+
+    @property
+    def is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self.ttl_seconds <= 0 or self._clock() - self._loaded_at < self.ttl_seconds
+
+    async def refresh(self, session: AsyncSession) -> None:
+        result = await session.execute(
+            select(Category.id, Category.name, Category.slug).order_by(Category.id)
+        )
+        categories = [CategoryEntry(id=id_, name=name, slug=slug) for id_, name, slug in result]
+        self._categories = {category.id: category for category in categories}
+        self.body = json.dumps(
+            [asdict(category) for category in categories],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self._loaded_at = self._clock()
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        if not self.is_fresh:
+            await self.refresh(session)
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def get(self, category_id: int) -> CategoryEntry | None:
+        return self._categories.get(category_id)
+
+    def __contains__(self, category_id: object) -> bool:
+        return category_id in self._categories
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+
+category_registry = CategoryRegistry(ttl_seconds=settings.category_cache_ttl_seconds)
+
+
+# Other workers pick up changes when their snapshot expires.
+@event.listens_for(Category, "after_insert")
+@event.listens_for(Category, "after_update")
+@event.listens_for(Category, "after_delete")
+def _invalidate_categories(_mapper: Any, _connection: Any, _target: Category) -> None:
+    category_registry.invalidate()
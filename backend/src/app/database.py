@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any
 
 from fastapi import FastAPI
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -11,23 +13,93 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
+from app.archive import archiver
+from app.categories import category_registry
 from app.config import settings
+from app.metrics import instrument_engine
+from app.pool import InstrumentedQueuePool
+from app.profiling import install_profiler
+from app.replicas import SessionRouter
+from app.security import shutdown_password_executor
 
 
-def create_engine(database_url: str | None = None) -> AsyncEngine:
-    return create_async_engine(database_url or settings.database_url, future=True)
+def create_engine(database_url: str | None = None, **overrides: Any) -> AsyncEngine:
+    url = make_url(database_url or settings.database_url)
+    options: dict[str, Any] = {"future": True}
+
+    # In-memory SQLite keeps a single connection in a StaticPool; every other database gets a
+    # queue pool sized from settings.
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+
+    if url.get_driver_name() == "asyncpg":
+        connect_args: dict[str, Any] = {
+            "timeout": settings.db_connect_timeout_seconds,
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+        if settings.db_statement_timeout_ms > 0:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(settings.db_statement_timeout_ms)
+            }
+        options["connect_args"] = connect_args
+
+    options.update(overrides)
+    engine = create_async_engine(url, **options)
+    instrument_engine(engine)
+    install_profiler(engine)
+    return engine
 
 
 engine: AsyncEngine = create_engine()
 SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
 
+replica_engines = [create_engine(url) for url in settings.database_replica_urls]
+session_router = SessionRouter(
+    [
+        async_sessionmaker(bind=replica, expire_on_commit=False, class_=AsyncSession)
+        for replica in replica_engines
+    ],
+    read_your_writes_seconds=settings.replica_read_your_writes_seconds,
+    secret=settings.jwt_secret,
+)
+
+
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return SessionLocal
+
 
 async def get_session() -> AsyncIterator[AsyncSession]:
     async with SessionLocal() as session:
         yield session
 
 
+async def prewarm_pool(engine: AsyncEngine, connections: int) -> None:
+    """Open `connections` pooled connections so the first requests skip the connect handshake."""
+    # Held together, so each checkout opens a new connection rather than reusing the last one.
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            await stack.enter_async_context(engine.connect())
+
+
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    yield
+    await prewarm_pool(engine, settings.db_pool_prewarm)
+    async with SessionLocal() as session:
+        await category_registry.refresh(session)
+    async with (
+        archiver(SessionLocal),
+        session_router.health_checker(settings.replica_health_check_interval_seconds),
+    ):
+        yield
+    shutdown_password_executor()
+    for replica in replica_engines:
+        await replica.dispose()
     await engine.dispose()
@@ -3,45 +3,125 @@ from __future__ import annotations
 import uuid
 from collections.abc import AsyncIterator
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
-from app.database import get_session
+from app.categories import CategoryRegistry, category_registry
+from app.database import engine, get_session, get_sessionmaker, session_router
 from app.models import User
+from app.principals import AuthenticatedUser, Principal, principal_cache
+from app.ratelimit import LoginThrottle, login_throttle
+from app.replicas import COMMITTED, WRITE_MARKER_COOKIE, WRITE_MARKER_STATE, SessionRouter
 from app.security import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 async def get_db_session() -> AsyncIterator[AsyncSession]:
     async for session in get_session():
         yield session
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db_session)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def get_db_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    # For handlers that must own their session's lifetime, e.g. streaming responses, which
+    # outlive the request-scoped session from get_db_session.
+    return get_sessionmaker()
+
+
+def get_session_router() -> SessionRouter:
+    return session_router
+
+
+def record_write(request: Request, router: SessionRouter, user_id: uuid.UUID) -> None:
+    # ReadYourWritesMiddleware turns this into the cookie that pins the user's next reads to
+    # the primary on every worker.
+    cookie = router.record_write(user_id)
+    if cookie is not None:
+        setattr(request.state, WRITE_MARKER_STATE, cookie)
+
 
+def get_db_engine() -> AsyncEngine:
+    return engine
+
+
+def get_login_throttle() -> LoginThrottle:
+    return login_throttle
+
+
+async def get_category_registry(
+    session: AsyncSession = Depends(get_db_session),
+) -> CategoryRegistry:
+    # Only touches the database when the snapshot is missing or expired.
+    await category_registry.ensure_fresh(session)
+    return category_registry
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
     try:
         payload = decode_token(token)
         sub = payload.get("sub")
         if sub is None:
-            raise credentials_exception
-        user_id = uuid.UUID(str(sub))
+            raise _credentials_exception()
+        return Principal(id=uuid.UUID(str(sub)))
     except (JWTError, ValueError) as err:
-        raise credentials_exception from err
+        raise _credentials_exception() from err
+
+
+async def get_read_session(
+    request: Request,
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_db_session),
+    router: SessionRouter = Depends(get_session_router),
+) -> AsyncIterator[AsyncSession]:
+    # For read-only handlers: a replica session, or the primary one (which only connects when
+    # used) when no replica is healthy or the caller wrote recently.
+    replica_session = await router.open_replica_session(
+        principal.id, request.cookies.get(WRITE_MARKER_COOKIE)
+    )
+    if replica_session is None:
+        yield session
+        return
+    async with replica_session:
+        yield replica_session
+
+
+async def get_write_session(
+    request: Request,
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_db_session),
+    router: SessionRouter = Depends(get_session_router),
+) -> AsyncIterator[AsyncSession]:
+    # For handlers that write on the caller's behalf: after a commit, the caller's reads stay
+    # on the primary for the read-your-writes window.
+    yield session
+    if session.info.pop(COMMITTED, False):
+        record_write(request, router, principal.id)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
+) -> AuthenticatedUser:
+    cached = principal_cache.get(principal.id)
+    if cached is not None:
+        return cached
 
-    result = await session.execute(select(User).where(User.id == user_id))
+    result = await session.execute(select(User).where(User.id == principal.id))
     user = result.scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
-    return user
+    authenticated = AuthenticatedUser.from_user(user)
+    principal_cache.put(authenticated)
+    return authenticated
@@ -0,0 +1,17 @@
+"""Conditional GET helpers shared by the routers."""
+
+from __future__ import annotations
+
+import hashlib
+
+
+def make_etag(*parts: object) -> str:
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from fastapi import Depends, HTTPException, Query, status
+from sqlalchemy import Select
+
+from app.models import Expense
+
+
+@dataclass(frozen=True, slots=True)
+class ExpenseFilters:
+    date_from: date | None = None
+    date_to: date | None = None
+    category_ids: tuple[int, ...] = ()
+    currencies: tuple[str, ...] = ()
+    amount_min: Decimal | None = None
+    amount_max: Decimal | None = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self == ExpenseFilters()
+
+    @property
+    def has_amount_range(self) -> bool:
+        return self.amount_min is not None or self.amount_max is not None
+
+    def apply(self, query: Select[Any]) -> Select[Any]:
+        if self.date_from is not None:
+            query = query.where(Expense.transaction_date >= self.date_from)
+        if self.date_to is not None:
+            query = query.where(Expense.transaction_date <= self.date_to)
+        if self.category_ids:
+            query = query.where(Expense.category_id.in_(self.category_ids))
+        if self.currencies:
+            query = query.where(Expense.currency.in_(self.currencies))
+        if self.amount_min is not None:
+            query = query.where(Expense.amount >= self.amount_min)
+        if self.amount_max is not None:
+            query = query.where(Expense.amount <= self.amount_max)
+        return query
+
+
+def amount_range(
+    amount_min: Decimal | None = Query(None, gt=0, description="Inclusive lower bound on amount."),
+    amount_max: Decimal | None = Query(None, gt=0, description="Inclusive upper bound on amount."),
+) -> tuple[Decimal | None, Decimal | None]:
+    if amount_min is not None and amount_max is not None and amount_min > amount_max:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="amount_min must not exceed amount_max",
+        )
+    return amount_min, amount_max
+
+
+def expense_filters(
+    date_from: date | None = Query(None, description="Inclusive lower bound on transaction_date."),
+    date_to: date | None = Query(None, description="Inclusive upper bound on transaction_date."),
+    category_id: list[int] | None = Query(None, description="Repeat to match several categories."),
+    currency: list[str] | None = Query(None, description="Repeat to match several currencies."),
+    amounts: tuple[Decimal | None, Decimal | None] = Depends(amount_range),
+) -> ExpenseFilters:
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="date_from must be on or before date_to",
+        )
+    currencies = tuple(code.upper() for code in currency or ())
+    if any(len(code) != Expense.CURRENCY_CODE_LENGTH for code in currencies):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="currency must be a 3-letter code",
+        )
+    amount_min, amount_max = amounts
+    return ExpenseFilters(
+        date_from=date_from,
+        date_to=date_to,
+        category_ids=tuple(category_id or ()),
+        currencies=currencies,
+        amount_min=amount_min,
+        amount_max=amount_max,
+    )
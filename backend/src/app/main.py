@@ -1,12 +1,24 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
 
+from app.admission import AdmissionMiddleware
 from app.config import settings
-from app.database import lifespan
-from app.routers import auth, expenses
+from app.database import lifespan, replica_engines
+from app.dependencies import get_db_engine
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.profiling import ProfilingMiddleware
+from app.replicas import ReadYourWritesMiddleware
+from app.routers import auth, categories, expenses, internal
 
 app = FastAPI(title="Spendario API", version="0.1.0", lifespan=lifespan)
 
+# Sets the cookie that keeps a writer's reads on the primary; see app.replicas.
+app.add_middleware(ReadYourWritesMiddleware)
+# Inside CORS and metrics, so shed requests still get CORS headers and show up in the metrics.
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -14,6 +26,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Inactive unless SQL_PROFILING is set.
+app.add_middleware(ProfilingMiddleware)
+# Added last so it wraps everything else, CORS preflights included.
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(_: Request, __: PoolTimeoutError) -> JSONResponse:
+    # Every pooled connection stayed busy for DB_POOL_TIMEOUT_SECONDS; shed the request.
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/health", tags=["health"])
@@ -21,5 +47,12 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(engine: AsyncEngine = Depends(get_db_engine)) -> Response:
+    return Response(registry.render([engine, *replica_engines]), media_type=CONTENT_TYPE)
+
+
 app.include_router(auth.router)
+app.include_router(categories.router)
 app.include_router(expenses.router)
+app.include_router(internal.router)
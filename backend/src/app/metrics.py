@@ -0,0 +1,316 @@
+"""In-process metrics served by `GET /metrics` in the Prometheus text exposition format.
+
+Counters, gauges and histograms live in `registry`. `MetricsMiddleware` records per-route
+latency, status codes, in-flight requests and the database work done by each request, which it
+learns from the engine events installed by `instrument_engine`. Connection-pool figures are read
+when the registry is rendered.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.pool import pool_status
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Any other method token a client sends is labelled "other", so it cannot add series.
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def samples(self) -> list[str]: ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last slot is +Inf), sum, count.
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+            counts, totals = series
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return int(series[1][1]) if series else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = sorted((labels, (list(c), list(t))) for labels, (c, t) in self._series.items())
+        lines = []
+        for labels, (counts, (total, count)) in series:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {_format_value(count)}")
+        return lines
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: MetricT) -> MetricT:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, engines: Iterable[AsyncEngine] = ()) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines += metric.header()
+            lines += metric.samples()
+        lines += _pool_samples(engines)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+db_queries = registry.counter("db_queries_total", "SQL statements executed.")
+db_query_duration = registry.counter(
+    "db_query_duration_seconds_total", "Time spent executing SQL statements."
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements per HTTP request.", ("route",), QUERY_COUNT_BUCKETS
+)
+db_time_per_request = registry.histogram(
+    "db_time_per_request_seconds", "SQL execution time per HTTP request.", ("route",)
+)
+admission_in_flight = registry.gauge(
+    "admission_in_flight", "Requests admitted and running, by route class.", ("route_class",)
+)
+admission_waiting = registry.gauge(
+    "admission_waiting", "Requests queued for admission, by route class.", ("route_class",)
+)
+admission_rejected = registry.counter(
+    "admission_rejected_total", "Requests shed with 503 by admission control.", ("route_class",)
+)
+auth_throttled = registry.counter(
+    "auth_throttled_total", "Auth attempts rejected with 429, by action and key.", ("action", "key")
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt time by operation.", ("operation",)
+)
+
+# pool_status field -> (metric name, type, help)
+POOL_METRICS = {
+    "size": ("db_pool_size", "gauge", "Configured pool size."),
+    "checked_in": ("db_pool_checked_in", "gauge", "Idle connections in the pool."),
+    "checked_out": ("db_pool_checked_out", "gauge", "Connections in use."),
+    "overflow": ("db_pool_overflow", "gauge", "Connections opened beyond the pool size."),
+    "waiting": ("db_pool_waiting", "gauge", "Callers waiting for a connection."),
+    "checkouts": ("db_pool_checkouts_total", "counter", "Connections handed out by the pool."),
+    "timeouts": ("db_pool_timeouts_total", "counter", "Checkouts that hit the pool timeout."),
+    "wait_seconds_total": (
+        "db_pool_wait_seconds_total",
+        "counter",
+        "Time callers spent waiting for a connection.",
+    ),
+}
+
+
+def _pool_samples(engines: Iterable[AsyncEngine]) -> list[str]:
+    statuses = [(str(index), pool_status(engine)) for index, engine in enumerate(engines)]
+    lines: list[str] = []
+    for field, (name, kind, documentation) in POOL_METRICS.items():
+        present = [(engine, status[field]) for engine, status in statuses if field in status]
+        if not present:
+            continue
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+        lines += [
+            f'{name}{{engine="{engine}"}} {_format_value(value)}' for engine, value in present
+        ]
+    return lines
+
+
+@dataclass(slots=True)
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Database work done on behalf of the current request, filled in by the engine events.
+_request_queries: ContextVar[QueryStats | None] = ContextVar("request_queries", default=None)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn: Any, *_: Any) -> None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn: Any, *_: Any) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        db_queries.inc()
+        db_query_duration.inc(amount=elapsed)
+        stats = _request_queries.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so instrumentation adds no extra task or response buffering."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = _request_queries.set(stats)
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            _request_queries.reset(token)
+            # The router stores the matched route in the scope; label by its path template to
+            # keep cardinality bounded.
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+            http_requests.inc((method, template, str(status_code)))
+            http_request_duration.observe(elapsed, (method, template))
+            db_queries_per_request.observe(stats.count, (template,))
+            db_time_per_request.observe(stats.seconds, (template,))
@@ -1,6 +1,8 @@
 from app.models.base import Base
 from app.models.category import Category
 from app.models.expense import Expense
+from app.models.expense_archive import ExpenseArchive
+from app.models.expense_monthly_rollup import ExpenseMonthlyRollup
 from app.models.user import User
 
-__all__ = ["Base", "User", "Category", "Expense"]
+__all__ = ["Base", "User", "Category", "Expense", "ExpenseArchive", "ExpenseMonthlyRollup"]
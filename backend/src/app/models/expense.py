@@ -3,8 +3,22 @@ from __future__ import annotations
 import uuid
 from datetime import UTC, date, datetime
 from decimal import Decimal
+from typing import Any
 
-from sqlalchemy import CheckConstraint, Date, DateTime, ForeignKey, Numeric, String, func
+from sqlalchemy import (
+    CheckConstraint,
+    Connection,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Table,
+    event,
+    func,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -33,10 +47,120 @@ class Expense(Base):
         default=lambda: datetime.now(UTC),
     )
     deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, default=None)
+    # Stamped by every INSERT and UPDATE issued through SQLAlchemy, soft deletes included.
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+        onupdate=lambda: datetime.now(UTC),
+    )
+    # users.expenses_version of the write that last touched the row; GET /expenses/changes pages
+    # by it. Rows written before it existed hold 0.
+    change_version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
 
     CURRENCY_CODE_LENGTH = 3
 
     __table_args__ = (
         CheckConstraint("amount > 0", name="amount_positive"),
         CheckConstraint(func.length(currency) == CURRENCY_CODE_LENGTH, name="currency_code_length"),
+        # Partial indexes only cover live rows; queries must filter on deleted_at IS NULL to use them.
+        Index(
+            "ix_expenses_live_user_id_transaction_date_created_at_id",
+            user_id,
+            transaction_date.desc(),
+            created_at.desc(),
+            id,
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        # Keysets of the other GET /expenses sort orders (see app.sorting).
+        Index(
+            "ix_expenses_live_user_id_amount_created_at_id",
+            user_id,
+            amount.desc(),
+            created_at.desc(),
+            id,
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        Index(
+            "ix_expenses_live_user_id_created_at_id",
+            user_id,
+            created_at.desc(),
+            id,
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        # Covers the summary aggregations so they can be answered from the index alone.
+        Index(
+            "ix_expenses_live_user_id_transaction_date_covering",
+            user_id,
+            transaction_date,
+            category_id,
+            currency,
+            amount,
+            postgresql_where=deleted_at.is_(None),
+            sqlite_where=deleted_at.is_(None),
+        ),
+        # Trigram index for substring search on descriptions (needs pg_trgm); SQLite uses the
+        # expenses_search table below instead.
+        Index(
+            "ix_expenses_live_description_trgm",
+            description,
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+            postgresql_where=deleted_at.is_(None),
+        ).ddl_if(dialect="postgresql"),
+        # Delta sync keyset (GET /expenses/changes); covers tombstones, so it is not partial.
+        Index("ix_expenses_user_id_change_version_id", user_id, change_version, id),
+        Index(
+            "ix_expenses_deleted_at",
+            deleted_at,
+            postgresql_where=deleted_at.is_not(None),
+            sqlite_where=deleted_at.is_not(None),
+        ),
     )
+
+
+# SQLite stand-in for ix_expenses_live_description_trgm: an external-content FTS5 table with the
+# trigram tokenizer, kept in step with expenses by triggers. See app.search. It is keyed by the
+# implicit rowid, which VACUUM may renumber; afterwards run
+# INSERT INTO expenses_search (expenses_search) VALUES ('rebuild').
+SQLITE_SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE expenses_search USING fts5(
+        description, content='expenses', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER expenses_search_insert AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_search (rowid, description) VALUES (new.rowid, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER expenses_search_delete AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_search (expenses_search, rowid, description)
+        VALUES ('delete', old.rowid, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER expenses_search_update AFTER UPDATE OF description ON expenses BEGIN
+        INSERT INTO expenses_search (expenses_search, rowid, description)
+        VALUES ('delete', old.rowid, old.description);
+        INSERT INTO expenses_search (rowid, description) VALUES (new.rowid, new.description);
+    END
+    """,
+)
+
+
+@event.listens_for(Expense.__table__, "after_create")
+def _create_sqlite_search(_table: Table, connection: Connection, **_: Any) -> None:
+    if connection.dialect.name == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Expense.__table__, "after_drop")
+def _drop_sqlite_search(_table: Table, connection: Connection, **_: Any) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS expenses_search")
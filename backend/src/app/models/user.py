@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -24,3 +24,11 @@ class User(Base):
         nullable=False,
         default=lambda: datetime.now(UTC),
     )
+    # Live (not soft-deleted) expenses, maintained by the expense write paths.
+    expense_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    # Bumped by every expense write; conditional GETs on /expenses derive their ETags from it.
+    expenses_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
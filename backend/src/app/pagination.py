@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Query
+from sqlalchemy import ColumnElement, and_, or_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class KeysetColumn:
+    column: InstrumentedAttribute[Any]
+    descending: bool
+    parse: Callable[[str], Any]
+
+
+def reverse_keyset(keys: Sequence[KeysetColumn]) -> tuple[KeysetColumn, ...]:
+    """The opposite order, which the index behind `keys` serves by scanning backwards."""
+    return tuple(KeysetColumn(key.column, not key.descending, key.parse) for key in keys)
+
+
+def keyset_order_by(keys: Sequence[KeysetColumn]) -> list[ColumnElement[Any]]:
+    return [key.column.desc() if key.descending else key.column.asc() for key in keys]
+
+
+def keyset_after(keys: Sequence[KeysetColumn], values: Sequence[Any]) -> ColumnElement[bool]:
+    # Expanded form of the row comparison so mixed ASC/DESC keys are supported; the leading
+    # bound is redundant but lets the planner turn it into an index range condition.
+    def beyond(key: KeysetColumn, value: Any) -> ColumnElement[bool]:
+        condition: ColumnElement[bool] = (
+            key.column < value if key.descending else key.column > value
+        )
+        return condition
+
+    branches = []
+    for position, key in enumerate(keys):
+        equal_prefix = [k.column == v for k, v in zip(keys[:position], values, strict=False)]
+        branches.append(and_(*equal_prefix, beyond(key, values[position])))
+
+    first = keys[0]
+    leading = first.column <= values[0] if first.descending else first.column >= values[0]
+    return and_(leading, or_(*branches))
+
+
+def encode_cursor(values: Sequence[Any], order: str) -> str:
+    # The order travels with the cursor so it cannot be replayed against a different one.
+    raw = json.dumps([order, *(str(value) for value in values)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(keys: Sequence[KeysetColumn], cursor: str, order: str) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(raw, list) or len(raw) != len(keys) + 1 or raw[0] != order:
+            raise InvalidCursorError("Invalid cursor")
+        return [key.parse(value) for key, value in zip(keys, raw[1:], strict=True)]
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as err:
+        raise InvalidCursorError("Invalid cursor") from err
+
+
+@dataclass(frozen=True, slots=True)
+class PageParams:
+    page: int
+    page_size: int
+    cursor: str | None
+
+
+def page_params(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(
+        None, description="Opaque keyset cursor; pass an empty value to start cursor paging."
+    ),
+) -> PageParams:
+    return PageParams(page=page, page_size=page_size, cursor=cursor)
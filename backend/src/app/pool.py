@@ -0,0 +1,71 @@
+"""Connection pool with acquisition-time statistics, reported by `GET /internal/pool`."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, PoolProxiedConnection
+
+
+@dataclass
+class PoolWaitStats:
+    checkouts: int = 0
+    waiting: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool` that records how long callers wait for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def connect(self) -> PoolProxiedConnection:
+        stats = self.wait_stats
+        stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            stats.waiting -= 1
+            waited = time.perf_counter() - started
+            stats.wait_seconds_total += waited
+            stats.wait_seconds_max = max(stats.wait_seconds_max, waited)
+        stats.checkouts += 1
+        return connection
+
+
+def pool_status(engine: AsyncEngine) -> dict[str, Any]:
+    pool: Pool = engine.pool
+    status: dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout_seconds=pool.timeout(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats = pool.wait_stats
+        status.update(
+            checkouts=stats.checkouts,
+            waiting=stats.waiting,
+            timeouts=stats.timeouts,
+            wait_seconds_total=round(stats.wait_seconds_total, 6),
+            wait_seconds_max=round(stats.wait_seconds_max, 6),
+            wait_seconds_avg=(
+                round(stats.wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0
+            ),
+        )
+    return status
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Caller identity taken straight from verified token claims, without touching the DB."""
+
+    id: uuid.UUID
+
+
+@dataclass(frozen=True, slots=True)
+class AuthenticatedUser:
+    """Immutable snapshot of a `User` row that is safe to share across requests."""
+
+    id: uuid.UUID
+    email: str
+    full_name: str | None
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> AuthenticatedUser:
+        return cls(
+            id=user.id, email=user.email, full_name=user.full_name, created_at=user.created_at
+        )
+
+
+class PrincipalCache:
+    """Per-process TTL + LRU cache of authenticated users keyed by user id."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[uuid.UUID, tuple[float, AuthenticatedUser]] = OrderedDict()
+
+    def get(self, user_id: uuid.UUID) -> AuthenticatedUser | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= self._clock():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def put(self, user: AuthenticatedUser) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[user.id] = (self._clock() + self.ttl_seconds, user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.auth_cache_max_entries, ttl_seconds=settings.auth_cache_ttl_seconds
+)
+
+
+# ORM-level changes to a user drop its cached snapshot in this process; other workers rely on
+# the TTL. Code that changes users through Core statements must call `invalidate` itself.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(_mapper: Any, _connection: Any, target: User) -> None:
+    principal_cache.invalidate(target.id)
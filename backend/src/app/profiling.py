@@ -0,0 +1,164 @@
+"""Per-request SQL profiling for development (`SQL_PROFILING=true`).
+
+Every statement a request runs is recorded with its duration and the application line that
+issued it. Responses get a `Server-Timing` header, and a warning is logged when a request runs
+more than `SQL_PROFILING_MAX_QUERIES` statements or repeats the same SELECT, the usual sign of
+an N+1 access pattern.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+import structlog
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+logger = structlog.get_logger(__name__)
+
+APP_ROOT = Path(__file__).resolve().parent
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists and multi-row VALUES differ only in their number of placeholders.
+_PLACEHOLDER_LIST = re.compile(r"(\?|%s|\$\d+|:\w+)(\s*,\s*(\?|%s|\$\d+|:\w+))+")
+
+
+@dataclass(frozen=True, slots=True)
+class ProfiledStatement:
+    sql: str
+    duration: float
+    call_site: str
+
+    @property
+    def shape(self) -> str:
+        return _PLACEHOLDER_LIST.sub("?, ...", _WHITESPACE.sub(" ", self.sql).strip())
+
+
+@dataclass(slots=True)
+class RequestProfile:
+    statements: list[ProfiledStatement] = field(default_factory=list)
+
+    @property
+    def total_duration(self) -> float:
+        return sum(statement.duration for statement in self.statements)
+
+    def repeated_selects(self) -> dict[str, int]:
+        shapes = Counter(
+            statement.shape
+            for statement in self.statements
+            if statement.shape.upper().startswith("SELECT")
+        )
+        return {shape: count for shape, count in shapes.items() if count > 1}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_duration * 1000:.2f};desc="{len(self.statements)} queries"'
+
+
+_current_profile: ContextVar[RequestProfile | None] = ContextVar("sql_profile", default=None)
+
+
+@contextmanager
+def profile_statements() -> Iterator[RequestProfile]:
+    profile = RequestProfile()
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def install_profiler(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn: Any, *_: Any) -> None:
+        if _current_profile.get() is not None:
+            conn.info.setdefault("profile_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        profile = _current_profile.get()
+        if profile is None:
+            return
+        duration = time.perf_counter() - conn.info["profile_started_at"].pop()
+        profile.statements.append(
+            ProfiledStatement(sql=statement, duration=duration, call_site=_call_site())
+        )
+
+
+def _call_site() -> str:
+    # Engine events run in the greenlet SQLAlchemy spawns for the sync ORM code; the awaiting
+    # application code is further up the parent greenlet's stack.
+    frame: FrameType | None = sys._getframe(2)
+    current = getcurrent()
+    while True:
+        while frame is not None:
+            path = Path(frame.f_code.co_filename)
+            if path.is_relative_to(APP_ROOT) and path.name != "profiling.py":
+                relative = path.relative_to(APP_ROOT.parent)
+                return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return "unknown"
+        frame = current.gr_frame
+
+
+def report(profile: RequestProfile, method: str, route: str) -> None:
+    statements = [
+        {
+            "sql": statement.shape,
+            "ms": round(statement.duration * 1000, 3),
+            "at": statement.call_site,
+        }
+        for statement in profile.statements
+    ]
+    log = logger.bind(method=method, route=route, queries=len(statements))
+    if len(statements) > settings.sql_profiling_max_queries:
+        log.warning(
+            "request ran too many SQL statements",
+            limit=settings.sql_profiling_max_queries,
+            statements=statements,
+        )
+    repeated = profile.repeated_selects()
+    if repeated:
+        log.warning("request repeated SELECT statements", repeated=repeated, statements=statements)
+    log.debug("sql profile", statements=statements)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.sql_profiling:
+            await self.app(scope, receive, send)
+            return
+
+        with profile_statements() as profile:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", profile.server_timing())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                report(profile, scope["method"], route)
@@ -0,0 +1,118 @@
+"""Token-bucket throttling of `/auth/login` and `/auth/register`.
+
+Each attempt takes one token from a bucket keyed by client IP and one keyed by email; a bucket
+holds up to `capacity` tokens and refills at `refill_per_second`. An empty bucket answers 429 with
+`Retry-After` before the handler looks up the user or runs bcrypt, so a credential-stuffing burst
+costs a dictionary lookup per request instead of a hash computation.
+
+Buckets live in a `RateLimitBackend`. `InMemoryTokenBucketBackend` keeps them per process, so each
+worker enforces the limits on its own; a backend shared by every worker (e.g. Redis running the
+same arithmetic in a script) only has to implement `take`.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+import structlog
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.metrics import auth_throttled
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class TokenBucket:
+    capacity: int
+    refill_per_second: float
+
+    def __post_init__(self) -> None:
+        # A bucket that never refills would make the wait for the next token infinite.
+        if self.capacity < 1 or self.refill_per_second <= 0:
+            raise ValueError("A token bucket needs a positive capacity and refill rate")
+
+
+class RateLimitBackend(Protocol):
+    async def take(self, key: str, bucket: TokenBucket) -> float:
+        """Take a token from `key`'s bucket: 0 when granted, else seconds until one refills."""
+        ...
+
+
+class InMemoryTokenBucketBackend:
+    """Per-process buckets; the least recently used are dropped past `max_keys`."""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, bucket: TokenBucket) -> float:
+        now = self._clock()
+        tokens, updated_at = self._buckets.pop(key, (float(bucket.capacity), now))
+        tokens = min(bucket.capacity, tokens + (now - updated_at) * bucket.refill_per_second)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / bucket.refill_per_second
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            # A dropped bucket comes back full, which only ever errs towards letting requests in.
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class LoginThrottle:
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        per_ip: TokenBucket | None,
+        per_email: TokenBucket | None,
+    ) -> None:
+        self.backend = backend
+        self.per_ip = per_ip
+        self.per_email = per_email
+
+    @classmethod
+    def from_settings(cls, backend: RateLimitBackend | None = None) -> LoginThrottle:
+        def bucket(capacity: int, per_minute: float) -> TokenBucket | None:
+            # A capacity or rate of 0 turns the bucket off.
+            if capacity <= 0 or per_minute <= 0:
+                return None
+            return TokenBucket(capacity, per_minute / 60)
+
+        return cls(
+            backend or InMemoryTokenBucketBackend(settings.auth_rate_limit_max_keys),
+            bucket(settings.auth_rate_limit_ip_burst, settings.auth_rate_limit_ip_per_minute),
+            bucket(settings.auth_rate_limit_email_burst, settings.auth_rate_limit_email_per_minute),
+        )
+
+    async def check(self, action: str, client_ip: str, email: str) -> None:
+        """Raise 429 when `client_ip` or `email` has run out of `action` attempts."""
+        limits = (("ip", client_ip, self.per_ip), ("email", email.strip().lower(), self.per_email))
+        for key_kind, value, bucket in limits:
+            if bucket is None:
+                continue
+            try:
+                wait = await self.backend.take(f"{action}:{key_kind}:{value}", bucket)
+            except Exception:
+                # An unreachable shared store must not lock every user out.
+                logger.exception("rate limit backend failed, allowing request", action=action)
+                return
+            if wait > 0:
+                auth_throttled.inc((action, key_kind))
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many attempts, retry later",
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                )
+
+
+login_throttle = LoginThrottle.from_settings()
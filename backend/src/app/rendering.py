@@ -0,0 +1,80 @@
+"""Pre-built JSON encoding for expense pages.
+
+List endpoints select plain column tuples and encode them in one pydantic-core pass over
+TypedDicts, skipping per-row model validation and FastAPI's response_model round trip. The bytes
+are the same as the `PaginatedExpenses` / `CursorPaginatedExpenses` responses would be.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable, Mapping
+from datetime import date, datetime
+from typing import Any, TypedDict
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+
+
+class ExpenseRow(TypedDict):
+    # ExpenseRead's fields, in the same order.
+    id: uuid.UUID
+    user_id: uuid.UUID
+    category_id: int
+    # Pre-formatted like DecimalStr, so encoding never calls back into Python.
+    amount: str
+    currency: str
+    description: str
+    transaction_date: date
+    created_at: datetime
+
+
+class ExpensePage(TypedDict):
+    items: list[ExpenseRow]
+    total: int
+    page: int
+    page_size: int
+
+
+class ExpenseCursorPage(TypedDict):
+    items: list[ExpenseRow]
+    next_cursor: str | None
+    page_size: int
+
+
+_page_adapter: TypeAdapter[ExpensePage] = TypeAdapter(ExpensePage)
+_cursor_page_adapter: TypeAdapter[ExpenseCursorPage] = TypeAdapter(ExpenseCursorPage)
+
+
+def expense_rows(rows: Iterable[Row[Any]]) -> list[ExpenseRow]:
+    """Rows carrying ExpenseRead's columns, as ready-to-encode dicts."""
+    # Unpacking is several times cheaper than Row attribute access.
+    items: list[ExpenseRow] = []
+    for row in rows:
+        id_, user_id, category_id, amount, currency, description, transaction_date, created_at = row
+        items.append(
+            {
+                "id": id_,
+                "user_id": user_id,
+                "category_id": category_id,
+                "amount": format(amount, "f"),
+                "currency": currency,
+                "description": description,
+                "transaction_date": transaction_date,
+                "created_at": created_at,
+            }
+        )
+    return items
+
+
+def json_response(body: bytes, headers: Mapping[str, str] | None = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def render_page(page: ExpensePage) -> bytes:
+    return _page_adapter.dump_json(page)
+
+
+def render_cursor_page(page: ExpenseCursorPage) -> bytes:
+    return _cursor_page_adapter.dump_json(page)
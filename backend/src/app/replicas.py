@@ -0,0 +1,217 @@
+"""Routing of read-only requests to read replicas.
+
+Reads rotate round-robin over the healthy replicas and fall back to the primary session from
+`get_db_session` when none is available. A user who wrote within the last
+`REPLICA_READ_YOUR_WRITES_SECONDS` reads from the primary, so replication lag never hides their
+own changes. The write is remembered by the worker that served it and, so that every worker
+sees it, in a signed cookie holding the wall-clock time until which the user reads the primary.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import math
+import secrets
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import asynccontextmanager
+from http.cookies import SimpleCookie
+
+import structlog
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = structlog.get_logger(__name__)
+
+# Set in `Session.info` by every commit; see `app.dependencies.get_write_session`.
+COMMITTED = "committed"
+
+WRITE_MARKER_COOKIE = "primary_reads_until"
+# Request state key for the Set-Cookie value; see `ReadYourWritesMiddleware`.
+WRITE_MARKER_STATE = "write_marker_cookie"
+
+# Bounds the per-user write log; expired entries are pruned once it grows past this.
+RECENT_WRITERS_PRUNE_THRESHOLD = 10_000
+
+
+class SessionRouter:
+    def __init__(
+        self,
+        replicas: Sequence[async_sessionmaker[AsyncSession]],
+        *,
+        read_your_writes_seconds: float,
+        secret: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.replicas = list(replicas)
+        self.read_your_writes_seconds = read_your_writes_seconds
+        # Workers only honour each other's markers when they share the secret.
+        self._key = hashlib.sha256(
+            b"read-your-writes:" + (secret.encode() if secret else secrets.token_bytes(32))
+        ).digest()
+        self._clock = clock
+        self._healthy = [True] * len(self.replicas)
+        self._next_replica = 0
+        self._recent_writers: dict[uuid.UUID, float] = {}
+
+    def record_write(self, user_id: uuid.UUID) -> str | None:
+        """Pin `user_id`'s reads to the primary; returns the Set-Cookie value that tells the
+        other workers, or None when there are no replicas to keep the user away from."""
+        if not self.replicas:
+            return None
+        now = self._clock()
+        until = now + self.read_your_writes_seconds
+        self._recent_writers[user_id] = until
+        if len(self._recent_writers) > RECENT_WRITERS_PRUNE_THRESHOLD:
+            self._recent_writers = {
+                writer: until for writer, until in self._recent_writers.items() if until > now
+            }
+
+        cookie: SimpleCookie = SimpleCookie()
+        cookie[WRITE_MARKER_COOKIE] = self._sign(user_id, until)
+        morsel = cookie[WRITE_MARKER_COOKIE]
+        morsel["max-age"] = math.ceil(self.read_your_writes_seconds)
+        morsel["path"] = "/"
+        morsel["httponly"] = True
+        morsel["samesite"] = "lax"
+        return morsel.OutputString()
+
+    def wrote_recently(self, user_id: uuid.UUID, marker: str | None = None) -> bool:
+        """Whether `user_id` wrote within the window, per this worker or a cookie `marker`."""
+        now = self._clock()
+        until = self._recent_writers.get(user_id)
+        if until is not None and until <= now:
+            del self._recent_writers[user_id]
+        elif until is not None:
+            return True
+        marked_until = self._verify(user_id, marker) if marker else None
+        return marked_until is not None and marked_until > now
+
+    def replica_for(
+        self, user_id: uuid.UUID, marker: str | None = None
+    ) -> async_sessionmaker[AsyncSession] | None:
+        """Next healthy replica in rotation, or None when the caller should read the primary."""
+        if not self.replicas or self.wrote_recently(user_id, marker):
+            return None
+        for _ in range(len(self.replicas)):
+            index = self._next_replica
+            self._next_replica = (index + 1) % len(self.replicas)
+            if self._healthy[index]:
+                return self.replicas[index]
+        return None
+
+    def _sign(self, user_id: uuid.UUID, until: float) -> str:
+        payload = f"{user_id.hex}.{until:.3f}"
+        digest = hmac.new(self._key, payload.encode(), hashlib.sha256).hexdigest()
+        return f"{payload}.{digest}"
+
+    def _verify(self, user_id: uuid.UUID, marker: str) -> float | None:
+        payload, _, digest = marker.rpartition(".")
+        expected = hmac.new(self._key, payload.encode(), hashlib.sha256).hexdigest()
+        owner, _, until = payload.partition(".")
+        if not hmac.compare_digest(digest, expected) or owner != user_id.hex:
+            return None
+        try:
+            return float(until)
+        except ValueError:
+            return None
+
+    def mark_unhealthy(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        for index, replica in enumerate(self.replicas):
+            if replica is session_factory and self._healthy[index]:
+                self._healthy[index] = False
+                logger.warning("read replica marked unhealthy", replica=index)
+
+    @property
+    def healthy_replicas(self) -> int:
+        return sum(self._healthy)
+
+    async def check_health(self) -> None:
+        for index, replica in enumerate(self.replicas):
+            healthy = await _responds(replica)
+            if healthy != self._healthy[index]:
+                logger.info("read replica health changed", replica=index, healthy=healthy)
+            self._healthy[index] = healthy
+
+    async def run_health_checks(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+
+    @asynccontextmanager
+    async def health_checker(self, interval: float) -> AsyncIterator[None]:
+        if not self.replicas or interval <= 0:
+            yield
+            return
+
+        task = asyncio.create_task(self.run_health_checks(interval))
+        try:
+            yield
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def open_replica_session(
+        self, user_id: uuid.UUID, marker: str | None = None
+    ) -> AsyncSession | None:
+        replica = self.replica_for(user_id, marker)
+        if replica is None:
+            return None
+        session = replica()
+        try:
+            # Connect up front so a replica that went down since the last health check costs
+            # one failed checkout rather than a failed request.
+            await session.connection()
+        except (OSError, SQLAlchemyError):
+            await session.close()
+            self.mark_unhealthy(replica)
+            return None
+        return session
+
+
+class ReadYourWritesMiddleware:
+    """Sends the write marker a handler left in the request state as a cookie.
+
+    Pure ASGI, so it also reaches responses a handler returns itself (e.g. 204 deletes), whose
+    headers FastAPI does not merge from injected `Response` parameters.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                cookie = scope.get("state", {}).get(WRITE_MARKER_STATE)
+                if cookie is not None:
+                    MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
+
+
+async def _responds(session_factory: async_sessionmaker[AsyncSession]) -> bool:
+    try:
+        async with session_factory() as session:
+            await session.execute(text("SELECT 1"))
+    except (OSError, SQLAlchemyError):
+        return False
+    return True
+
+
+@event.listens_for(Session, "after_commit")
+def _flag_commit(session: Session) -> None:
+    session.info[COMMITTED] = True
@@ -0,0 +1,323 @@
+"""Monthly spend rollups maintained alongside `expenses`.
+
+Expense write paths collect `RollupDeltas` and apply them in their own transaction, so
+`expense_monthly_rollups` always matches the live expenses. Summary reads whose date range falls
+on whole months are answered from the rollups in O(months).
+
+    python -m app.rollups verify [--user-id UUID]
+    python -m app.rollups rebuild [--user-id UUID]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Literal
+
+from sqlalchemy import (
+    CursorResult,
+    Executable,
+    Select,
+    delete,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import String
+
+from app.filters import ExpenseFilters
+from app.models import Expense, ExpenseMonthlyRollup
+from app.schemas.expense import ExpenseRead
+
+SummaryGroup = Literal["year_month", "category_id", "currency"]
+ROLLUP_KEY = ("user_id", "year_month", "category_id", "currency")
+
+
+class year_month_of(FunctionElement[str]):
+    type = String(7)
+    name = "year_month_of"
+    inherit_cache = True
+
+
+@compiles(year_month_of)
+def _compile_year_month(element: year_month_of, compiler: SQLCompiler, **kw: Any) -> str:
+    (column,) = element.clauses
+    return compiler.process(func.to_char(column, literal_column("'YYYY-MM'")), **kw)
+
+
+@compiles(year_month_of, "sqlite")
+def _compile_year_month_sqlite(element: year_month_of, compiler: SQLCompiler, **kw: Any) -> str:
+    (column,) = element.clauses
+    return compiler.process(func.strftime(literal_column("'%Y-%m'"), column), **kw)
+
+
+def year_month(value: date) -> str:
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+@dataclass(frozen=True, slots=True)
+class RollupKey:
+    user_id: uuid.UUID
+    year_month: str
+    category_id: int
+    currency: str
+
+    @classmethod
+    def of(
+        cls, user_id: uuid.UUID, transaction_date: date, category_id: int, currency: str
+    ) -> RollupKey:
+        return cls(
+            user_id=user_id,
+            year_month=year_month(transaction_date),
+            category_id=category_id,
+            currency=currency,
+        )
+
+    @classmethod
+    def for_expense(cls, expense: Expense | ExpenseRead) -> RollupKey:
+        return cls.of(
+            expense.user_id, expense.transaction_date, expense.category_id, expense.currency
+        )
+
+
+class RollupDeltas:
+    def __init__(self) -> None:
+        self._deltas: dict[RollupKey, tuple[Decimal, int]] = {}
+
+    def add(self, key: RollupKey, amount: Decimal, count: int = 1) -> None:
+        total, expenses = self._deltas.get(key, (Decimal(0), 0))
+        self._deltas[key] = (total + amount, expenses + count)
+
+    def remove(self, key: RollupKey, amount: Decimal) -> None:
+        self.add(key, -amount, -1)
+
+    async def apply(self, session: AsyncSession) -> None:
+        rows = [
+            {
+                "user_id": key.user_id,
+                "year_month": key.year_month,
+                "category_id": key.category_id,
+                "currency": key.currency,
+                "total_amount": total,
+                "expense_count": count,
+            }
+            for key, (total, count) in self._deltas.items()
+            if total or count
+        ]
+        if not rows:
+            return
+
+        # Keys are unique within `rows`, so a single multi-row upsert is safe.
+        upsert = _upsert_rollups(session.get_bind().dialect.name, rows)
+        if upsert is not None:
+            await session.execute(upsert)
+        else:
+            for row in rows:
+                await _add_rollup_row(session, row)
+        self._deltas.clear()
+
+
+def _upsert_rollups(dialect: str, rows: list[dict[str, Any]]) -> Executable | None:
+    """A single ON CONFLICT upsert of `rows`, or None when `dialect` has no such statement."""
+    key = list(ROLLUP_KEY)
+    if dialect == "postgresql":
+        pg_insert = postgresql.insert(ExpenseMonthlyRollup).values(rows)
+        return pg_insert.on_conflict_do_update(
+            index_elements=key, set_=_accumulate(pg_insert.excluded)
+        )
+    if dialect == "sqlite":
+        sqlite_insert = sqlite.insert(ExpenseMonthlyRollup).values(rows)
+        return sqlite_insert.on_conflict_do_update(
+            index_elements=key, set_=_accumulate(sqlite_insert.excluded)
+        )
+    return None
+
+
+async def _add_rollup_row(session: AsyncSession, row: dict[str, Any]) -> None:
+    """Portable upsert of one row: add to the stored totals, inserting the row when missing."""
+    rollup = ExpenseMonthlyRollup
+    add = (
+        update(rollup)
+        .where(*(getattr(rollup, name) == row[name] for name in ROLLUP_KEY))
+        .values(
+            total_amount=rollup.total_amount + row["total_amount"],
+            expense_count=rollup.expense_count + row["expense_count"],
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result: CursorResult[Any] = await session.execute(add)  # type: ignore[assignment]
+    if result.rowcount:
+        return
+    try:
+        async with session.begin_nested():
+            await session.execute(insert(rollup).values(row))
+    except IntegrityError:
+        # A concurrent transaction inserted the row since the UPDATE; add to it instead.
+        await session.execute(add)
+
+
+def _accumulate(excluded: Any) -> dict[str, Any]:
+    return {
+        "total_amount": ExpenseMonthlyRollup.total_amount + excluded.total_amount,
+        "expense_count": ExpenseMonthlyRollup.expense_count + excluded.expense_count,
+    }
+
+
+def _aggregate_expenses(user_id: uuid.UUID | None) -> Select[Any]:
+    month = year_month_of(Expense.transaction_date)
+    query = select(
+        Expense.user_id,
+        month,
+        Expense.category_id,
+        Expense.currency,
+        func.sum(Expense.amount),
+        func.count(),
+    ).where(Expense.deleted_at.is_(None))
+    if user_id is not None:
+        query = query.where(Expense.user_id == user_id)
+    return query.group_by(Expense.user_id, month, Expense.category_id, Expense.currency)
+
+
+async def rebuild_rollups(session: AsyncSession, user_id: uuid.UUID | None = None) -> None:
+    clear = delete(ExpenseMonthlyRollup)
+    if user_id is not None:
+        clear = clear.where(ExpenseMonthlyRollup.user_id == user_id)
+    await session.execute(clear)
+    await session.execute(
+        insert(ExpenseMonthlyRollup).from_select(
+            ["user_id", "year_month", "category_id", "currency", "total_amount", "expense_count"],
+            _aggregate_expenses(user_id),
+        )
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class RollupMismatch:
+    key: RollupKey
+    expected: tuple[Decimal, int]
+    actual: tuple[Decimal, int]
+
+
+async def verify_rollups(
+    session: AsyncSession, user_id: uuid.UUID | None = None
+) -> list[RollupMismatch]:
+    expected = {
+        RollupKey(*row[:4]): (Decimal(row[4]), row[5])
+        for row in (await session.execute(_aggregate_expenses(user_id))).all()
+    }
+    stored = select(
+        ExpenseMonthlyRollup.user_id,
+        ExpenseMonthlyRollup.year_month,
+        ExpenseMonthlyRollup.category_id,
+        ExpenseMonthlyRollup.currency,
+        ExpenseMonthlyRollup.total_amount,
+        ExpenseMonthlyRollup.expense_count,
+    ).where(or_(ExpenseMonthlyRollup.expense_count != 0, ExpenseMonthlyRollup.total_amount != 0))
+    if user_id is not None:
+        stored = stored.where(ExpenseMonthlyRollup.user_id == user_id)
+    actual = {
+        RollupKey(*row[:4]): (Decimal(row[4]), row[5])
+        for row in (await session.execute(stored)).all()
+    }
+
+    empty = (Decimal(0), 0)
+    return [
+        RollupMismatch(key=key, expected=expected.get(key, empty), actual=actual.get(key, empty))
+        for key in sorted(expected.keys() | actual.keys(), key=str)
+        if expected.get(key, empty) != actual.get(key, empty)
+    ]
+
+
+def _month_bounds(filters: ExpenseFilters) -> tuple[str | None, str | None] | None:
+    """Return the filter's range in whole months, or None when the rollups cannot answer it."""
+    if filters.has_amount_range:
+        return None
+    if filters.date_from is not None and filters.date_from.day != 1:
+        return None
+    if filters.date_to is not None and (filters.date_to + timedelta(days=1)).day != 1:
+        return None
+    return (
+        year_month(filters.date_from) if filters.date_from else None,
+        year_month(filters.date_to) if filters.date_to else None,
+    )
+
+
+def summary_query(
+    user_id: uuid.UUID, filters: ExpenseFilters, group_by: Sequence[SummaryGroup]
+) -> Select[Any]:
+    """Rows of (*group_by, total, count), read from the rollups whenever the filters allow."""
+    bounds = _month_bounds(filters)
+    if bounds is None:
+        # Every referenced column is in ix_expenses_live_user_id_transaction_date_covering.
+        columns = {
+            "year_month": year_month_of(Expense.transaction_date),
+            "category_id": Expense.category_id,
+            "currency": Expense.currency,
+        }
+        groups = [columns[name] for name in group_by]
+        query = select(*groups, func.sum(Expense.amount), func.count()).where(
+            Expense.user_id == user_id, Expense.deleted_at.is_(None)
+        )
+        return filters.apply(query).group_by(*groups).order_by(*groups)
+
+    rollup = ExpenseMonthlyRollup
+    groups = [getattr(rollup, name) for name in group_by]
+    query = (
+        select(*groups, func.sum(rollup.total_amount), func.sum(rollup.expense_count))
+        .where(rollup.user_id == user_id)
+        .group_by(*groups)
+        .having(func.sum(rollup.expense_count) > 0)
+        .order_by(*groups)
+    )
+    month_from, month_to = bounds
+    if month_from is not None:
+        query = query.where(rollup.year_month >= month_from)
+    if month_to is not None:
+        query = query.where(rollup.year_month <= month_to)
+    if filters.category_ids:
+        query = query.where(rollup.category_id.in_(filters.category_ids))
+    if filters.currencies:
+        query = query.where(rollup.currency.in_(filters.currencies))
+    return query
+
+
+async def _main(command: str, user_id: uuid.UUID | None) -> int:
+    from app.database import SessionLocal, engine
+
+    try:
+        async with SessionLocal() as session:
+            if command == "rebuild":
+                await rebuild_rollups(session, user_id)
+                await session.commit()
+                print("rollups rebuilt")
+                return 0
+
+            mismatches = await verify_rollups(session, user_id)
+            for mismatch in mismatches:
+                print(f"{mismatch.key}: expected {mismatch.expected}, stored {mismatch.actual}")
+            print(f"{len(mismatches)} mismatched rollup rows")
+            return 1 if mismatches else 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify or rebuild expense_monthly_rollups.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.command, args.user_id)))
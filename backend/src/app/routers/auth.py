@@ -1,37 +1,78 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_current_user, get_db_session
+from app.dependencies import (
+    get_current_user,
+    get_db_session,
+    get_login_throttle,
+    get_session_router,
+    record_write,
+)
 from app.models import User
+from app.principals import AuthenticatedUser, principal_cache
+from app.ratelimit import LoginThrottle
+from app.replicas import SessionRouter
 from app.schemas.auth import LoginRequest, RegisterRequest, TokenResponse, UserRead
-from app.security import create_access_token, hash_password, verify_password
+from app.security import create_access_token, hash_password_async, verify_password_async
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-async def register(payload: RegisterRequest, session: AsyncSession = Depends(get_db_session)) -> TokenResponse:
-    existing = await session.execute(select(User).where(User.email == payload.email))
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+def _client_ip(request: Request) -> str:
+    # Behind a proxy uvicorn fills this from X-Forwarded-For when the proxy is listed in
+    # FORWARDED_ALLOW_IPS.
+    return request.client.host if request.client else "unknown"
+
 
-    user = User(email=payload.email, hashed_password=hash_password(payload.password), full_name=payload.full_name)
+@router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+async def register(
+    payload: RegisterRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+    session_router: SessionRouter = Depends(get_session_router),
+    throttle: LoginThrottle = Depends(get_login_throttle),
+) -> TokenResponse:
+    await throttle.check("register", _client_ip(request), payload.email)
+    # The unique index on users.email rejects duplicates, saving a lookup on every sign-up.
+    hashed_password = await hash_password_async(payload.password)
+    user = User(email=payload.email, hashed_password=hashed_password, full_name=payload.full_name)
     session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    try:
+        await session.commit()
+    except IntegrityError as err:
+        await session.rollback()
+        # Only the email's unique index makes this a client error; anything else is a bug.
+        taken = await session.scalar(select(User.id).where(User.email == payload.email))
+        if taken is None:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
+        ) from err
+    record_write(request, session_router, user.id)
+    principal_cache.put(AuthenticatedUser.from_user(user))
 
     token = create_access_token(user.id)
     return TokenResponse(access_token=token, user=UserRead.model_validate(user))
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(payload: LoginRequest, session: AsyncSession = Depends(get_db_session)) -> TokenResponse:
+async def login(
+    payload: LoginRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+    throttle: LoginThrottle = Depends(get_login_throttle),
+) -> TokenResponse:
+    # Before the lookup and bcrypt: a throttled attempt costs neither.
+    await throttle.check("login", _client_ip(request), payload.email)
     result = await session.execute(select(User).where(User.email == payload.email))
     user = result.scalar_one_or_none()
-    valid_password = user is not None and verify_password(payload.password, user.hashed_password)
+    valid_password = user is not None and await verify_password_async(
+        payload.password, user.hashed_password
+    )
     if not user or not valid_password:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
@@ -40,5 +81,5 @@ async def login(payload: LoginRequest, session: AsyncSession = Depends(get_db_se
 
 
 @router.get("/me", response_model=UserRead)
-async def me(current_user: User = Depends(get_current_user)) -> UserRead:
+async def me(current_user: AuthenticatedUser = Depends(get_current_user)) -> UserRead:
     return UserRead.model_validate(current_user)
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Request, Response, status
+
+from app.categories import CategoryRegistry
+from app.dependencies import get_category_registry
+from app.etags import etag_matches
+from app.schemas.category import CategoryRead
+
+router = APIRouter(prefix="/categories", tags=["categories"])
+
+
+@router.get("", response_model=list[CategoryRead])
+async def list_categories(
+    request: Request, categories: CategoryRegistry = Depends(get_category_registry)
+) -> Response:
+    # Served from the pre-rendered registry snapshot; clients revalidate with If-None-Match.
+    headers = {"ETag": categories.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), categories.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=categories.body, media_type="application/json", headers=headers)
@@ -1,25 +1,122 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import AsyncIterator, Callable, Sequence
 from datetime import UTC, datetime
+from decimal import Decimal
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import ColumnElement, Executable, Row, Select, func, insert, select, update
+from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.dependencies import get_current_user, get_db_session
-from app.models import Category, Expense, User
-from app.schemas.expense import ExpenseCreate, ExpenseRead, ExpenseUpdate, PaginatedExpenses
+from app.categories import CategoryRegistry
+from app.dependencies import (
+    get_category_registry,
+    get_current_principal,
+    get_db_session,
+    get_db_sessionmaker,
+    get_read_session,
+    get_write_session,
+)
+from app.etags import etag_matches, make_etag
+from app.filters import ExpenseFilters, expense_filters
+from app.models import Expense, ExpenseArchive, User
+from app.pagination import (
+    InvalidCursorError,
+    KeysetColumn,
+    PageParams,
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
+    keyset_order_by,
+    page_params,
+)
+from app.principals import Principal
+from app.rendering import expense_rows, json_response, render_cursor_page, render_page
+from app.rollups import RollupDeltas, RollupKey, summary_query, year_month
+from app.schemas.expense import (
+    BatchDelete,
+    BatchItemResult,
+    BatchUpdate,
+    BulkImportResult,
+    BulkImportRowError,
+    CategoryTotal,
+    CurrencyTotal,
+    CursorPaginatedExpenses,
+    ExpenseBatch,
+    ExpenseBatchResult,
+    ExpenseChange,
+    ExpenseChanges,
+    ExpenseCreate,
+    ExpenseRead,
+    ExpenseUpdate,
+    MonthlyTotal,
+    PaginatedExpenses,
+)
+from app.search import ExpenseSearch, expense_search
+from app.sorting import DEFAULT_SORT, EXPENSE_SORTS, ExpenseSort
+from app.tabular import (
+    CSV_MEDIA_TYPES,
+    NDJSON_MEDIA_TYPES,
+    MalformedStreamError,
+    Record,
+    encode_csv_rows,
+    encode_ndjson_rows,
+    iter_csv_records,
+    iter_ndjson_records,
+)
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
+BULK_INSERT_BATCH_SIZE = 1000
+# Carried by bulk-imported rows until the import's commit takes a version for them.
+PENDING_CHANGE_VERSION = -1
+BULK_MAX_REPORTED_ERRORS = 1000
+EXPORT_PARTITION_SIZE = 1000
+# Column order of exports; CSV exports can be fed back into POST /expenses/bulk.
+EXPORT_COLUMNS = (
+    Expense.id,
+    Expense.amount,
+    Expense.currency,
+    Expense.description,
+    Expense.transaction_date,
+    Expense.category_id,
+    Expense.created_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+READ_COLUMNS = tuple(getattr(Expense, field) for field in ExpenseRead.model_fields)
+READ_FIELDS = tuple(ExpenseRead.model_fields)
+# What moving an expense's rollup contribution needs to know about its previous state.
+PREVIOUS_COLUMNS = (Expense.transaction_date, Expense.category_id, Expense.currency, Expense.amount)
+LOCKED_COLUMNS = (Expense.id, Expense.created_at, *PREVIOUS_COLUMNS)
+# GET /expenses/changes walks ix_expenses_user_id_change_version_id in ascending order.
+CHANGE_KEYS = (
+    KeysetColumn(Expense.change_version, descending=False, parse=int),
+    KeysetColumn(Expense.id, descending=False, parse=uuid.UUID),
+)
+ARCHIVED_CHANGE_KEYS = (
+    KeysetColumn(ExpenseArchive.change_version, descending=False, parse=int),
+    KeysetColumn(ExpenseArchive.id, descending=False, parse=uuid.UUID),
+)
+LAST_ID = uuid.UUID(int=(1 << 128) - 1)
+CHANGES_ORDER = "changes"
+CHANGE_COLUMNS = tuple(getattr(Expense, field) for field in ExpenseChange.model_fields)
+CHANGE_FIELDS = tuple(ExpenseChange.model_fields)
+
+
+def _owned_live_expense(
+    expense_id: uuid.UUID, user_id: uuid.UUID
+) -> tuple[ColumnElement[bool], ...]:
+    return Expense.id == expense_id, Expense.user_id == user_id, Expense.deleted_at.is_(None)
+
 
 async def _get_owned_expense(expense_id: uuid.UUID, user_id: uuid.UUID, session: AsyncSession) -> Expense:
-    query = select(Expense).where(
-        Expense.id == expense_id,
-        Expense.user_id == user_id,
-        Expense.deleted_at.is_(None),
-    )
+    query = select(Expense).where(*_owned_live_expense(expense_id, user_id))
     result = await session.execute(query)
     expense = result.scalar_one_or_none()
     if expense is None:
@@ -27,16 +124,70 @@ async def _get_owned_expense(expense_id: uuid.UUID, user_id: uuid.UUID, session:
     return expense
 
 
+async def _next_expenses_version(
+    session: AsyncSession, user_id: uuid.UUID, count_delta: int = 0
+) -> int:
+    """Bump the user's expenses version and return it, to stamp on the rows about to be written.
+
+    Runs before any expense row is touched: the UPDATE holds the user's row lock until commit, so
+    one user's writes commit in version order and GET /expenses/changes can page by version.
+    Moving the version also invalidates the user's list and item ETags.
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            expense_count=User.expense_count + count_delta,
+            expenses_version=User.expenses_version + 1,
+        )
+        .returning(User.expenses_version)
+    )
+    version = result.scalar_one_or_none()
+    if version is None:
+        # The token outlived its user.
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials"
+        )
+    return version
+
+
+async def _adjust_expense_count(session: AsyncSession, user_id: uuid.UUID, delta: int) -> None:
+    # For writes that only learn how many rows they added or removed after stamping them.
+    await session.execute(
+        update(User).where(User.id == user_id).values(expense_count=User.expense_count + delta)
+    )
+
+
+async def _revalidate_expenses(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_principal),
+) -> None:
+    """Answer 304 when the caller's copy is current, before any expense is read."""
+    version_query = select(User.expenses_version).where(User.id == current_user.id)
+    version = (await session.execute(version_query)).scalar_one_or_none()
+    if version is None:
+        # Tokens outlive their user; the handler answers as it would without a cache.
+        return
+    etag = make_etag(current_user.id, version, request.url.path, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
 @router.post("", response_model=ExpenseRead, status_code=status.HTTP_201_CREATED)
 async def create_expense(
     payload: ExpenseCreate,
-    session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session),
+    categories: CategoryRegistry = Depends(get_category_registry),
+    current_user: Principal = Depends(get_current_principal),
 ) -> ExpenseRead:
-    category = await session.get(Category, payload.category_id)
-    if category is None:
+    if payload.category_id not in categories:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
+    version = await _next_expenses_version(session, current_user.id, 1)
     expense = Expense(
         user_id=current_user.id,
         category_id=payload.category_id,
@@ -44,85 +195,648 @@ async def create_expense(
         currency=payload.currency.upper(),
         description=payload.description,
         transaction_date=payload.transaction_date,
+        change_version=version,
     )
     session.add(expense)
+    rollups = RollupDeltas()
+    rollups.add(RollupKey.for_expense(expense), expense.amount)
+    await rollups.apply(session)
     await session.commit()
-    await session.refresh(expense)
     return ExpenseRead.model_validate(expense)
 
 
-@router.get("", response_model=PaginatedExpenses)
-async def list_expenses(
-    page: int = Query(1, ge=1),
+@router.post(
+    "/bulk",
+    response_model=BulkImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_import_expenses(
+    request: Request,
+    session: AsyncSession = Depends(get_write_session),
+    categories: CategoryRegistry = Depends(get_category_registry),
+    current_user: Principal = Depends(get_current_principal),
+) -> BulkImportResult:
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type in CSV_MEDIA_TYPES:
+        records = iter_csv_records(request.stream())
+    elif media_type in NDJSON_MEDIA_TYPES:
+        records = iter_ndjson_records(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson",
+        )
+
+    inserted = 0
+    error_count = 0
+    errors: list[BulkImportRowError] = []
+    batch: list[dict[str, object]] = []
+    rollups = RollupDeltas()
+
+    def reject(row: int, messages: list[str]) -> None:
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < BULK_MAX_REPORTED_ERRORS:
+            errors.append(BulkImportRowError(row=row, errors=messages))
+
+    try:
+        async for record in records:
+            payload = _validate_import_record(record, reject)
+            if payload is None:
+                continue
+            if payload.category_id not in categories:
+                reject(record.row, ["category_id: Category not found"])
+                continue
+
+            currency = payload.currency.upper()
+            batch.append(
+                {
+                    "user_id": current_user.id,
+                    "change_version": PENDING_CHANGE_VERSION,
+                    "category_id": payload.category_id,
+                    "amount": payload.amount,
+                    "currency": currency,
+                    "description": payload.description,
+                    "transaction_date": payload.transaction_date,
+                }
+            )
+            rollups.add(
+                RollupKey(
+                    user_id=current_user.id,
+                    year_month=year_month(payload.transaction_date),
+                    category_id=payload.category_id,
+                    currency=currency,
+                ),
+                payload.amount,
+            )
+            if len(batch) >= BULK_INSERT_BATCH_SIZE:
+                await session.execute(insert(Expense), batch)
+                inserted += len(batch)
+                batch = []
+    except MalformedStreamError as err:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err)) from err
+
+    if batch:
+        await session.execute(insert(Expense), batch)
+        inserted += len(batch)
+    if inserted:
+        # Only once the upload is read: bumping the version locks the user's row until the
+        # commit, which would queue every other write of theirs behind a slow client.
+        version = await _next_expenses_version(session, current_user.id, inserted)
+        await session.execute(
+            update(Expense)
+            .where(
+                Expense.user_id == current_user.id,
+                Expense.change_version == PENDING_CHANGE_VERSION,
+            )
+            .values(change_version=version)
+            .execution_options(synchronize_session=False)
+        )
+    await rollups.apply(session)
+    await session.commit()
+
+    return BulkImportResult(inserted=inserted, error_count=error_count, errors=errors)
+
+
+def _validate_import_record(
+    record: Record, reject: Callable[[int, list[str]], None]
+) -> ExpenseCreate | None:
+    if record.data is None:
+        reject(record.row, [record.error or "Invalid row"])
+        return None
+    try:
+        return ExpenseCreate.model_validate(record.data)
+    except ValidationError as err:
+        reject(
+            record.row,
+            [
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in err.errors()
+            ],
+        )
+        return None
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_expenses(
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    filters: ExpenseFilters = Depends(expense_filters),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_sessionmaker),
+    current_user: Principal = Depends(get_current_principal),
+) -> StreamingResponse:
+    query = (
+        filters.apply(
+            select(*EXPORT_COLUMNS).where(
+                Expense.user_id == current_user.id, Expense.deleted_at.is_(None)
+            )
+        )
+        .order_by(*keyset_order_by(EXPENSE_SORTS[DEFAULT_SORT]))
+        .execution_options(yield_per=EXPORT_PARTITION_SIZE)
+    )
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(session_factory, query, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="expenses.{export_format}"'},
+    )
+
+
+async def _stream_export(
+    session_factory: async_sessionmaker[AsyncSession],
+    query: Select[Any],
+    export_format: Literal["csv", "ndjson"],
+) -> AsyncIterator[bytes]:
+    # The request-scoped session is closed before the body is sent, so the export owns its
+    # session and reads through a server-side cursor one partition at a time.
+    if export_format == "csv":
+        yield encode_csv_rows((), header=EXPORT_FIELDS)
+    async with session_factory() as session:
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            values = [_export_values(row) for row in partition]
+            if export_format == "csv":
+                yield encode_csv_rows(values)
+            else:
+                yield encode_ndjson_rows(
+                    dict(zip(EXPORT_FIELDS, row, strict=True)) for row in values
+                )
+
+
+def _export_values(row: Sequence[Any]) -> tuple[Any, ...]:
+    expense_id, amount, currency, description, transaction_date, category_id, created_at = row
+    return (
+        str(expense_id),
+        format(amount, "f"),
+        currency,
+        description,
+        transaction_date.isoformat(),
+        category_id,
+        created_at.isoformat(),
+    )
+
+
+@router.get("/search", response_model=CursorPaginatedExpenses)
+async def search_expenses(
+    search: ExpenseSearch = Depends(expense_search),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: str = Query("", description="next_cursor from the previous page."),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_principal),
+) -> Response:
+    query = await search.query(current_user.id, session)
+    body = await _list_expenses_after_cursor(query, cursor, page_size, session)
+    return json_response(body)
+
+
+@router.get("/changes", response_model=ExpenseChanges)
+async def list_expense_changes(
+    since: str = Query("", description="next_token from the previous sync; empty for all."),
+    page_size: int = Query(500, ge=1, le=1000),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_principal),
+) -> ExpenseChanges:
+    """Expenses created, edited or deleted since `since`, in the order they were written.
+
+    Keep the returned `next_token` for the next call and repeat while `has_more`. Items are
+    upserts, or tombstones when `deleted_at` is set.
+    """
+    # Read first: every write with this version or lower has committed, so the rows query
+    # below sees all of them.
+    version_query = select(User.expenses_version).where(User.id == current_user.id)
+    version = (await session.execute(version_query)).scalar_one_or_none() or 0
+
+    query = select(*CHANGE_COLUMNS, Expense.change_version).where(
+        Expense.user_id == current_user.id
+    )
+    position: list[Any] = [0, uuid.UUID(int=0)]
+    if since:
+        try:
+            position = decode_cursor(CHANGE_KEYS, since, CHANGES_ORDER)
+        except InvalidCursorError as err:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token"
+            ) from err
+        # Tombstones the client has not seen yet may have been archived since.
+        archived = select(ExpenseArchive.id).where(
+            ExpenseArchive.user_id == current_user.id,
+            keyset_after(ARCHIVED_CHANGE_KEYS, position),
+        )
+        if (await session.execute(archived.limit(1))).first() is not None:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync token expired, download the full list again",
+            )
+        query = query.where(keyset_after(CHANGE_KEYS, position))
+
+    result = await session.execute(
+        query.order_by(*keyset_order_by(CHANGE_KEYS)).limit(page_size + 1)
+    )
+    rows = result.all()
+    has_more = len(rows) > page_size
+    # The trailing change_version only feeds the token.
+    items = [
+        ExpenseChange.model_validate(dict(zip(CHANGE_FIELDS, row, strict=False)))
+        for row in rows[:page_size]
+    ]
+    if items:
+        last = rows[len(items) - 1]
+        position = [last.change_version, last.id]
+    if not has_more:
+        # Caught up to `version`: the token moves past it even when its last changes are
+        # tombstones that get archived later.
+        position = max(position, [version, LAST_ID])
+    return ExpenseChanges(
+        items=items, next_token=encode_cursor(position, CHANGES_ORDER), has_more=has_more
+    )
+
+
+@router.get("/summary/by-month", response_model=list[MonthlyTotal])
+async def summarize_expenses_by_month(
+    filters: ExpenseFilters = Depends(expense_filters),
     session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
-) -> PaginatedExpenses:
-    base_query = select(Expense).where(Expense.user_id == current_user.id, Expense.deleted_at.is_(None))
+    current_user: Principal = Depends(get_current_principal),
+) -> list[MonthlyTotal]:
+    query = summary_query(current_user.id, filters, ("year_month", "currency"))
+    result = await session.execute(query)
+    return [
+        MonthlyTotal(month=month, currency=currency, total=total, count=count)
+        for month, currency, total, count in result.all()
+    ]
+
+
+@router.get("/summary/by-category", response_model=list[CategoryTotal])
+async def summarize_expenses_by_category(
+    filters: ExpenseFilters = Depends(expense_filters),
+    session: AsyncSession = Depends(get_db_session),
+    current_user: Principal = Depends(get_current_principal),
+) -> list[CategoryTotal]:
+    query = summary_query(current_user.id, filters, ("category_id", "currency"))
+    result = await session.execute(query)
+    return [
+        CategoryTotal(category_id=category_id, currency=currency, total=total, count=count)
+        for category_id, currency, total, count in result.all()
+    ]
 
-    total_result = await session.execute(select(func.count()).select_from(base_query.subquery()))
-    total = total_result.scalar_one()
 
-    expenses_result = await session.execute(
-        base_query.order_by(Expense.transaction_date.desc(), Expense.created_at.desc())
-        .limit(page_size)
-        .offset((page - 1) * page_size)
+@router.get("/summary/by-currency", response_model=list[CurrencyTotal])
+async def summarize_expenses_by_currency(
+    filters: ExpenseFilters = Depends(expense_filters),
+    session: AsyncSession = Depends(get_db_session),
+    current_user: Principal = Depends(get_current_principal),
+) -> list[CurrencyTotal]:
+    query = summary_query(current_user.id, filters, ("currency",))
+    result = await session.execute(query)
+    return [
+        CurrencyTotal(currency=currency, total=total, count=count)
+        for currency, total, count in result.all()
+    ]
+
+
+@router.get(
+    "",
+    response_model=PaginatedExpenses | CursorPaginatedExpenses,
+    dependencies=[Depends(_revalidate_expenses)],
+)
+async def list_expenses(  # noqa: PLR0913
+    response: Response,
+    paging: PageParams = Depends(page_params),
+    sort: ExpenseSort = Query(DEFAULT_SORT, description="Sort key; a leading - is descending."),
+    filters: ExpenseFilters = Depends(expense_filters),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_principal),
+) -> Response:
+    # Pages are encoded by app.rendering and returned as raw bytes, so the response_model above
+    # only documents them; `response` carries the ETag headers set by _revalidate_expenses.
+    base_query = filters.apply(
+        select(Expense).where(Expense.user_id == current_user.id, Expense.deleted_at.is_(None))
     )
-    expenses = expenses_result.scalars().all()
 
-    return PaginatedExpenses(
-        items=[ExpenseRead.model_validate(expense) for expense in expenses],
-        total=total,
-        page=page,
-        page_size=page_size,
+    if paging.cursor is not None:
+        body = await _list_expenses_after_cursor(
+            base_query, paging.cursor, paging.page_size, session, sort
+        )
+        return json_response(body, response.headers)
+
+    if filters.is_empty:
+        total_query = select(User.expense_count).where(User.id == current_user.id)
+    else:
+        # The per-user counter only knows the unfiltered total.
+        total_query = select(func.count()).select_from(base_query.subquery())
+    total = (await session.execute(total_query)).scalar_one()
+
+    result = await session.execute(
+        base_query.with_only_columns(*READ_COLUMNS)
+        .order_by(*keyset_order_by(EXPENSE_SORTS[sort]))
+        .limit(paging.page_size)
+        .offset((paging.page - 1) * paging.page_size)
+    )
+    body = render_page(
+        {
+            "items": expense_rows(result),
+            "total": total,
+            "page": paging.page,
+            "page_size": paging.page_size,
+        }
+    )
+    return json_response(body, response.headers)
+
+
+async def _list_expenses_after_cursor(
+    base_query: Select[tuple[Expense]],
+    cursor: str,
+    page_size: int,
+    session: AsyncSession,
+    sort: ExpenseSort = DEFAULT_SORT,
+) -> bytes:
+    keys = EXPENSE_SORTS[sort]
+    query = base_query.with_only_columns(*READ_COLUMNS)
+    if cursor:
+        try:
+            after = decode_cursor(keys, cursor, sort)
+        except InvalidCursorError as err:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            ) from err
+        query = query.where(keyset_after(keys, after))
+
+    # Fetch one extra row to learn whether another page exists without counting.
+    result = await session.execute(query.order_by(*keyset_order_by(keys)).limit(page_size + 1))
+    rows = result.all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, key.column.key) for key in keys], sort)
+
+    return render_cursor_page(
+        {"items": expense_rows(rows), "next_cursor": next_cursor, "page_size": page_size}
     )
 
 
-@router.get("/{expense_id}", response_model=ExpenseRead)
+@router.get(
+    "/{expense_id}", response_model=ExpenseRead, dependencies=[Depends(_revalidate_expenses)]
+)
 async def get_expense(
     expense_id: uuid.UUID,
-    session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_principal),
 ) -> ExpenseRead:
     expense = await _get_owned_expense(expense_id, current_user.id, session)
     return ExpenseRead.model_validate(expense)
 
 
+def _update_values(payload: ExpenseUpdate) -> dict[str, Any]:
+    return {
+        "amount": payload.amount,
+        "currency": payload.currency.upper(),
+        "description": payload.description,
+        "transaction_date": payload.transaction_date,
+        "category_id": payload.category_id,
+    }
+
+
+class _OwnedExpenseStatements:
+    """Builds the statements that lock and rewrite a user's live expenses on one dialect.
+
+    Postgres locks the rows with FOR UPDATE and reads an expense's old values in the same
+    UPDATE that writes the new ones. SQLite has no row locks and its RETURNING cannot read from
+    an UPDATE ... FROM source, so a no-op UPDATE takes the database write lock and reports the
+    current values, and the rewrite is a separate UPDATE by primary key.
+    """
+
+    def __init__(self, dialect: Dialect) -> None:
+        self.row_locks = dialect.name != "sqlite"
+
+    def lock(self, expense_ids: Sequence[uuid.UUID], user_id: uuid.UUID) -> Executable:
+        """Lock the live ones among `expense_ids`, returning their LOCKED_COLUMNS."""
+        owned = (
+            Expense.id.in_(expense_ids),
+            Expense.user_id == user_id,
+            Expense.deleted_at.is_(None),
+        )
+        if self.row_locks:
+            return select(*LOCKED_COLUMNS).where(*owned).with_for_update()
+        return (
+            update(Expense)
+            .where(*owned)
+            .values(id=Expense.id, updated_at=Expense.updated_at)
+            .returning(*LOCKED_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+
+    def update(
+        self, expense_id: uuid.UUID, user_id: uuid.UUID, values: dict[str, Any]
+    ) -> Executable:
+        """Write `values`, returning READ_COLUMNS, then PREVIOUS_COLUMNS when row locks exist.
+
+        Without row locks the expense must already be locked with `lock`, which read its
+        previous values.
+        """
+        if not self.row_locks:
+            return (
+                update(Expense)
+                .where(Expense.id == expense_id)
+                .values(values)
+                .returning(*READ_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+        # The locked subquery and the UPDATE run as one statement, so a concurrent edit cannot
+        # land between reading the old values and writing the new ones.
+        old = (
+            select(Expense.id, *PREVIOUS_COLUMNS)
+            .where(*_owned_live_expense(expense_id, user_id))
+            .with_for_update()
+            .subquery("old")
+        )
+        return (
+            update(Expense)
+            .where(Expense.id == old.c.id)
+            .values(values)
+            .returning(*READ_COLUMNS, *(old.c[column.key] for column in PREVIOUS_COLUMNS))
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def _lock_owned_expenses(
+    session: AsyncSession, expense_ids: Sequence[uuid.UUID], user_id: uuid.UUID
+) -> dict[uuid.UUID, Row[Any]]:
+    """Lock the user's live expenses among `expense_ids` and return LOCKED_COLUMNS by id."""
+    if not expense_ids:
+        return {}
+    statements = _OwnedExpenseStatements(session.get_bind().dialect)
+    result = await session.execute(statements.lock(expense_ids, user_id))
+    return {row.id: row for row in result}
+
+
+async def _update_owned_expense(
+    session: AsyncSession, expense_id: uuid.UUID, user_id: uuid.UUID, values: dict[str, Any]
+) -> tuple[ExpenseRead, RollupKey, Decimal] | None:
+    """Apply `values` to a live expense of the user.
+
+    Returns the updated expense with the rollup key and amount it had before, or None when the
+    user has no such expense.
+    """
+    statements = _OwnedExpenseStatements(session.get_bind().dialect)
+    update_statement = statements.update(expense_id, user_id, values)
+    if statements.row_locks:
+        returned = (await session.execute(update_statement)).one_or_none()
+        if returned is None:
+            return None
+        row = tuple(returned)
+    else:
+        locked = await _lock_owned_expenses(session, [expense_id], user_id)
+        if expense_id not in locked:
+            return None
+        current = (await session.execute(update_statement)).one()
+        row = (*current, *locked[expense_id][-len(PREVIOUS_COLUMNS) :])
+
+    fields = dict(zip(READ_FIELDS, row[: len(READ_COLUMNS)], strict=True))
+    expense = ExpenseRead.model_validate(fields)
+    transaction_date, category_id, currency, amount = row[len(READ_COLUMNS) :]
+    return expense, RollupKey.of(user_id, transaction_date, category_id, currency), amount
+
+
 @router.put("/{expense_id}", response_model=ExpenseRead)
 async def update_expense(
     expense_id: uuid.UUID,
     payload: ExpenseUpdate,
-    session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session),
+    categories: CategoryRegistry = Depends(get_category_registry),
+    current_user: Principal = Depends(get_current_principal),
 ) -> ExpenseRead:
-    expense = await _get_owned_expense(expense_id, current_user.id, session)
-
-    category = await session.get(Category, payload.category_id)
-    if category is None:
+    if payload.category_id not in categories:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    expense.amount = payload.amount
-    expense.currency = payload.currency.upper()
-    expense.description = payload.description
-    expense.transaction_date = payload.transaction_date
-    expense.category_id = payload.category_id
+    # A 404 below rolls the version bump back with everything else.
+    version = await _next_expenses_version(session, current_user.id)
+    updated = await _update_owned_expense(
+        session,
+        expense_id,
+        current_user.id,
+        {**_update_values(payload), "change_version": version},
+    )
+    if updated is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
 
-    session.add(expense)
+    expense, previous_key, previous_amount = updated
+    rollups = RollupDeltas()
+    rollups.remove(previous_key, previous_amount)
+    rollups.add(RollupKey.for_expense(expense), expense.amount)
+    await rollups.apply(session)
     await session.commit()
-    await session.refresh(expense)
-    return ExpenseRead.model_validate(expense)
+    return expense
 
 
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
 async def delete_expense(
     expense_id: uuid.UUID,
-    session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_write_session),
+    current_user: Principal = Depends(get_current_principal),
 ) -> Response:
-    expense = await _get_owned_expense(expense_id, current_user.id, session)
-    expense.deleted_at = datetime.now(UTC)
+    version = await _next_expenses_version(session, current_user.id, -1)
+    # The deleted_at guard lets exactly one of several concurrent deletes match the row.
+    result = await session.execute(
+        update(Expense)
+        .where(*_owned_live_expense(expense_id, current_user.id))
+        .values(deleted_at=datetime.now(UTC), change_version=version)
+        .returning(*PREVIOUS_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.one_or_none()
+    if deleted is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
 
-    session.add(expense)
+    transaction_date, category_id, currency, amount = deleted
+    rollups = RollupDeltas()
+    rollups.remove(RollupKey.of(current_user.id, transaction_date, category_id, currency), amount)
+    await rollups.apply(session)
     await session.commit()
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/batch", response_model=ExpenseBatchResult)
+async def batch_expenses(
+    payload: ExpenseBatch,
+    session: AsyncSession = Depends(get_write_session),
+    categories: CategoryRegistry = Depends(get_category_registry),
+    current_user: Principal = Depends(get_current_principal),
+) -> ExpenseBatchResult:
+    results: dict[int, BatchItemResult] = {}
+    pending: list[tuple[int, BatchUpdate | BatchDelete]] = []
+    seen: set[uuid.UUID] = set()
+    for index, operation in enumerate(payload.operations):
+        if operation.id in seen:
+            results[index] = BatchItemResult(
+                id=operation.id,
+                status=status.HTTP_400_BAD_REQUEST,
+                detail="Expense appears more than once in the batch",
+            )
+        elif isinstance(operation, BatchUpdate) and operation.category_id not in categories:
+            results[index] = BatchItemResult(
+                id=operation.id, status=status.HTTP_404_NOT_FOUND, detail="Category not found"
+            )
+        else:
+            pending.append((index, operation))
+        seen.add(operation.id)
+
+    # Before any row is locked, like every other write; if every operation then fails, the
+    # commit below only moves the version.
+    version = await _next_expenses_version(session, current_user.id) if pending else 0
+    # One ownership check for the whole batch; the rows stay locked until the commit.
+    locked = await _lock_owned_expenses(
+        session, [operation.id for _, operation in pending], current_user.id
+    )
+    updates: list[dict[str, Any]] = []
+    deleted_ids: list[uuid.UUID] = []
+    rollups = RollupDeltas()
+    for index, operation in pending:
+        row = locked.get(operation.id)
+        if row is None:
+            results[index] = BatchItemResult(
+                id=operation.id, status=status.HTTP_404_NOT_FOUND, detail="Expense not found"
+            )
+            continue
+
+        expense_id, created_at, transaction_date, category_id, currency, amount = row
+        previous_key = RollupKey.of(current_user.id, transaction_date, category_id, currency)
+        rollups.remove(previous_key, amount)
+        if isinstance(operation, BatchDelete):
+            deleted_ids.append(expense_id)
+            results[index] = BatchItemResult(id=expense_id, status=status.HTTP_204_NO_CONTENT)
+            continue
+
+        values = _update_values(operation)
+        updates.append({"id": expense_id, "change_version": version, **values})
+        expense = ExpenseRead(
+            id=expense_id, user_id=current_user.id, created_at=created_at, **values
+        )
+        rollups.add(RollupKey.for_expense(expense), expense.amount)
+        results[index] = BatchItemResult(id=expense_id, status=status.HTTP_200_OK, expense=expense)
+
+    if updates:
+        # Bulk UPDATE by primary key, sent as a single executemany.
+        await session.execute(update(Expense), updates)
+    if deleted_ids:
+        await session.execute(
+            update(Expense)
+            .where(Expense.id.in_(deleted_ids))
+            .values(deleted_at=datetime.now(UTC), change_version=version)
+            .execution_options(synchronize_session=False)
+        )
+        await _adjust_expense_count(session, current_user.id, -len(deleted_ids))
+    await rollups.apply(session)
+    await session.commit()
+
+    return ExpenseBatchResult(results=[results[index] for index in range(len(payload.operations))])
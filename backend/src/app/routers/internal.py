@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.dependencies import get_db_engine
+from app.pool import pool_status
+
+# Operational endpoints; keep /internal off the public ingress.
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False)
+
+
+@router.get("/pool")
+async def connection_pool_status(engine: AsyncEngine = Depends(get_db_engine)) -> dict[str, Any]:
+    return pool_status(engine)
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class CategoryRead(BaseModel):
+    id: int
+    name: str
+    slug: str
@@ -3,10 +3,12 @@ from __future__ import annotations
 import uuid
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, PlainSerializer
+from pydantic import BaseModel, ConfigDict, Field, PlainSerializer, field_validator
 
+CENTS = Decimal("0.01")
+BATCH_MAX_OPERATIONS = 1000
 DecimalStr = Annotated[Decimal, PlainSerializer(lambda v: format(v, "f"), return_type=str)]
 
 
@@ -17,6 +19,13 @@ class ExpenseBase(BaseModel):
     transaction_date: date
     category_id: int = Field(gt=0)
 
+    @field_validator("amount")
+    @classmethod
+    def _to_cents(cls, amount: Decimal) -> Decimal:
+        # Same scale as NUMERIC(12, 2), so responses match what the database stores without
+        # reading the row back.
+        return amount.quantize(CENTS)
+
 
 class ExpenseCreate(ExpenseBase):
     pass
@@ -39,8 +48,87 @@ class ExpenseRead(BaseModel):
     created_at: datetime
 
 
+class ExpenseChange(ExpenseRead):
+    updated_at: datetime
+    # Set on tombstones: the client should drop its copy.
+    deleted_at: datetime | None
+
+
+class ExpenseChanges(BaseModel):
+    items: list[ExpenseChange]
+    next_token: str
+    has_more: bool
+
+
 class PaginatedExpenses(BaseModel):
     items: list[ExpenseRead]
     total: int
     page: int
     page_size: int
+
+
+class CursorPaginatedExpenses(BaseModel):
+    items: list[ExpenseRead]
+    next_cursor: str | None
+    page_size: int
+
+
+class BulkImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    error_count: int
+    # Capped at BULK_MAX_REPORTED_ERRORS entries; error_count is always exact.
+    errors: list[BulkImportRowError]
+
+
+class BatchUpdate(ExpenseUpdate):
+    op: Literal["update"]
+    id: uuid.UUID
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: uuid.UUID
+
+
+BatchOperation = Annotated[BatchUpdate | BatchDelete, Field(discriminator="op")]
+
+
+class ExpenseBatch(BaseModel):
+    operations: list[BatchOperation] = Field(min_length=1, max_length=BATCH_MAX_OPERATIONS)
+
+
+class BatchItemResult(BaseModel):
+    id: uuid.UUID
+    status: int
+    expense: ExpenseRead | None = None
+    detail: str | None = None
+
+
+class ExpenseBatchResult(BaseModel):
+    # One entry per operation, in request order.
+    results: list[BatchItemResult]
+
+
+class MonthlyTotal(BaseModel):
+    month: str = Field(examples=["2024-01"])
+    currency: str
+    total: DecimalStr
+    count: int
+
+
+class CategoryTotal(BaseModel):
+    category_id: int
+    currency: str
+    total: DecimalStr
+    count: int
+
+
+class CurrencyTotal(BaseModel):
+    currency: str
+    total: DecimalStr
+    count: int
@@ -0,0 +1,102 @@
+"""Substring search over expense descriptions.
+
+Every search word must appear in the description, ignoring case. On Postgres each word is an
+`ILIKE`, served by the pg_trgm index `ix_expenses_live_description_trgm`, and the planner picks
+between that index and the keyset index. SQLite has no such planner statistics, so the search
+first asks the trigram FTS5 table `expenses_search` for up to `SQLITE_MATCH_PROBE` of the user's
+live matches: a short list drives the query by rowid, while a longer one means matches are dense
+enough to walk the keyset index with `LIKE` (which, unlike FTS5, folds case for ASCII letters
+only). The probe only counts the user's own rows, so other users' data never changes the path
+and with it the results.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Depends, HTTPException, Query, status
+from sqlalchemy import ColumnElement, Select, and_, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.filters import ExpenseFilters, expense_filters
+from app.models import Expense
+
+# Trigram indexes cannot narrow down shorter words.
+MIN_TERM_LENGTH = 3
+MAX_TERMS = 5
+SQLITE_MATCH_PROBE = 1000
+
+_LIKE_ESCAPE = "\\"
+_expenses_search = table("expenses_search")
+_rowid: ColumnElement[int] = literal_column("expenses.rowid")
+_search_rowid: ColumnElement[int] = literal_column("expenses_search.rowid")
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace(_LIKE_ESCAPE, _LIKE_ESCAPE * 2).replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _fts_query(terms: Sequence[str]) -> str:
+    # Quoted FTS5 strings are matched literally; adjacent strings are ANDed.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _contains_all(terms: Sequence[str]) -> ColumnElement[bool]:
+    return and_(
+        *(Expense.description.ilike(_like_pattern(term), escape=_LIKE_ESCAPE) for term in terms)
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ExpenseSearch:
+    terms: tuple[str, ...]
+    filters: ExpenseFilters
+
+    async def query(self, user_id: uuid.UUID, session: AsyncSession) -> Select[tuple[Expense]]:
+        """The user's live expenses matching the search, without ordering or limit."""
+        owner: ColumnElement[bool] = Expense.user_id == user_id
+        condition = _contains_all(self.terms)
+        if session.get_bind().dialect.name == "sqlite":
+            probe: Select[Any] = (
+                select(_search_rowid)
+                .select_from(_expenses_search.join(Expense.__table__, _rowid == _search_rowid))
+                .where(
+                    literal_column("expenses_search").op("MATCH")(_fts_query(self.terms)),
+                    Expense.user_id == user_id,
+                    Expense.deleted_at.is_(None),
+                )
+                .limit(SQLITE_MATCH_PROBE + 1)
+            )
+            rowids = (await session.execute(probe)).scalars().all()
+            if len(rowids) <= SQLITE_MATCH_PROBE:
+                condition = _rowid.in_(rowids)
+                # Without statistics SQLite would rather walk the user's keyset index and test
+                # every row against the list; the unary plus keeps it on rowid lookups.
+                owner = literal_column("+expenses.user_id", Expense.user_id.type) == user_id
+
+        query = select(Expense).where(owner, Expense.deleted_at.is_(None), condition)
+        return self.filters.apply(query)
+
+
+def expense_search(
+    q: str = Query(
+        ..., max_length=200, description="Words that must all appear in the description."
+    ),
+    filters: ExpenseFilters = Depends(expense_filters),
+) -> ExpenseSearch:
+    terms = tuple(q.split())
+    if not terms or len(terms) > MAX_TERMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Search needs between 1 and {MAX_TERMS} words",
+        )
+    if any(len(term) < MIN_TERM_LENGTH for term in terms):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Search words need at least {MIN_TERM_LENGTH} characters",
+        )
+    return ExpenseSearch(terms=terms, filters=filters)
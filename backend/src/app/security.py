@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from typing import Any, cast
 
@@ -9,6 +12,7 @@ from jose import jwt
 from passlib.context import CryptContext
 
 from app.config import settings
+from app.metrics import password_hash_duration
 
 MAX_PASSWORD_BYTES = 72
 pwd_context = CryptContext(
@@ -38,16 +42,53 @@ def _truncate_password(password: str) -> str:
 
 def hash_password(password: str) -> str:
     normalized = _truncate_password(password)
+    started = time.perf_counter()
     hashed: str = pwd_context.hash(normalized)
+    password_hash_duration.observe(time.perf_counter() - started, ("hash",))
     return hashed
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     normalized = _truncate_password(plain_password)
+    started = time.perf_counter()
     verified: bool = pwd_context.verify(normalized, hashed_password)
+    password_hash_duration.observe(time.perf_counter() - started, ("verify",))
     return verified
 
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop while
+# bounding how many CPU-heavy hashes run at once.
+_password_executor: ThreadPoolExecutor | None = None
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor  # noqa: PLW0603
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+        )
+    return _password_executor
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor  # noqa: PLW0603
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True)
+        _password_executor = None
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_executor(), hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_executor(), verify_password, plain_password, hashed_password
+    )
+
+
 def create_access_token(subject: uuid.UUID, expires_minutes: int | None = None) -> str:
     expire = datetime.now(UTC) + timedelta(
         minutes=expires_minutes or settings.access_token_expires_minutes
@@ -0,0 +1,227 @@
+"""Production entry point: `python -m app.serve`.
+
+A small pre-fork supervisor around uvicorn. The parent binds the listening socket and keeps
+WEB_CONCURRENCY worker processes serving it (one per available CPU by default); each worker runs
+the app with uvloop and httptools when they are installed, asyncio and h11 otherwise.
+
+- A worker exits after SERVER_MAX_REQUESTS requests, plus a random share of
+  SERVER_MAX_REQUESTS_JITTER so workers do not all recycle at once, and is replaced.
+- SIGHUP replaces the workers one at a time, each after its replacement has been started; the
+  old worker stops accepting and gets SERVER_GRACEFUL_TIMEOUT_SECONDS to finish its requests.
+- SIGTERM and SIGINT stop every worker the same way, then the supervisor exits.
+- A worker that exits with an error before every initial worker has come up (the app fails to
+  import, its settings are invalid, its lifespan startup fails) stops the whole server with a
+  non-zero status rather than restarting in a loop; once the server has served, a worker that
+  fails its startup (e.g. the database is briefly unreachable) is restarted with a capped
+  exponential backoff.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.context import SpawnProcess
+from multiprocessing.sharedctypes import Synchronized
+from types import FrameType
+from typing import cast
+
+import uvicorn
+
+from app.config import settings
+
+APP = "app.main:app"
+STARTUP_FAILURE = 3
+WORKER_CHECK_INTERVAL_SECONDS = 0.5
+RESTART_BACKOFF_SECONDS = 1.0
+MAX_RESTART_BACKOFF_SECONDS = 60.0
+
+_spawn = multiprocessing.get_context("spawn")
+
+
+@dataclass(frozen=True, slots=True)
+class ServeOptions:
+    host: str
+    port: int
+    workers: int
+    max_requests: int
+    max_requests_jitter: int
+    graceful_timeout_seconds: int
+
+    def worker_config(self, rng: random.Random) -> uvicorn.Config:
+        limit_max_requests = None
+        if self.max_requests > 0:
+            limit_max_requests = self.max_requests + rng.randint(0, self.max_requests_jitter)
+        return uvicorn.Config(
+            APP,
+            host=self.host,
+            port=self.port,
+            # uvloop / httptools from uvicorn's "standard" extra when importable.
+            loop="auto",
+            http="auto",
+            lifespan="on",
+            limit_max_requests=limit_max_requests,
+            timeout_graceful_shutdown=self.graceful_timeout_seconds,
+        )
+
+
+class _WorkerServer(uvicorn.Server):
+    """Counts successful startups in `started_count`, shared with the supervisor."""
+
+    def __init__(self, config: uvicorn.Config, started_count: Synchronized[int]) -> None:
+        super().__init__(config)
+        self.started_count = started_count
+
+    async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        await super().startup(sockets)
+        if self.started:
+            with self.started_count.get_lock():
+                self.started_count.value += 1
+
+
+def _run_worker(
+    config: uvicorn.Config, sock: socket.socket, started_count: Synchronized[int]
+) -> None:
+    # A spawned process starts without the parent's logging setup.
+    config.configure_logging()
+    server = _WorkerServer(config, started_count)
+    try:
+        server.run(sockets=[sock])
+    except BaseException as err:
+        if server.started:
+            raise
+        if not isinstance(err, SystemExit):
+            # uvicorn logs why it cannot load the app before its sys.exit(1); nothing else would.
+            traceback.print_exc()
+        sys.exit(STARTUP_FAILURE)
+    if not server.started:
+        sys.exit(STARTUP_FAILURE)
+
+
+class Supervisor:
+    def __init__(self, options: ServeOptions, rng: random.Random | None = None) -> None:
+        self.options = options
+        self._rng = rng or random.Random()
+        self._workers: list[SpawnProcess] = []
+        self._socket: socket.socket | None = None
+        self._started_count: Synchronized[int] = cast("Synchronized[int]", _spawn.Value("i", 0))
+        self._started_seen = 0
+        self._startup_failures = 0
+        self._restart_at: dict[int, float] = {}
+        self._wake = threading.Event()
+        self._stopping = False
+        self._reloading = False
+        self.exit_code = 0
+
+    def run(self) -> int:
+        self._socket = self.options.worker_config(self._rng).bind_socket()
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        try:
+            self._workers = [self._start_worker() for _ in range(self.options.workers)]
+            while not self._stopping:
+                self._wake.wait(WORKER_CHECK_INTERVAL_SECONDS)
+                self._wake.clear()
+                if self._reloading:
+                    self._reloading = False
+                    self._restart_workers()
+                self._replace_exited_workers()
+        finally:
+            self._stop_workers(self._workers)
+            self._socket.close()
+        return self.exit_code
+
+    def _start_worker(self) -> SpawnProcess:
+        assert self._socket is not None
+        config = self.options.worker_config(self._rng)
+        worker = _spawn.Process(
+            target=_run_worker, args=(config, self._socket, self._started_count), daemon=True
+        )
+        worker.start()
+        return worker
+
+    def _stop_workers(self, workers: list[SpawnProcess]) -> None:
+        # Signal every worker before waiting on any, so they drain in parallel and shutdown
+        # takes one graceful timeout rather than one per worker.
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        deadline = time.monotonic() + self.options.graceful_timeout_seconds + 5
+        for worker in workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        for worker in workers:
+            if worker.is_alive():
+                worker.kill()
+                worker.join()
+
+    def _restart_workers(self) -> None:
+        for index, worker in enumerate(self._workers):
+            if self._stopping:
+                return
+            self._restart_at.pop(index, None)
+            self._workers[index] = self._start_worker()
+            self._stop_workers([worker])
+
+    def _replace_exited_workers(self) -> None:
+        started = self._started_count.value
+        if started > self._started_seen:
+            self._started_seen = started
+            self._startup_failures = 0
+        for index, worker in enumerate(self._workers):
+            if self._stopping or worker.is_alive():
+                continue
+            worker.join()
+            if worker.exitcode != 0 and started < self.options.workers:
+                # Failed before the server ever came up: bad code or configuration, which a
+                # restart won't fix.
+                self.exit_code = STARTUP_FAILURE
+                self._stopping = True
+                return
+            if worker.exitcode == STARTUP_FAILURE and index not in self._restart_at:
+                self._startup_failures += 1
+                backoff = RESTART_BACKOFF_SECONDS * 2 ** (self._startup_failures - 1)
+                self._restart_at[index] = time.monotonic() + min(
+                    backoff, MAX_RESTART_BACKOFF_SECONDS
+                )
+            if time.monotonic() < self._restart_at.get(index, 0.0):
+                continue
+            # Recycled after max-requests, crashed, or its startup backoff has elapsed.
+            self._restart_at.pop(index, None)
+            self._workers[index] = self._start_worker()
+
+    def _on_stop(self, _signum: int, _frame: FrameType | None) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    def _on_reload(self, _signum: int, _frame: FrameType | None) -> None:
+        self._reloading = True
+        self._wake.set()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API from a pool of uvicorn workers.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.web_concurrency)
+    args = parser.parse_args(argv)
+    options = ServeOptions(
+        host=args.host,
+        port=args.port,
+        workers=max(1, args.workers),
+        max_requests=settings.server_max_requests,
+        max_requests_jitter=settings.server_max_requests_jitter,
+        graceful_timeout_seconds=settings.server_graceful_timeout_seconds,
+    )
+    return Supervisor(options).run()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
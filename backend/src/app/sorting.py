@@ -0,0 +1,47 @@
+"""Sort orders accepted by `GET /expenses`.
+
+Each order is a keyset over live expenses, served by a partial index that starts with
+`user_id`. The ascending variants scan the same index backwards.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+
+from app.models import Expense
+from app.pagination import KeysetColumn, reverse_keyset
+
+ExpenseSort = Literal[
+    "-transaction_date", "transaction_date", "-amount", "amount", "-created_at", "created_at"
+]
+DEFAULT_SORT: ExpenseSort = "-transaction_date"
+
+# ix_expenses_live_user_id_transaction_date_created_at_id
+BY_TRANSACTION_DATE = (
+    KeysetColumn(Expense.transaction_date, descending=True, parse=date.fromisoformat),
+    KeysetColumn(Expense.created_at, descending=True, parse=datetime.fromisoformat),
+    KeysetColumn(Expense.id, descending=False, parse=uuid.UUID),
+)
+# ix_expenses_live_user_id_amount_created_at_id
+BY_AMOUNT = (
+    KeysetColumn(Expense.amount, descending=True, parse=Decimal),
+    KeysetColumn(Expense.created_at, descending=True, parse=datetime.fromisoformat),
+    KeysetColumn(Expense.id, descending=False, parse=uuid.UUID),
+)
+# ix_expenses_live_user_id_created_at_id
+BY_CREATED_AT = (
+    KeysetColumn(Expense.created_at, descending=True, parse=datetime.fromisoformat),
+    KeysetColumn(Expense.id, descending=False, parse=uuid.UUID),
+)
+
+EXPENSE_SORTS: dict[ExpenseSort, tuple[KeysetColumn, ...]] = {
+    "-transaction_date": BY_TRANSACTION_DATE,
+    "transaction_date": reverse_keyset(BY_TRANSACTION_DATE),
+    "-amount": BY_AMOUNT,
+    "amount": reverse_keyset(BY_AMOUNT),
+    "-created_at": BY_CREATED_AT,
+    "created_at": reverse_keyset(BY_CREATED_AT),
+}
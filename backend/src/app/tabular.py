@@ -0,0 +1,196 @@
+"""Incremental CSV / NDJSON readers and writers used by the bulk expense endpoints.
+
+Readers consume an async stream of byte chunks (e.g. `Request.stream()`) and yield one record at
+a time, so uploads are never held in memory as a whole. Writers encode one batch of rows at a
+time for streaming responses.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+from collections import deque
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
+from dataclasses import dataclass
+from typing import Any
+
+CSV_MEDIA_TYPES = frozenset({"text/csv", "application/csv"})
+NDJSON_MEDIA_TYPES = frozenset({"application/x-ndjson", "application/ndjson", "application/jsonl"})
+# Longest a quoted CSV field may run across lines; a description (255 characters) rarely has
+# more than a handful of line breaks.
+MAX_QUOTED_FIELD_LINES = 32
+
+
+class MalformedStreamError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Record:
+    row: int
+    data: dict[str, Any] | None
+    error: str | None = None
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.removesuffix("\r")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as err:
+        raise MalformedStreamError("Body is not valid UTF-8") from err
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def iter_ndjson_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[Record]:
+    row = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as err:
+            yield Record(row=row, data=None, error=f"Invalid JSON: {err.msg}")
+            continue
+        if not isinstance(data, dict):
+            yield Record(row=row, data=None, error="Expected a JSON object")
+            continue
+        yield Record(row=row, data=data)
+
+
+async def iter_csv_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[Record]:
+    """Yield CSV data rows keyed by the header row; rows are numbered from 1 after the header."""
+    header: list[str] | None = None
+    row = 0
+    async for text in _iter_csv_record_texts(iter_lines(chunks)):
+        if text is not None and not text.strip():
+            continue
+        if header is None:
+            try:
+                header = [name.strip() for name in _parse_csv_record(text)]
+            except csv.Error as err:
+                raise MalformedStreamError("Invalid CSV header") from err
+            continue
+
+        row += 1
+        try:
+            values = _parse_csv_record(text)
+        except csv.Error as err:
+            yield Record(row=row, data=None, error=f"Invalid CSV: {err}")
+            continue
+        if len(values) != len(header):
+            yield Record(
+                row=row, data=None, error=f"Expected {len(header)} columns, got {len(values)}"
+            )
+            continue
+        yield Record(row=row, data=dict(zip(header, values, strict=True)))
+
+
+def _parse_csv_record(text: str | None) -> list[str]:
+    if text is None:
+        raise csv.Error("Unterminated quoted field")
+    return next(csv.reader([text]))
+
+
+async def _iter_csv_record_texts(lines: AsyncIterable[str]) -> AsyncIterator[str | None]:
+    splitter = _CsvRecordSplitter()
+    async for line in lines:
+        for text in splitter.feed(line):
+            yield text
+    for text in splitter.finish():
+        yield text
+
+
+class _CsvRecordSplitter:
+    """Groups physical lines into CSV records, reading each character once.
+
+    Yields each record's text, or None for a record whose quoted field is still open after
+    MAX_QUOTED_FIELD_LINES lines (or at the end of the body). Such a record is reported as one bad
+    row and the lines after its first are read again as records of their own, so a stray quote
+    costs one row instead of swallowing the rest of the upload.
+    """
+
+    def __init__(self) -> None:
+        self._pending: list[str] = []
+        self._quoted = False
+
+    def feed(self, line: str) -> Iterator[str | None]:
+        backlog = deque([line])
+        while backlog:
+            line = backlog.popleft()
+            self._pending.append(line)
+            self._quoted = _quoted_after(line, self._quoted)
+            if not self._quoted:
+                yield "\n".join(self._pending)
+                self._pending.clear()
+            elif len(self._pending) > MAX_QUOTED_FIELD_LINES:
+                yield None
+                backlog.extendleft(reversed(self._restart()))
+
+    def finish(self) -> Iterator[str | None]:
+        while self._pending:
+            yield None
+            for line in self._restart():
+                yield from self.feed(line)
+
+    def _restart(self) -> list[str]:
+        rest = self._pending[1:]
+        self._pending = []
+        self._quoted = False
+        return rest
+
+
+def _quoted_after(line: str, quoted: bool) -> bool:
+    """Whether a quoted field is open at the end of `line`, following the csv module's rules.
+
+    A quote opens a field only as its first character; inside one, a doubled quote is literal and
+    a single one closes it. Elsewhere quotes are plain characters, e.g. `TV 32"`.
+    """
+    if not quoted and '"' not in line:
+        return False
+    field_start = not quoted
+    index = 0
+    while index < len(line):
+        char = line[index]
+        if quoted:
+            if char == '"':
+                if line.startswith('"', index + 1):
+                    index += 1
+                else:
+                    quoted = False
+        elif char == '"' and field_start:
+            quoted = True
+        field_start = not quoted and char == ","
+        index += 1
+    return quoted
+
+
+def encode_csv_rows(rows: Iterable[Sequence[Any]], header: Sequence[str] | None = None) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson_rows(rows: Iterable[Mapping[str, Any]]) -> bytes:
+    return "".join(
+        json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in rows
+    ).encode("utf-8")
@@ -6,11 +6,19 @@ import passlib.handlers.bcrypt as bcrypt_module
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-
-from app.dependencies import get_db_session
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
+
+from app.admission import AdmissionControl, admission_control
+from app.categories import category_registry
+from app.config import settings
+from app.database import create_engine
+from app.dependencies import get_db_engine, get_db_session, get_db_sessionmaker
 from app.main import app
 from app.models import Base
+from app.principals import principal_cache
+from app.ratelimit import InMemoryTokenBucketBackend, login_throttle
 
 BCRYPT_MAX_BYTES = 72
 original_calc_checksum = bcrypt_module._BcryptBackend._calc_checksum
@@ -26,6 +34,13 @@ def patched_calc_checksum(self, secret):
 bcrypt_module._BcryptBackend._calc_checksum = patched_calc_checksum
 
 
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    # A column declared as "UUID" gets NUMERIC affinity in SQLite, which stores hex ids such as
+    # "123e4567..." as floats; CHAR keeps them as text, like Postgres' native uuid type.
+    return "CHAR(32)"
+
+
 async def _heartbeat(period: float = 0.05) -> None:
     while True:
         await asyncio.sleep(period)
@@ -54,7 +69,7 @@ def event_loop():
 
 @pytest_asyncio.fixture
 async def session_factory() -> AsyncIterator[async_sessionmaker[AsyncSession]]:
-    test_engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    test_engine = create_engine("sqlite+aiosqlite:///:memory:")
     async_session = async_sessionmaker(test_engine, expire_on_commit=False, class_=AsyncSession)
 
     heartbeat = asyncio.create_task(_heartbeat())
@@ -82,6 +97,13 @@ async def client(session_factory: async_sessionmaker[AsyncSession]) -> AsyncIter
             yield session
 
     app.dependency_overrides[get_db_session] = override_get_session
+    app.dependency_overrides[get_db_sessionmaker] = lambda: session_factory
+    app.dependency_overrides[get_db_engine] = lambda: session_factory.kw["bind"]
+    principal_cache.clear()
+    category_registry.invalidate()
+    # Fresh gates: their semaphores belong to the event loop that first waits on them.
+    admission_control.gates = AdmissionControl.from_settings().gates
+    login_throttle.backend = InMemoryTokenBucketBackend(settings.auth_rate_limit_max_keys)
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as async_client:
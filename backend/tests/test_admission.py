@@ -0,0 +1,105 @@
+"""Admission control under a slow database: excess requests are shed, /health keeps answering."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.admission import AdmissionGate, admission_control
+from app.database import create_engine
+from app.models import Base
+
+DB_LATENCY_SECONDS = 0.3
+
+
+class SlowSession(AsyncSession):
+    """Adds `latency` seconds to every statement, as an overloaded database would."""
+
+    latency = 0.0
+
+    async def execute(self, *args: Any, **kwargs: Any) -> Any:
+        await asyncio.sleep(self.latency)
+        return await super().execute(*args, **kwargs)
+
+
+@pytest_asyncio.fixture
+async def session_factory() -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    engine = create_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield async_sessionmaker(engine, expire_on_commit=False, class_=SlowSession)
+    finally:
+        SlowSession.latency = 0.0
+        await engine.dispose()
+
+
+async def auth_headers(client: AsyncClient) -> dict[str, str]:
+    response = await client.post(
+        "/auth/register", json={"email": "busy@example.com", "password": "password123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def limit_reads(limit: int, max_waiting: int, timeout: float) -> None:
+    admission_control.gates["reads"] = AdmissionGate("reads", limit, max_waiting, timeout)
+
+
+@pytest.mark.asyncio
+async def test_overload_is_shed_with_503_and_health_still_answers(client: AsyncClient) -> None:
+    headers = await auth_headers(client)
+    limit_reads(limit=2, max_waiting=2, timeout=0.1)
+    SlowSession.latency = DB_LATENCY_SECONDS
+
+    reads = [asyncio.create_task(client.get("/expenses", headers=headers)) for _ in range(8)]
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    health = await client.get("/health")
+    health_seconds = time.perf_counter() - started
+    responses = await asyncio.gather(*reads)
+
+    assert health.status_code == HTTPStatus.OK
+    assert health_seconds < DB_LATENCY_SECONDS
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [HTTPStatus.OK] * 2 + [HTTPStatus.SERVICE_UNAVAILABLE] * 6
+    shed = next(r for r in responses if r.status_code == HTTPStatus.SERVICE_UNAVAILABLE)
+    assert shed.headers["retry-after"] == "1"
+    assert shed.json()["detail"] == "Server is busy, retry shortly"
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_run_when_a_slot_frees_before_the_deadline(
+    client: AsyncClient,
+) -> None:
+    headers = await auth_headers(client)
+    limit_reads(limit=1, max_waiting=5, timeout=10)
+    SlowSession.latency = 0.05
+
+    responses = await asyncio.gather(*(client.get("/expenses", headers=headers) for _ in range(4)))
+
+    assert [response.status_code for response in responses] == [HTTPStatus.OK] * 4
+
+
+@pytest.mark.asyncio
+async def test_route_classes_have_separate_limits(client: AsyncClient) -> None:
+    headers = await auth_headers(client)
+    limit_reads(limit=1, max_waiting=0, timeout=0)
+    SlowSession.latency = DB_LATENCY_SECONDS
+
+    read = asyncio.create_task(client.get("/expenses", headers=headers))
+    await asyncio.sleep(0.05)
+    shed = await client.get("/expenses", headers=headers)
+    write = await client.post("/expenses/batch", json={"operations": []}, headers=headers)
+
+    assert shed.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    # Validation fails, but the write went through its own, idle gate.
+    assert write.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert (await read).status_code == HTTPStatus.OK
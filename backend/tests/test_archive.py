@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.archive import archive_deleted_expenses
+from app.models import Category, Expense, ExpenseArchive, User
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_only_long_deleted_expenses_in_batches(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    now = datetime.now(UTC)
+    async with session_factory() as session:
+        user = User(email="archive@example.com", hashed_password="x")
+        category = Category(name="Lazer", slug="lazer")
+        session.add_all([user, category])
+        await session.flush()
+
+        def make_expense(deleted_at: datetime | None) -> Expense:
+            return Expense(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                category_id=category.id,
+                amount=Decimal("10.00"),
+                currency="BRL",
+                description="Cinema",
+                transaction_date=date(2024, 1, 1),
+                deleted_at=deleted_at,
+            )
+
+        old = [make_expense(now - timedelta(days=90)) for _ in range(5)]
+        recent = make_expense(now - timedelta(days=1))
+        live = make_expense(None)
+        session.add_all([*old, recent, live])
+        await session.commit()
+
+    moved = await archive_deleted_expenses(
+        session_factory, retention=timedelta(days=30), batch_size=2
+    )
+
+    assert moved == len(old)
+    async with session_factory() as session:
+        hot_ids = set((await session.execute(select(Expense.id))).scalars())
+        archived = (await session.execute(select(ExpenseArchive))).scalars().all()
+
+    assert hot_ids == {recent.id, live.id}
+    assert {row.id for row in archived} == {expense.id for expense in old}
+    assert all(row.description == "Cinema" and row.deleted_at is not None for row in archived)
+
+    assert await archive_deleted_expenses(session_factory, retention=timedelta(days=30)) == 0
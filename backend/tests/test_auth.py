@@ -1,7 +1,17 @@
+import uuid
+from datetime import UTC, datetime
 from http import HTTPStatus
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+from app.principals import AuthenticatedUser, PrincipalCache, principal_cache
+from app.routers import auth
+from app.security import create_access_token
 
 
 @pytest.mark.asyncio
@@ -27,6 +37,22 @@ async def test_register_with_duplicate_email_returns_400(client: AsyncClient) ->
     assert second.status_code == HTTPStatus.BAD_REQUEST
 
 
+@pytest.mark.asyncio
+async def test_register_does_not_report_other_integrity_errors_as_duplicates(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def no_hash(_: str) -> None:
+        return None
+
+    # users.hashed_password is NOT NULL: a violated constraint other than the email's.
+    monkeypatch.setattr(auth, "hash_password_async", no_hash)
+
+    with pytest.raises(IntegrityError):
+        await client.post(
+            "/auth/register", json={"email": "unhashed@example.com", "password": "password123"}
+        )
+
+
 @pytest.mark.asyncio
 async def test_login_returns_token(client: AsyncClient) -> None:
     await client.post("/auth/register", json={"email": "login@example.com", "password": "password123"})
@@ -63,3 +89,60 @@ async def test_me_returns_current_user(client: AsyncClient) -> None:
 async def test_me_requires_authentication(client: AsyncClient) -> None:
     response = await client.get("/auth/me")
     assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_me_is_served_from_principal_cache_until_invalidated(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    register = await client.post(
+        "/auth/register",
+        json={"email": "cached@example.com", "password": "password123", "full_name": "Before"},
+    )
+    headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+    user_id = uuid.UUID(register.json()["user"]["id"])
+
+    await db_session.execute(update(User).where(User.id == user_id).values(full_name="After"))
+    await db_session.commit()
+
+    cached = await client.get("/auth/me", headers=headers)
+    assert cached.json()["full_name"] == "Before"
+
+    principal_cache.invalidate(user_id)
+    fresh = await client.get("/auth/me", headers=headers)
+    assert fresh.json()["full_name"] == "After"
+
+
+@pytest.mark.asyncio
+async def test_expense_routes_authenticate_from_token_claims_alone(client: AsyncClient) -> None:
+    # No users row exists for this id: the principal fast path must not look it up.
+    token = create_access_token(uuid.uuid4())
+
+    response = await client.get(
+        f"/expenses/{uuid.uuid4()}", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()["detail"] == "Expense not found"
+
+
+def test_principal_cache_expires_and_evicts_least_recently_used() -> None:
+    now = 0.0
+    cache = PrincipalCache(max_entries=2, ttl_seconds=10, clock=lambda: now)
+    users = [
+        AuthenticatedUser(
+            id=uuid.uuid4(), email=f"u{i}@example.com", full_name=None, created_at=datetime.now(UTC)
+        )
+        for i in range(3)
+    ]
+
+    cache.put(users[0])
+    cache.put(users[1])
+    assert cache.get(users[0].id) == users[0]
+    cache.put(users[2])
+    assert cache.get(users[1].id) is None
+    assert cache.get(users[0].id) == users[0]
+
+    now = 11.0
+    assert cache.get(users[0].id) is None
+    assert len(cache) == 1
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from http import HTTPStatus
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.categories import CategoryRegistry
+from app.models import Category
+
+
+async def add_category(session: AsyncSession, name: str) -> Category:
+    category = Category(name=name, slug=name.lower())
+    session.add(category)
+    await session.commit()
+    return category
+
+
+@pytest.mark.asyncio
+async def test_list_categories_supports_etag_revalidation(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    mercado = await add_category(db_session, "Mercado")
+
+    response = await client.get("/categories")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == [{"id": mercado.id, "name": "Mercado", "slug": "mercado"}]
+    etag = response.headers["etag"]
+
+    cached = await client.get("/categories", headers={"If-None-Match": etag})
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert cached.headers["etag"] == etag
+
+    await add_category(db_session, "Viagem")
+    changed = await client.get("/categories", headers={"If-None-Match": etag})
+    assert changed.status_code == HTTPStatus.OK
+    assert changed.headers["etag"] != etag
+    assert [category["slug"] for category in changed.json()] == ["mercado", "viagem"]
+
+
+@pytest.mark.asyncio
+async def test_expense_writes_validate_categories_without_querying_them(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    category = await add_category(db_session, "Saúde")
+    register = await client.post(
+        "/auth/register", json={"email": "registry@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+    assert (await client.get("/categories")).status_code == HTTPStatus.OK
+
+    statements: list[str] = []
+    sync_engine = session_factory.kw["bind"].sync_engine
+
+    def record(*args: object) -> None:
+        statements.append(str(args[2]))
+
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        payload = {
+            "amount": "12.00",
+            "currency": "BRL",
+            "description": "Consulta",
+            "transaction_date": "2024-01-01",
+            "category_id": category.id,
+        }
+        created = await client.post("/expenses", json=payload, headers=headers)
+        assert created.status_code == HTTPStatus.CREATED
+        missing = await client.post(
+            "/expenses", json={**payload, "category_id": category.id + 100}, headers=headers
+        )
+        assert missing.status_code == HTTPStatus.NOT_FOUND
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+    assert statements
+    assert not [statement for statement in statements if "FROM categories" in statement]
+
+
+@pytest.mark.asyncio
+async def test_registry_reloads_after_ttl(db_session: AsyncSession) -> None:
+    now = 0.0
+    registry = CategoryRegistry(ttl_seconds=10, clock=lambda: now)
+    first = await add_category(db_session, "Casa")
+
+    await registry.ensure_fresh(db_session)
+    assert first.id in registry
+
+    second = await add_category(db_session, "Carro")
+    await registry.ensure_fresh(db_session)
+    assert second.id not in registry
+
+    now = 10.0
+    await registry.ensure_fresh(db_session)
+    assert second.id in registry
+    assert registry.get(second.id) is not None
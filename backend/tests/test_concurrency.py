@@ -0,0 +1,139 @@
+"""Concurrent writes against a file database, where each request gets its own connection."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import create_engine
+from app.models import Base, Category, Expense, User
+from app.rollups import verify_rollups
+
+PARALLEL_UPDATES = 12
+PARALLEL_DELETES = 4
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path: Path) -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'concurrency.db'}", pool_size=8)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_parallel_updates_and_deletes_of_one_expense(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    categories = [Category(name=f"Paralela {n}", slug=f"paralela-{n}") for n in range(3)]
+    db_session.add_all(categories)
+    await db_session.commit()
+    registered = await client.post(
+        "/auth/register", json={"email": "parallel@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+    created = await client.post(
+        "/expenses",
+        json={
+            "amount": "10.00",
+            "currency": "BRL",
+            "description": "Disputada",
+            "transaction_date": "2024-01-15",
+            "category_id": categories[0].id,
+        },
+        headers=headers,
+    )
+    expense_id = created.json()["id"]
+
+    updates = [
+        client.put(
+            f"/expenses/{expense_id}",
+            json={
+                "amount": f"{n + 1}.25",
+                "currency": "USD" if n % 2 else "BRL",
+                "description": f"Edição {n}",
+                "transaction_date": f"2024-0{n % 3 + 1}-10",
+                "category_id": categories[n % 3].id,
+            },
+            headers=headers,
+        )
+        for n in range(PARALLEL_UPDATES)
+    ]
+    deletes = [
+        client.delete(f"/expenses/{expense_id}", headers=headers) for _ in range(PARALLEL_DELETES)
+    ]
+    responses = await asyncio.gather(*updates, *deletes)
+
+    update_statuses = Counter(response.status_code for response in responses[:PARALLEL_UPDATES])
+    delete_statuses = Counter(response.status_code for response in responses[PARALLEL_UPDATES:])
+    assert set(update_statuses) <= {HTTPStatus.OK, HTTPStatus.NOT_FOUND}
+    assert delete_statuses == {
+        HTTPStatus.NO_CONTENT: 1,
+        HTTPStatus.NOT_FOUND: PARALLEL_DELETES - 1,
+    }
+
+    live = await db_session.scalar(
+        select(func.count()).select_from(Expense).where(Expense.deleted_at.is_(None))
+    )
+    assert live == 0
+    assert await db_session.scalar(select(User.expense_count)) == 0
+    assert await verify_rollups(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_an_open_bulk_upload_does_not_block_the_users_other_writes(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = Category(name="Streaming", slug="streaming")
+    db_session.add(category)
+    await db_session.commit()
+    registered = await client.post(
+        "/auth/register", json={"email": "uploader@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+    expense = {
+        "amount": "3.00",
+        "currency": "BRL",
+        "description": "Meanwhile",
+        "transaction_date": "2024-01-02",
+        "category_id": category.id,
+    }
+    stalled = asyncio.Event()
+    resume = asyncio.Event()
+
+    async def slow_upload() -> AsyncIterator[bytes]:
+        yield b"amount,currency,description,transaction_date,category_id\n"
+        yield f"1.00,BRL,Uploaded,2024-01-01,{category.id}\n".encode()
+        stalled.set()
+        await resume.wait()
+        yield f"2.00,BRL,Uploaded,2024-01-01,{category.id}\n".encode()
+
+    upload = asyncio.create_task(
+        client.post(
+            "/expenses/bulk",
+            content=slow_upload(),
+            headers={**headers, "Content-Type": "text/csv"},
+        )
+    )
+    await stalled.wait()
+    created = await asyncio.wait_for(client.post("/expenses", json=expense, headers=headers), 2)
+    assert created.status_code == HTTPStatus.CREATED
+    resume.set()
+    assert (await upload).json()["inserted"] == 2  # noqa: PLR2004
+
+    changes = (await client.get("/expenses/changes", headers=headers)).json()["items"]
+    assert [item["description"] for item in changes] == ["Meanwhile", "Uploaded", "Uploaded"]
+    assert await db_session.scalar(select(User.expense_count)) == 3  # noqa: PLR2004
+    assert await verify_rollups(db_session) == []
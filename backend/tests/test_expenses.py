@@ -1,13 +1,39 @@
 from __future__ import annotations
 
-from datetime import date
+import asyncio
+import json
+import math
+import random
+import tracemalloc
+import uuid
+from collections.abc import AsyncIterator
+from datetime import date, timedelta
+from decimal import Decimal
 from http import HTTPStatus
+from typing import Any
 
 import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, select, update as update_statement
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.models import Category
+from app import rollups
+from app.archive import archive_deleted_expenses
+from app.main import app
+from app.models import Category, Expense, ExpenseMonthlyRollup, User
+from app.pagination import encode_cursor, keyset_order_by
+from app.rollups import rebuild_rollups, verify_rollups
+from app.routers.expenses import _OwnedExpenseStatements
+from app.schemas.expense import (
+    CursorPaginatedExpenses,
+    ExpenseCreate,
+    ExpenseRead,
+    PaginatedExpenses,
+)
+from app.sorting import DEFAULT_SORT, EXPENSE_SORTS
 
 
 async def create_category(session: AsyncSession, name: str = "Alimentação") -> Category:
@@ -29,6 +55,23 @@ async def auth_headers(client: AsyncClient, email: str = "user@example.com") ->
     return {"Authorization": f"Bearer {token}"}
 
 
+async def post_expense(
+    client: AsyncClient, headers: dict[str, str], category_id: int, **overrides: str
+) -> dict[str, Any]:
+    payload = {
+        "amount": "10.00",
+        "currency": "BRL",
+        "description": "Despesa",
+        "transaction_date": "2024-01-01",
+        "category_id": category_id,
+        **overrides,
+    }
+    response = await client.post("/expenses", json=payload, headers=headers)
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    data: dict[str, Any] = response.json()
+    return data
+
+
 @pytest.mark.asyncio
 async def test_create_expense(client: AsyncClient, db_session: AsyncSession) -> None:
     category = await create_category(db_session, "Supermercado")
@@ -110,6 +153,227 @@ async def test_list_expenses_returns_only_current_user_items(
     assert data["items"][1]["description"] == "Uber"
 
 
+@pytest.mark.asyncio
+async def test_expense_counter_matches_real_count_after_random_writes(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Pets")
+    headers = await auth_headers(client, email="counter@example.com")
+    rng = random.Random(20240501)
+    delete_probability = 0.4
+
+    live_ids: list[str] = []
+    for step in range(40):
+        if live_ids and rng.random() < delete_probability:
+            expense_id = live_ids.pop(rng.randrange(len(live_ids)))
+            response = await client.delete(f"/expenses/{expense_id}", headers=headers)
+            assert response.status_code == HTTPStatus.NO_CONTENT
+        else:
+            response = await client.post(
+                "/expenses",
+                json={
+                    "amount": "5.00",
+                    "currency": "BRL",
+                    "description": f"Step {step}",
+                    "transaction_date": "2024-06-01",
+                    "category_id": category.id,
+                },
+                headers=headers,
+            )
+            assert response.status_code == HTTPStatus.CREATED
+            live_ids.append(response.json()["id"])
+
+    listing = await client.get("/expenses", headers=headers)
+    real_count = await db_session.scalar(
+        select(func.count())
+        .select_from(Expense)
+        .join(User, User.id == Expense.user_id)
+        .where(User.email == "counter@example.com", Expense.deleted_at.is_(None))
+    )
+    assert listing.json()["total"] == real_count == len(live_ids)
+
+
+@pytest.mark.asyncio
+async def test_list_expenses_cursor_mode_walks_all_pages(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Educação")
+    headers = await auth_headers(client, email="cursor@example.com")
+
+    dates = ["2024-05-01", "2024-05-03", "2024-05-03", "2024-05-02", "2024-05-03"]
+    for index, transaction_date in enumerate(dates):
+        created = await client.post(
+            "/expenses",
+            json={
+                "amount": "10.00",
+                "currency": "BRL",
+                "description": f"Item {index}",
+                "transaction_date": transaction_date,
+                "category_id": category.id,
+            },
+            headers=headers,
+        )
+        assert created.status_code == HTTPStatus.CREATED
+
+    offset_page = await client.get("/expenses?page=1&page_size=10", headers=headers)
+    expected_ids = [item["id"] for item in offset_page.json()["items"]]
+
+    seen_ids: list[str] = []
+    cursor = ""
+    page_size = 2
+    while cursor is not None:
+        response = await client.get(
+            "/expenses", params={"cursor": cursor, "page_size": page_size}, headers=headers
+        )
+        assert response.status_code == HTTPStatus.OK, response.text
+        data = response.json()
+        assert len(data["items"]) <= page_size
+        assert "total" not in data
+        seen_ids.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+
+    assert seen_ids == expected_ids
+    assert len(seen_ids) == len(dates)
+
+
+@pytest.mark.asyncio
+async def test_list_expenses_rejects_invalid_cursor(client: AsyncClient) -> None:
+    headers = await auth_headers(client, email="badcursor@example.com")
+
+    response = await client.get("/expenses", params={"cursor": "not-a-cursor"}, headers=headers)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_list_pages_encode_like_the_response_models(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Codificação")
+    headers = await auth_headers(client, email="encoding@example.com")
+    await post_expense(client, headers, category.id, amount="1234567.5", description="Café ☃ 😀")
+    await post_expense(
+        client, headers, category.id, amount="0.01", description='"aspas" \\ </b>\n\t\x01\x7f'
+    )
+    await post_expense(client, headers, category.id, transaction_date="2023-12-31")
+    order = keyset_order_by(EXPENSE_SORTS[DEFAULT_SORT])
+    expenses = (await db_session.scalars(select(Expense).order_by(*order))).all()
+    items = [ExpenseRead.model_validate(expense) for expense in expenses]
+
+    listing = await client.get("/expenses", params={"page_size": 2}, headers=headers)
+    expected = PaginatedExpenses(items=items[:2], total=3, page=1, page_size=2)
+    assert listing.content == JSONResponse(jsonable_encoder(expected)).body
+    assert listing.headers["content-type"] == "application/json"
+
+    first = await client.get("/expenses", params={"cursor": "", "page_size": 2}, headers=headers)
+    next_cursor = first.json()["next_cursor"]
+    expected_cursor_page = CursorPaginatedExpenses(
+        items=items[:2], next_cursor=next_cursor, page_size=2
+    )
+    assert first.content == JSONResponse(jsonable_encoder(expected_cursor_page)).body
+    last = await client.get(
+        "/expenses", params={"cursor": next_cursor, "page_size": 2}, headers=headers
+    )
+    expected_cursor_page = CursorPaginatedExpenses(items=items[2:], next_cursor=None, page_size=2)
+    assert last.content == JSONResponse(jsonable_encoder(expected_cursor_page)).body
+
+
+@pytest.mark.parametrize("sort", list(EXPENSE_SORTS))
+@pytest.mark.asyncio
+async def test_list_expenses_sorts_consistently_in_both_paging_modes(
+    client: AsyncClient, db_session: AsyncSession, sort: str
+) -> None:
+    category = await create_category(db_session, "Ordenação")
+    headers = await auth_headers(client, email="sort@example.com")
+    for amount, transaction_date in [
+        ("30.00", "2024-05-02"),
+        ("10.00", "2024-05-03"),
+        ("30.00", "2024-05-01"),
+        ("5.50", "2024-05-03"),
+        ("10.00", "2024-05-01"),
+    ]:
+        await post_expense(
+            client, headers, category.id, amount=amount, transaction_date=transaction_date
+        )
+
+    offset_page = await client.get(
+        "/expenses", params={"sort": sort, "page_size": 100}, headers=headers
+    )
+    items = offset_page.json()["items"]
+    field = sort.lstrip("-")
+    values = [Decimal(item[field]) if field == "amount" else item[field] for item in items]
+    assert values == sorted(values, reverse=sort.startswith("-"))
+
+    seen_ids: list[str] = []
+    cursor = ""
+    while cursor is not None:
+        response = await client.get(
+            "/expenses", params={"sort": sort, "cursor": cursor, "page_size": 2}, headers=headers
+        )
+        assert response.status_code == HTTPStatus.OK, response.text
+        seen_ids += [item["id"] for item in response.json()["items"]]
+        cursor = response.json()["next_cursor"]
+    assert seen_ids == [item["id"] for item in items]
+
+
+@pytest.mark.asyncio
+async def test_list_expenses_filters_and_counts_matches(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    food = await create_category(db_session, "Filtro comida")
+    travel = await create_category(db_session, "Filtro viagem")
+    headers = await auth_headers(client, email="filters@example.com")
+    await post_expense(client, headers, food.id, amount="12.00", transaction_date="2024-01-10")
+    await post_expense(client, headers, food.id, amount="80.00", transaction_date="2024-02-10")
+    await post_expense(client, headers, travel.id, amount="300.00", currency="USD")
+    await post_expense(client, headers, travel.id, amount="45.00", transaction_date="2024-03-01")
+
+    async def amounts(**params: Any) -> tuple[list[str], int]:
+        response = await client.get("/expenses", params=params, headers=headers)
+        assert response.status_code == HTTPStatus.OK, response.text
+        data = response.json()
+        return [item["amount"] for item in data["items"]], data["total"]
+
+    assert await amounts(sort="amount") == (["12.00", "45.00", "80.00", "300.00"], 4)
+    assert await amounts(currency="usd") == (["300.00"], 1)
+    assert await amounts(category_id=food.id, sort="-amount") == (["80.00", "12.00"], 2)
+    assert await amounts(amount_min="40", amount_max="100", sort="amount") == (
+        ["45.00", "80.00"],
+        2,
+    )
+    assert await amounts(date_from="2024-02-01", currency="BRL", sort="transaction_date") == (
+        ["80.00", "45.00"],
+        2,
+    )
+
+    by_currency = await client.get(
+        "/expenses/summary/by-currency", params={"currency": "USD"}, headers=headers
+    )
+    assert by_currency.json() == [{"currency": "USD", "total": "300.00", "count": 1}]
+
+
+@pytest.mark.asyncio
+async def test_list_expenses_rejects_unknown_sort_and_foreign_cursor(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Cursor alheio")
+    headers = await auth_headers(client, email="foreign-cursor@example.com")
+    for _ in range(3):
+        await post_expense(client, headers, category.id)
+
+    unknown = await client.get("/expenses", params={"sort": "description"}, headers=headers)
+    assert unknown.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    first = await client.get(
+        "/expenses", params={"sort": "-amount", "cursor": "", "page_size": 1}, headers=headers
+    )
+    cursor = first.json()["next_cursor"]
+    replayed = await client.get(
+        "/expenses", params={"sort": "created_at", "cursor": cursor}, headers=headers
+    )
+    assert replayed.status_code == HTTPStatus.BAD_REQUEST
+
+
 @pytest.mark.asyncio
 async def test_update_expense(client: AsyncClient, db_session: AsyncSession) -> None:
     category = await create_category(db_session, "Moradia")
@@ -177,6 +441,104 @@ async def test_delete_expense_soft_removes(client: AsyncClient, db_session: Asyn
     assert detail.status_code == HTTPStatus.NOT_FOUND
 
 
+@pytest.mark.asyncio
+async def test_batch_applies_updates_and_deletes_with_per_item_results(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Limpeza")
+    headers = await auth_headers(client, email="batch@example.com")
+    other_headers = await auth_headers(client, email="batch-other@example.com")
+    edited = await post_expense(client, headers, category.id, amount="10.00")
+    removed = await post_expense(client, headers, category.id, amount="5.00")
+    kept = await post_expense(client, headers, category.id, amount="1.00")
+    foreign = await post_expense(client, other_headers, category.id)
+    change = {
+        "amount": "12.5",
+        "currency": "usd",
+        "description": "Corrigida",
+        "transaction_date": "2024-02-10",
+        "category_id": category.id,
+    }
+
+    response = await client.post(
+        "/expenses/batch",
+        json={
+            "operations": [
+                {"op": "update", "id": edited["id"], **change},
+                {"op": "delete", "id": removed["id"]},
+                {"op": "delete", "id": foreign["id"]},
+                {"op": "update", "id": kept["id"], **change, "category_id": 999_999},
+                {"op": "delete", "id": edited["id"]},
+            ]
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [
+        HTTPStatus.OK,
+        HTTPStatus.NO_CONTENT,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.BAD_REQUEST,
+    ]
+    assert results[0]["expense"]["id"] == edited["id"]
+    assert results[0]["expense"]["amount"] == "12.50"
+    assert results[0]["expense"]["currency"] == "USD"
+    assert results[0]["expense"]["transaction_date"] == "2024-02-10"
+    assert results[2]["detail"] == "Expense not found"
+    assert results[3]["detail"] == "Category not found"
+
+    detail = await client.get(f"/expenses/{edited['id']}", headers=headers)
+    assert detail.json() == results[0]["expense"]
+    listing = await client.get("/expenses", headers=headers)
+    assert listing.json()["total"] == 2  # noqa: PLR2004
+    untouched = await client.get(f"/expenses/{foreign['id']}", headers=other_headers)
+    assert untouched.status_code == HTTPStatus.OK
+    assert await verify_rollups(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_empty_and_unknown_operations(client: AsyncClient) -> None:
+    headers = await auth_headers(client, email="batch-invalid@example.com")
+    empty = await client.post("/expenses/batch", json={"operations": []}, headers=headers)
+    unknown = await client.post(
+        "/expenses/batch",
+        json={"operations": [{"op": "archive", "id": str(uuid.uuid4())}]},
+        headers=headers,
+    )
+    assert empty.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert unknown.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_owned_expense_statements_lock_rows_on_postgres() -> None:
+    statements = _OwnedExpenseStatements(postgresql.dialect())
+    expense_id, user_id = uuid.uuid4(), uuid.uuid4()
+
+    lock = str(statements.lock([expense_id], user_id).compile(dialect=postgresql.dialect()))
+    assert lock.startswith("SELECT")
+    assert lock.endswith("FOR UPDATE")
+
+    values = {"description": "Edited", "change_version": 2}
+    rewrite = statements.update(expense_id, user_id, values)
+    sql = " ".join(str(rewrite.compile(dialect=postgresql.dialect())).split())
+    # One statement: the old values come from a locked subquery of the same UPDATE.
+    assert sql.startswith("UPDATE expenses SET")
+    assert "FROM (SELECT expenses.id AS id, expenses.transaction_date" in sql
+    assert 'FOR UPDATE) AS "old" WHERE expenses.id = "old".id RETURNING expenses.id' in sql
+    assert sql.endswith('"old".currency AS currency_1, "old".amount AS amount_1')
+
+
+def test_owned_expense_statements_take_the_write_lock_on_sqlite() -> None:
+    statements = _OwnedExpenseStatements(sqlite.dialect())
+    lock = str(statements.lock([uuid.uuid4()], uuid.uuid4()).compile(dialect=sqlite.dialect()))
+
+    assert not statements.row_locks
+    assert lock.startswith("UPDATE expenses SET id=expenses.id")
+    assert "RETURNING" in lock
+
+
 @pytest.mark.asyncio
 async def test_create_expense_requires_existing_category(client: AsyncClient) -> None:
     headers = await auth_headers(client, email="nocat@example.com")
@@ -193,3 +555,720 @@ async def test_create_expense_requires_existing_category(client: AsyncClient) ->
     )
 
     assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_csv_inserts_valid_rows_and_reports_errors(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Mercado")
+    headers = await auth_headers(client, email="bulkcsv@example.com")
+    body = (
+        "amount,currency,description,transaction_date,category_id\n"
+        f'12.50,brl,"Feira, orgânicos",2024-07-01,{category.id}\n'
+        f"-3.00,BRL,Negativo,2024-07-02,{category.id}\n"
+        "8.00,BRL,Sem categoria,2024-07-03,9999\n"
+        f'4.00,BRL,"Linha\nquebrada",2024-07-04,{category.id}\n'
+    )
+
+    response = await client.post(
+        "/expenses/bulk", content=body.encode(), headers={**headers, "Content-Type": "text/csv"}
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    expected_inserted = 2
+    assert data["inserted"] == expected_inserted
+    assert data["error_count"] == len(data["errors"]) == expected_inserted
+    assert [error["row"] for error in data["errors"]] == [2, 3]
+    assert data["errors"][0]["errors"][0].startswith("amount:")
+    assert data["errors"][1]["errors"] == ["category_id: Category not found"]
+
+    listing = (await client.get("/expenses", headers=headers)).json()
+    assert listing["total"] == expected_inserted
+    assert {item["description"] for item in listing["items"]} == {
+        "Feira, orgânicos",
+        "Linha\nquebrada",
+    }
+    assert {item["currency"] for item in listing["items"]} == {"BRL"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_csv_confines_a_stray_quote_to_its_own_row(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Eletrônicos")
+    headers = await auth_headers(client, email="bulkquote@example.com")
+    rows = [f"1.00,BRL,Item {index},2024-07-01,{category.id}" for index in range(200)]
+    # Literal inside an unquoted field, as the csv module reads it.
+    rows[10] = f'999.00,BRL,TV 32",2024-07-01,{category.id}'
+    # Opens a quoted field that never closes.
+    rows[20] = f'5.00,BRL,"Cabo HDMI,2024-07-01,{category.id}'
+    body = "amount,currency,description,transaction_date,category_id\n" + "\n".join(rows)
+
+    response = await client.post(
+        "/expenses/bulk", content=body.encode(), headers={**headers, "Content-Type": "text/csv"}
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data["inserted"] == len(rows) - 1
+    assert data["errors"] == [{"row": 21, "errors": ["Invalid CSV: Unterminated quoted field"]}]
+    tv = await client.get("/expenses", params={"amount_min": "999"}, headers=headers)
+    assert [item["description"] for item in tv.json()["items"]] == ['TV 32"']
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_ndjson_streams_rows(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Viagem")
+    headers = await auth_headers(client, email="bulkjson@example.com")
+    rows = 250
+
+    async def body() -> AsyncIterator[bytes]:
+        for index in range(rows):
+            line = (
+                f'{{"amount": "1.00", "currency": "BRL", "description": "Row {index}", '
+                f'"transaction_date": "2024-08-01", "category_id": {category.id}}}\n'
+            )
+            yield line.encode()
+        yield b"not json\n"
+
+    response = await client.post(
+        "/expenses/bulk",
+        content=body(),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == HTTPStatus.OK, response.text
+    data = response.json()
+    assert data["inserted"] == rows
+    assert data["errors"][0]["row"] == rows + 1
+    listing = await client.get("/expenses", params={"page_size": 1}, headers=headers)
+    assert listing.json()["total"] == rows
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_rejects_unknown_media_type(client: AsyncClient) -> None:
+    headers = await auth_headers(client, email="bulkxml@example.com")
+
+    response = await client.post(
+        "/expenses/bulk", content=b"<xml/>", headers={**headers, "Content-Type": "text/xml"}
+    )
+
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+@pytest.mark.asyncio
+async def test_export_streams_filtered_csv_and_ndjson(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    food = await create_category(db_session, "Restaurante")
+    travel = await create_category(db_session, "Hotel")
+    headers = await auth_headers(client, email="export@example.com")
+    for description, transaction_date, category in [
+        ("Jantar, centro", "2024-01-10", food),
+        ("Pousada", "2024-02-10", travel),
+        ("Almoço", "2024-03-10", food),
+    ]:
+        await client.post(
+            "/expenses",
+            json={
+                "amount": "42.00",
+                "currency": "BRL",
+                "description": description,
+                "transaction_date": transaction_date,
+                "category_id": category.id,
+            },
+            headers=headers,
+        )
+
+    csv_response = await client.get(
+        "/expenses/export",
+        params={"format": "csv", "category_id": food.id, "date_to": "2024-02-28"},
+        headers=headers,
+    )
+    assert csv_response.status_code == HTTPStatus.OK
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    lines = csv_response.text.splitlines()
+    assert lines[0] == "id,amount,currency,description,transaction_date,category_id,created_at"
+    assert len(lines) == 1 + 1
+    assert ',42.00,BRL,"Jantar, centro",2024-01-10,' in lines[1]
+
+    ndjson_response = await client.get(
+        "/expenses/export", params={"format": "ndjson"}, headers=headers
+    )
+    records = [json.loads(line) for line in ndjson_response.text.splitlines()]
+    assert [record["description"] for record in records] == ["Almoço", "Pousada", "Jantar, centro"]
+    assert records[0]["category_id"] == food.id
+
+    reimport = await client.post(
+        "/expenses/bulk",
+        content=csv_response.content,
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert reimport.json()["inserted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_export_of_100k_rows_keeps_memory_bounded(
+    client: AsyncClient, session_factory: async_sessionmaker[AsyncSession]
+) -> None:
+    rows = 100_000
+    peak_limit_bytes = 8 * 1024 * 1024
+    async with session_factory() as session:
+        category = await create_category(session, "Exportação")
+    response = await client.post(
+        "/auth/register", json={"email": "bigexport@example.com", "password": "password123"}
+    )
+    user_id = uuid.UUID(response.json()["user"]["id"])
+    token = response.json()["access_token"]
+
+    async with session_factory() as session:
+        for offset in range(0, rows, 10_000):
+            await session.execute(
+                insert(Expense),
+                [
+                    {
+                        "user_id": user_id,
+                        "category_id": category.id,
+                        "amount": Decimal("19.90"),
+                        "currency": "BRL",
+                        "description": f"Linha {offset + index} " + "x" * 80,
+                        "transaction_date": date(2024, 1, 1),
+                    }
+                    for index in range(10_000)
+                ],
+            )
+        await session.commit()
+
+    # Drive the ASGI app directly: httpx's ASGITransport would buffer the whole body.
+    body_bytes = 0
+    line_count = 0
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/expenses/export",
+        "raw_path": b"/expenses/export",
+        "query_string": b"format=ndjson",
+        "root_path": "",
+        "headers": [(b"host", b"test"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive() -> dict[str, object]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, object]) -> None:
+        nonlocal body_bytes, line_count
+        if message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            assert isinstance(chunk, bytes)
+            body_bytes += len(chunk)
+            line_count += chunk.count(b"\n")
+            if not message.get("more_body", False):
+                response_done.set()
+
+    tracemalloc.start()
+    try:
+        await app(scope, receive, send)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert line_count == rows
+    assert body_bytes > peak_limit_bytes
+    assert peak < peak_limit_bytes
+
+
+# A probe of 1 sends SQLite searches down the dense-match path.
+@pytest.mark.parametrize("match_probe", [1000, 1])
+@pytest.mark.asyncio
+async def test_search_matches_every_word_and_combines_with_filters(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    match_probe: int,
+) -> None:
+    monkeypatch.setattr("app.search.SQLITE_MATCH_PROBE", match_probe)
+    transport = await create_category(db_session, "Transporte")
+    food = await create_category(db_session, "Restaurante")
+    headers = await auth_headers(client, email="search@example.com")
+    other_headers = await auth_headers(client, email="search-other@example.com")
+    airport = await post_expense(
+        client, headers, transport.id, description="UBER para o aeroporto", amount="80.00"
+    )
+    await post_expense(
+        client,
+        headers,
+        transport.id,
+        description="Uber até o trabalho",
+        amount="25.00",
+        transaction_date="2024-02-01",
+    )
+    eats = await post_expense(client, headers, food.id, description="Uber Eats 50%", amount="40.00")
+    await post_expense(client, headers, food.id, description="Padaria")
+    await post_expense(client, other_headers, transport.id, description="Uber do vizinho")
+
+    async def search(**params: Any) -> list[str]:
+        response = await client.get("/expenses/search", params=params, headers=headers)
+        assert response.status_code == HTTPStatus.OK, response.text
+        return [item["description"] for item in response.json()["items"]]
+
+    assert sorted(await search(q="uber")) == [
+        "UBER para o aeroporto",
+        "Uber Eats 50%",
+        "Uber até o trabalho",
+    ]
+    assert await search(q="ber aero") == [airport["description"]]
+    assert await search(q="50%") == [eats["description"]]
+    assert await search(q="ber", category_id=food.id) == [eats["description"]]
+    assert await search(q="uber", date_to="2024-01-31", amount_min="50") == [airport["description"]]
+    assert await search(q="táxi") == []
+
+    edited = await client.put(
+        f"/expenses/{eats['id']}",
+        json={
+            "amount": "40.00",
+            "currency": "BRL",
+            "description": "iFood",
+            "transaction_date": "2024-01-01",
+            "category_id": food.id,
+        },
+        headers=headers,
+    )
+    assert edited.status_code == HTTPStatus.OK
+    await client.delete(f"/expenses/{airport['id']}", headers=headers)
+    assert await search(q="uber") == ["Uber até o trabalho"]
+    assert await search(q="ifood") == ["iFood"]
+
+    short = await client.get("/expenses/search", params={"q": "ub"}, headers=headers)
+    assert short.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_search_results_do_not_depend_on_other_users_rows(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("app.search.SQLITE_MATCH_PROBE", 2)
+    category = await create_category(db_session, "Bebidas")
+    headers = await auth_headers(client, email="search-tenant@example.com")
+    other_headers = await auth_headers(client, email="search-neighbour@example.com")
+    # Only the FTS path folds the case of "Á"; LIKE folds ASCII letters alone.
+    await post_expense(client, headers, category.id, description="ÁGUA com gás")
+
+    async def search() -> list[str]:
+        response = await client.get("/expenses/search", params={"q": "água"}, headers=headers)
+        return [item["description"] for item in response.json()["items"]]
+
+    before = await search()
+    for _ in range(3):
+        await post_expense(client, other_headers, category.id, description="água mineral")
+
+    assert before == ["ÁGUA com gás"]
+    assert await search() == before
+
+
+@pytest.mark.asyncio
+async def test_search_pages_with_cursor(client: AsyncClient, db_session: AsyncSession) -> None:
+    category = await create_category(db_session, "Mercado")
+    headers = await auth_headers(client, email="search-pages@example.com")
+    for day in range(1, 8):
+        await post_expense(
+            client,
+            headers,
+            category.id,
+            description=f"Mercado {day}",
+            transaction_date=f"2024-05-{day:02d}",
+        )
+    await post_expense(client, headers, category.id, description="Feira")
+
+    seen: list[str] = []
+    cursor = ""
+    while True:
+        response = await client.get(
+            "/expenses/search",
+            params={"q": "mercado", "page_size": 3, "cursor": cursor},
+            headers=headers,
+        )
+        data = response.json()
+        seen += [item["description"] for item in data["items"]]
+        if data["next_cursor"] is None:
+            break
+        cursor = data["next_cursor"]
+
+    assert seen == [f"Mercado {day}" for day in range(7, 0, -1)]
+
+
+@pytest.mark.asyncio
+async def test_summary_endpoints_group_live_expenses(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    food = await create_category(db_session, "Padaria")
+    fun = await create_category(db_session, "Show")
+    headers = await auth_headers(client, email="summary@example.com")
+    other_headers = await auth_headers(client, email="summary-other@example.com")
+
+    await post_expense(client, headers, food.id, amount="10.10", transaction_date="2024-01-05")
+    await post_expense(client, headers, food.id, amount="5.20", transaction_date="2024-01-20")
+    await post_expense(client, headers, fun.id, amount="100.00", transaction_date="2024-02-01")
+    await post_expense(
+        client, headers, fun.id, amount="30.00", currency="USD", transaction_date="2024-02-03"
+    )
+    deleted = await post_expense(client, headers, food.id, amount="999.00")
+    await client.delete(f"/expenses/{deleted['id']}", headers=headers)
+    await post_expense(client, other_headers, food.id, amount="777.00")
+
+    by_month = await client.get("/expenses/summary/by-month", headers=headers)
+    assert by_month.status_code == HTTPStatus.OK, by_month.text
+    assert by_month.json() == [
+        {"month": "2024-01", "currency": "BRL", "total": "15.30", "count": 2},
+        {"month": "2024-02", "currency": "BRL", "total": "100.00", "count": 1},
+        {"month": "2024-02", "currency": "USD", "total": "30.00", "count": 1},
+    ]
+
+    by_category = await client.get(
+        "/expenses/summary/by-category", params={"date_from": "2024-02-01"}, headers=headers
+    )
+    assert by_category.json() == [
+        {"category_id": fun.id, "currency": "BRL", "total": "100.00", "count": 1},
+        {"category_id": fun.id, "currency": "USD", "total": "30.00", "count": 1},
+    ]
+
+    by_currency = await client.get("/expenses/summary/by-currency", headers=headers)
+    assert by_currency.json() == [
+        {"currency": "BRL", "total": "115.30", "count": 3},
+        {"currency": "USD", "total": "30.00", "count": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_monthly_rollups_follow_every_write_path(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    food = await create_category(db_session, "Feira")
+    fun = await create_category(db_session, "Teatro")
+    headers = await auth_headers(client, email="rollups@example.com")
+    user_id = (await db_session.execute(select(User.id))).scalar_one()
+
+    moved = await post_expense(client, headers, food.id, amount="40.00")
+    removed = await post_expense(client, headers, food.id, amount="15.00")
+    await post_expense(client, headers, food.id, amount="2.50", transaction_date="2024-01-31")
+    update = await client.put(
+        f"/expenses/{moved['id']}",
+        json={
+            "amount": "45.00",
+            "currency": "usd",
+            "description": "Moved",
+            "transaction_date": "2024-03-10",
+            "category_id": fun.id,
+        },
+        headers=headers,
+    )
+    assert update.status_code == HTTPStatus.OK, update.text
+    deleted = await client.delete(f"/expenses/{removed['id']}", headers=headers)
+    assert deleted.status_code == HTTPStatus.NO_CONTENT
+    bulk = await client.post(
+        "/expenses/bulk",
+        content=(
+            "amount,currency,description,transaction_date,category_id\n"
+            f"7.00,BRL,a,2024-03-01,{fun.id}\n"
+            f"3.00,BRL,b,2024-03-31,{fun.id}\n"
+        ),
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert bulk.json()["inserted"] == 2  # noqa: PLR2004
+
+    assert await verify_rollups(db_session) == []
+    by_month = await client.get("/expenses/summary/by-month", headers=headers)
+    assert by_month.json() == [
+        {"month": "2024-01", "currency": "BRL", "total": "2.50", "count": 1},
+        {"month": "2024-03", "currency": "BRL", "total": "10.00", "count": 2},
+        {"month": "2024-03", "currency": "USD", "total": "45.00", "count": 1},
+    ]
+
+    await db_session.execute(
+        update_statement(ExpenseMonthlyRollup).values(total_amount=Decimal("0"))
+    )
+    assert len(await verify_rollups(db_session, user_id)) == 3  # noqa: PLR2004
+    await rebuild_rollups(db_session, user_id)
+    await db_session.commit()
+    assert await verify_rollups(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_rollups_fall_back_to_update_then_insert_without_on_conflict(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # As on a dialect with no ON CONFLICT upsert.
+    monkeypatch.setattr(rollups, "_upsert_rollups", lambda *_: None)
+    category = await create_category(db_session, "Padaria")
+    headers = await auth_headers(client, email="portable-rollups@example.com")
+
+    first = await post_expense(client, headers, category.id, amount="4.00")
+    await post_expense(client, headers, category.id, amount="6.00")
+    deleted = await client.delete(f"/expenses/{first['id']}", headers=headers)
+    assert deleted.status_code == HTTPStatus.NO_CONTENT
+
+    assert await verify_rollups(db_session) == []
+    stored = await db_session.execute(
+        select(ExpenseMonthlyRollup.total_amount, ExpenseMonthlyRollup.expense_count)
+    )
+    assert stored.one() == (Decimal("6.00"), 1)
+
+
+@pytest.mark.asyncio
+async def test_summary_splitting_a_month_reads_expenses(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session, "Farmácia")
+    headers = await auth_headers(client, email="partial-month@example.com")
+    await post_expense(client, headers, category.id, amount="1.00", transaction_date="2024-05-01")
+    await post_expense(client, headers, category.id, amount="2.00", transaction_date="2024-05-20")
+    await post_expense(client, headers, category.id, amount="4.00", transaction_date="2024-06-30")
+    # Skew the rollups so only a query against `expenses` returns the right answer.
+    await db_session.execute(
+        update_statement(ExpenseMonthlyRollup).values(total_amount=Decimal("0"))
+    )
+    await db_session.commit()
+
+    partial = await client.get(
+        "/expenses/summary/by-month",
+        params={"date_from": "2024-05-15", "date_to": "2024-06-30"},
+        headers=headers,
+    )
+    assert partial.json() == [
+        {"month": "2024-05", "currency": "BRL", "total": "2.00", "count": 1},
+        {"month": "2024-06", "currency": "BRL", "total": "4.00", "count": 1},
+    ]
+
+    aligned = await client.get(
+        "/expenses/summary/by-currency",
+        params={"date_from": "2024-05-01", "date_to": "2024-06-30"},
+        headers=headers,
+    )
+    assert aligned.json() == [{"currency": "BRL", "total": "0.00", "count": 3}]
+
+
+async def assert_not_modified(client: AsyncClient, path: str, headers: dict[str, str]) -> str:
+    response = await client.get(path, headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    etag: str = response.headers["etag"]
+    cached = await client.get(path, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    return etag
+
+
+async def assert_modified(
+    client: AsyncClient, path: str, headers: dict[str, str], etag: str
+) -> None:
+    response = await client.get(path, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_expense_etags_change_on_every_write(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session)
+    headers = await auth_headers(client)
+    expense = await post_expense(client, headers, category.id)
+    paths = ["/expenses", "/expenses?cursor=", f"/expenses/{expense['id']}"]
+
+    etags = [await assert_not_modified(client, path, headers) for path in paths]
+    assert len(set(etags)) == len(paths)
+    await post_expense(client, headers, category.id, description="Outra")
+    for path, etag in zip(paths, etags, strict=True):
+        await assert_modified(client, path, headers, etag)
+
+    etags = [await assert_not_modified(client, path, headers) for path in paths]
+    updated = await client.put(
+        f"/expenses/{expense['id']}",
+        json={
+            "amount": expense["amount"],
+            "currency": expense["currency"],
+            "description": "Editada",
+            "transaction_date": expense["transaction_date"],
+            "category_id": category.id,
+        },
+        headers=headers,
+    )
+    assert updated.status_code == HTTPStatus.OK
+    for path, etag in zip(paths, etags, strict=True):
+        await assert_modified(client, path, headers, etag)
+
+    etags = [await assert_not_modified(client, path, headers) for path in paths[:2]]
+    deleted = await client.delete(f"/expenses/{expense['id']}", headers=headers)
+    assert deleted.status_code == HTTPStatus.NO_CONTENT
+    for path, etag in zip(paths[:2], etags, strict=True):
+        await assert_modified(client, path, headers, etag)
+
+
+@pytest.mark.asyncio
+async def test_expense_etags_are_per_user(client: AsyncClient, db_session: AsyncSession) -> None:
+    category = await create_category(db_session)
+    alice = await auth_headers(client, "alice@example.com")
+    bob = await auth_headers(client, "bob@example.com")
+    await post_expense(client, alice, category.id)
+
+    etag = await assert_not_modified(client, "/expenses", alice)
+    # Bob has the same version number, but must not be told Alice's list is current.
+    response = await client.get("/expenses", headers={**bob, "If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["items"] == []
+    # Other users' writes leave Alice's ETag alone.
+    await post_expense(client, bob, category.id)
+    await assert_not_modified(client, "/expenses", alice)
+    cached = await client.get("/expenses", headers={**alice, "If-None-Match": etag})
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+
+
+async def sync_changes(
+    client: AsyncClient, headers: dict[str, str], since: str = "", page_size: int = 500
+) -> tuple[list[dict[str, Any]], str]:
+    """Follow /expenses/changes until has_more is false; return the items and the last token."""
+    items: list[dict[str, Any]] = []
+    while True:
+        response = await client.get(
+            "/expenses/changes", params={"since": since, "page_size": page_size}, headers=headers
+        )
+        assert response.status_code == HTTPStatus.OK, response.text
+        body = response.json()
+        items.extend(body["items"])
+        since = body["next_token"]
+        if not body["has_more"]:
+            return items, since
+
+
+@pytest.mark.asyncio
+async def test_changes_return_only_what_changed_since_the_token(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session)
+    headers = await auth_headers(client)
+    other = await auth_headers(client, "other@example.com")
+    await post_expense(client, other, category.id)
+    created = [await post_expense(client, headers, category.id) for _ in range(5)]
+
+    items, token = await sync_changes(client, headers, page_size=2)
+    assert [item["id"] for item in items] == [expense["id"] for expense in created]
+    assert all(item["deleted_at"] is None for item in items)
+    assert await sync_changes(client, headers, token) == ([], token)
+
+    edited, removed, untouched = created[0], created[1], created[2:]
+    response = await client.put(
+        f"/expenses/{edited['id']}",
+        json={**{key: edited[key] for key in ExpenseCreate.model_fields}, "description": "Nova"},
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert (await client.delete(f"/expenses/{removed['id']}", headers=headers)).is_success
+    batch = await client.post(
+        "/expenses/batch",
+        json={
+            "operations": [
+                {"op": "delete", "id": untouched[0]["id"]},
+                {
+                    **{key: untouched[1][key] for key in ExpenseCreate.model_fields},
+                    "op": "update",
+                    "id": untouched[1]["id"],
+                },
+            ]
+        },
+        headers=headers,
+    )
+    assert batch.status_code == HTTPStatus.OK
+    added = await post_expense(client, headers, category.id)
+
+    items, _ = await sync_changes(client, headers, token)
+    by_id = {item["id"]: item for item in items}
+    assert list(by_id)[:2] == [edited["id"], removed["id"]]
+    assert set(list(by_id)[2:4]) == {untouched[0]["id"], untouched[1]["id"]}
+    assert list(by_id)[4:] == [added["id"]]
+    assert by_id[edited["id"]]["description"] == "Nova"
+    assert by_id[edited["id"]]["deleted_at"] is None
+    assert by_id[removed["id"]]["deleted_at"] is not None
+    assert by_id[untouched[0]["id"]]["deleted_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_changes_page_through_a_write_larger_than_a_page(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = await create_category(db_session)
+    headers = await auth_headers(client)
+    created = [await post_expense(client, headers, category.id) for _ in range(5)]
+    _, token = await sync_changes(client, headers)
+
+    # One batch stamps every row with the same version; pages split it by id.
+    operations = [
+        {
+            **{key: expense[key] for key in ExpenseCreate.model_fields},
+            "op": "update",
+            "id": expense["id"],
+        }
+        for expense in created
+    ]
+    batch = await client.post("/expenses/batch", json={"operations": operations}, headers=headers)
+    assert batch.status_code == HTTPStatus.OK
+
+    page_size, calls = 2, 0
+    seen: list[str] = []
+    has_more = True
+    while has_more:
+        calls += 1
+        response = await client.get(
+            "/expenses/changes", params={"since": token, "page_size": page_size}, headers=headers
+        )
+        body = response.json()
+        seen.extend(item["id"] for item in body["items"])
+        token, has_more = body["next_token"], body["has_more"]
+    assert sorted(seen) == sorted(expense["id"] for expense in created)
+    assert calls == math.ceil(len(created) / page_size)
+
+
+@pytest.mark.asyncio
+async def test_changes_answer_gone_once_unseen_tombstones_are_archived(
+    client: AsyncClient, db_session: AsyncSession, session_factory: async_sessionmaker[AsyncSession]
+) -> None:
+    category = await create_category(db_session)
+    headers = await auth_headers(client)
+    kept = await post_expense(client, headers, category.id)
+    removed = await post_expense(client, headers, category.id)
+    _, before_delete = await sync_changes(client, headers)
+    assert (await client.delete(f"/expenses/{removed['id']}", headers=headers)).is_success
+    _, after_delete = await sync_changes(client, headers, before_delete)
+
+    assert await archive_deleted_expenses(session_factory, retention=timedelta(microseconds=1)) == 1
+
+    # The tombstone was already delivered with after_delete, and a full sync moves past it too.
+    assert await sync_changes(client, headers, after_delete) == ([], after_delete)
+    items, token = await sync_changes(client, headers)
+    assert [item["id"] for item in items] == [kept["id"]]
+    assert await sync_changes(client, headers, token) == ([], token)
+    gone = await client.get("/expenses/changes", params={"since": before_delete}, headers=headers)
+    assert gone.status_code == HTTPStatus.GONE
+
+
+@pytest.mark.asyncio
+async def test_changes_reject_invalid_tokens(client: AsyncClient) -> None:
+    headers = await auth_headers(client)
+    for token in ("nope", encode_cursor([1, uuid.uuid4()], "-created_at")):
+        response = await client.get("/expenses/changes", params={"since": token}, headers=headers)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
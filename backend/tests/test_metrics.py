@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import re
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import create_engine
+from app.metrics import registry
+from app.models import Category
+
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? (-?[0-9.e+-]+|\+Inf)$')
+ODD_METHODS = ("BREW", "XYZZY")
+
+
+def parse(exposition: str) -> dict[str, float]:
+    samples = {}
+    for line in exposition.splitlines():
+        if line.startswith("#"):
+            continue
+        assert SAMPLE.match(line), line
+        name, value = line.rsplit(" ", 1)
+        samples[name] = float(value)
+    return samples
+
+
+@pytest.mark.asyncio
+async def test_metrics_cover_routes_queries_and_bcrypt(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = Category(name="Métricas", slug="metricas")
+    db_session.add(category)
+    await db_session.commit()
+    before = parse((await client.get("/metrics")).text)
+
+    registered = await client.post(
+        "/auth/register", json={"email": "metrics@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+    for _ in range(3):
+        assert (await client.get("/expenses", headers=headers)).status_code == HTTPStatus.OK
+    await client.get("/does-not-exist")
+    for token in ODD_METHODS:
+        await client.request(token, "/does-not-exist")
+
+    response = await client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = parse(response.text)
+
+    def delta(name: str) -> float:
+        return after.get(name, 0) - before.get(name, 0)
+
+    assert delta('http_requests_total{method="POST",route="/auth/register",status="201"}') == 1
+    listed = delta('http_request_duration_seconds_count{method="GET",route="/expenses"}')
+    assert listed == 3  # noqa: PLR2004
+    assert delta('http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    # Arbitrary method tokens share one label value.
+    odd = delta('http_requests_total{method="other",route="unmatched",status="404"}')
+    assert odd == len(ODD_METHODS)
+    assert not any(token in name for token in ODD_METHODS for name in after)
+    assert after["http_requests_in_flight"] == 1  # the /metrics request itself
+    assert delta('db_queries_per_request_count{route="/expenses"}') == 3  # noqa: PLR2004
+    assert delta('db_queries_per_request_sum{route="/expenses"}') >= 3  # noqa: PLR2004
+    assert delta('db_time_per_request_seconds_sum{route="/expenses"}') > 0
+    assert delta("db_queries_total") >= 3  # noqa: PLR2004
+    assert delta('password_hash_duration_seconds_count{operation="hash"}') == 1
+
+
+def test_metrics_report_pool_statistics(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}", pool_size=3)
+
+    samples = parse(registry.render([engine]))
+
+    assert samples['db_pool_size{engine="0"}'] == 3  # noqa: PLR2004
+    assert samples['db_pool_checked_out{engine="0"}'] == 0
+    assert samples['db_pool_timeouts_total{engine="0"}'] == 0
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from http import HTTPStatus
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog.testing import capture_logs
+
+from app.config import settings
+from app.models import Category, User
+from app.profiling import profile_statements
+
+
+@pytest.fixture
+def sql_profiling(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "sql_profiling", True)
+    monkeypatch.setattr(settings, "sql_profiling_max_queries", 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("sql_profiling")
+async def test_profiling_reports_statements_with_call_sites(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    category = Category(name="Perfil", slug="perfil")
+    db_session.add(category)
+    await db_session.commit()
+    registered = await client.post(
+        "/auth/register", json={"email": "profile@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+
+    with capture_logs() as logs:
+        response = await client.post(
+            "/expenses",
+            json={
+                "amount": "9.99",
+                "currency": "BRL",
+                "description": "Perfilado",
+                "transaction_date": "2024-01-01",
+                "category_id": category.id,
+            },
+            headers=headers,
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.headers["server-timing"].startswith("db;dur=")
+    [warning] = [log for log in logs if log["event"] == "request ran too many SQL statements"]
+    assert warning["route"] == "/expenses"
+    assert warning["queries"] > 1
+    assert any(
+        statement["at"].startswith("app/routers/expenses.py:")
+        for statement in warning["statements"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_off_by_default(client: AsyncClient) -> None:
+    response = await client.get("/categories")
+
+    assert "server-timing" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_repeated_selects_are_detected(db_session: AsyncSession) -> None:
+    with profile_statements() as profile:
+        for user_id in range(3):
+            await db_session.execute(select(User).where(User.email == f"{user_id}@example.com"))
+        await db_session.execute(select(Category))
+
+    assert len(profile.statements) == 4  # noqa: PLR2004
+    [(shape, count)] = profile.repeated_selects().items()
+    assert shape.startswith("SELECT users.")
+    assert count == 3  # noqa: PLR2004
@@ -0,0 +1,166 @@
+"""Statements issued by each mutating endpoint; a regression here is an extra round trip."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+from httpx import AsyncClient, Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Category
+
+
+@contextmanager
+def count_statements(session_factory: async_sessionmaker[AsyncSession]) -> Iterator[list[str]]:
+    statements: list[str] = []
+    sync_engine = session_factory.kw["bind"].sync_engine
+
+    def record(_conn: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+
+EXPENSE = {
+    "amount": "10.00",
+    "currency": "BRL",
+    "description": "Contagem",
+    "transaction_date": "2024-01-01",
+}
+
+
+async def setup_user(
+    client: AsyncClient, db_session: AsyncSession
+) -> tuple[dict[str, str], int, str]:
+    category = Category(name="Contagem", slug="contagem")
+    db_session.add(category)
+    await db_session.commit()
+    registered = await client.post(
+        "/auth/register", json={"email": "count@example.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+    created = await client.post(
+        "/expenses", json={**EXPENSE, "category_id": category.id}, headers=headers
+    )
+    return headers, category.id, created.json()["id"]
+
+
+def assert_statements(response: Response, statements: list[str], expected: int) -> None:
+    assert response.status_code < HTTPStatus.BAD_REQUEST, response.text
+    assert len(statements) == expected, "\n".join(statements)
+
+
+@pytest.mark.asyncio
+async def test_register_is_a_single_insert(
+    client: AsyncClient, session_factory: async_sessionmaker[AsyncSession]
+) -> None:
+    with count_statements(session_factory) as statements:
+        response = await client.post(
+            "/auth/register", json={"email": "single@example.com", "password": "password123"}
+        )
+    assert_statements(response, statements, 1)
+
+    duplicate = await client.post(
+        "/auth/register", json={"email": "single@example.com", "password": "password123"}
+    )
+    assert duplicate.status_code == HTTPStatus.BAD_REQUEST
+    assert duplicate.json()["detail"] == "Email already registered"
+
+
+@pytest.mark.asyncio
+async def test_expense_writes_skip_read_back(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    headers, category_id, expense_id = await setup_user(client, db_session)
+
+    # Bump users counters (RETURNING the version stamped on the row), INSERT expense, upsert the
+    # monthly rollup.
+    with count_statements(session_factory) as statements:
+        response = await client.post(
+            "/expenses",
+            json={**EXPENSE, "amount": "10", "category_id": category_id},
+            headers=headers,
+        )
+    assert_statements(response, statements, 3)
+    assert response.json()["amount"] == "10.00"
+
+    # Bump users.expenses_version, lock the owned row and read its old values (SQLite only;
+    # Postgres folds this into the UPDATE), UPDATE ... RETURNING, upsert the rollups.
+    with count_statements(session_factory) as statements:
+        response = await client.put(
+            f"/expenses/{expense_id}",
+            json={**EXPENSE, "amount": "12.50", "category_id": category_id},
+            headers=headers,
+        )
+    assert_statements(response, statements, 4)
+
+    # INSERT batch, bump users counters, stamp the batch with the version, upsert the rollups.
+    with count_statements(session_factory) as statements:
+        response = await client.post(
+            "/expenses/bulk",
+            content=(
+                "amount,currency,description,transaction_date,category_id\n"
+                f"1.00,BRL,a,2024-01-01,{category_id}\n"
+                f"2.00,BRL,b,2024-01-02,{category_id}\n"
+            ),
+            headers={**headers, "Content-Type": "text/csv"},
+        )
+    assert_statements(response, statements, 4)
+
+    # Bump users counters, UPDATE deleted_at ... RETURNING, upsert the rollups.
+    with count_statements(session_factory) as statements:
+        response = await client.delete(f"/expenses/{expense_id}", headers=headers)
+    assert_statements(response, statements, 3)
+
+
+@pytest.mark.parametrize("operations", [2, 40])
+@pytest.mark.asyncio
+async def test_batch_statements_do_not_grow_with_batch_size(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    session_factory: async_sessionmaker[AsyncSession],
+    operations: int,
+) -> None:
+    headers, category_id, _ = await setup_user(client, db_session)
+    payload = {**EXPENSE, "category_id": category_id}
+    ids = [
+        (await client.post("/expenses", json=payload, headers=headers)).json()["id"]
+        for _ in range(operations)
+    ]
+    updates = [{"op": "update", "id": id_, **payload} for id_ in ids[::2]]
+    deletes = [{"op": "delete", "id": id_} for id_ in ids[1::2]]
+
+    # Bump users.expenses_version, lock the owned rows, executemany UPDATE, UPDATE deleted_at,
+    # subtract the deletes from users.expense_count, upsert the rollups.
+    with count_statements(session_factory) as statements:
+        response = await client.post(
+            "/expenses/batch", json={"operations": updates + deletes}, headers=headers
+        )
+    assert_statements(response, statements, 6)
+
+
+@pytest.mark.asyncio
+async def test_revalidated_reads_skip_the_page_query(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    session_factory: async_sessionmaker[AsyncSession],
+) -> None:
+    headers, _, expense_id = await setup_user(client, db_session)
+    for path in ("/expenses", f"/expenses/{expense_id}"):
+        etag = (await client.get(path, headers=headers)).headers["etag"]
+        # Only SELECT users.expenses_version.
+        with count_statements(session_factory) as statements:
+            response = await client.get(path, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert len(statements) == 1, "\n".join(statements)
@@ -0,0 +1,159 @@
+"""Login throttling: attack patterns are cut off before bcrypt, legitimate users still get in."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.config import settings
+from app.main import app
+from app.metrics import password_hash_duration
+from app.ratelimit import InMemoryTokenBucketBackend, LoginThrottle, TokenBucket, login_throttle
+
+ATTEMPTS = 50
+PER_IP = TokenBucket(capacity=10, refill_per_second=1 / 60)
+PER_EMAIL = TokenBucket(capacity=3, refill_per_second=1 / 60)
+
+
+class ManualClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeSharedBackend:
+    """Stands in for a store every worker talks to (e.g. Redis): one bucket table, async calls."""
+
+    def __init__(self, clock: ManualClock) -> None:
+        self._buckets = InMemoryTokenBucketBackend(max_keys=1000, clock=clock)
+        self.calls = 0
+
+    async def take(self, key: str, bucket: TokenBucket) -> float:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return await self._buckets.take(key, bucket)
+
+
+@pytest.fixture
+def clock() -> ManualClock:
+    return ManualClock()
+
+
+@pytest_asyncio.fixture
+async def throttled_client(client: AsyncClient, clock: ManualClock) -> AsyncIterator[AsyncClient]:
+    login_throttle.backend = InMemoryTokenBucketBackend(max_keys=1000, clock=clock)
+    login_throttle.per_ip, login_throttle.per_email = PER_IP, PER_EMAIL
+    try:
+        yield client
+    finally:
+        defaults = LoginThrottle.from_settings()
+        login_throttle.per_ip, login_throttle.per_email = defaults.per_ip, defaults.per_email
+
+
+def bcrypt_calls() -> int:
+    return password_hash_duration.count(("hash",)) + password_hash_duration.count(("verify",))
+
+
+def from_ip(ip: str) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app, client=(ip, 1234)), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_password_spraying_one_account_runs_bcrypt_only_for_the_email_burst(
+    throttled_client: AsyncClient,
+) -> None:
+    victim = {"email": "victim@example.com", "password": "password123"}
+    async with from_ip("10.0.0.1") as owner:
+        assert (await owner.post("/auth/register", json=victim)).status_code == HTTPStatus.CREATED
+
+    before = bcrypt_calls()
+    statuses = []
+    for attempt in range(ATTEMPTS):
+        # A botnet: every attempt from a different address, so only the email bucket applies.
+        async with from_ip(f"203.0.113.{attempt}") as attacker:
+            response = await attacker.post(
+                "/auth/login", json={"email": "victim@example.com", "password": f"guess{attempt}"}
+            )
+        statuses.append(response.status_code)
+
+    assert bcrypt_calls() - before == PER_EMAIL.capacity
+    assert statuses.count(HTTPStatus.UNAUTHORIZED) == PER_EMAIL.capacity
+    assert statuses.count(HTTPStatus.TOO_MANY_REQUESTS) == ATTEMPTS - PER_EMAIL.capacity
+
+
+@pytest.mark.asyncio
+async def test_credential_stuffing_from_one_ip_is_cut_off_without_touching_others(
+    throttled_client: AsyncClient, clock: ManualClock
+) -> None:
+    user = {"email": "bystander@example.com", "password": "password123"}
+    async with from_ip("10.0.0.2") as bystander:
+        assert (await bystander.post("/auth/register", json=user)).status_code == HTTPStatus.CREATED
+
+    before = bcrypt_calls()
+    async with from_ip("198.51.100.7") as attacker:
+        for attempt in range(ATTEMPTS):
+            response = await attacker.post(
+                "/auth/register",
+                json={"email": f"leaked{attempt}@example.com", "password": "password123"},
+            )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) == round(1 / PER_IP.refill_per_second)
+        assert bcrypt_calls() - before == PER_IP.capacity
+
+        async with from_ip("10.0.0.2") as bystander:
+            response = await bystander.post("/auth/login", json=user)
+            assert response.status_code == HTTPStatus.OK
+
+        clock.now += 1 / PER_IP.refill_per_second
+        response = await attacker.post(
+            "/auth/register", json={"email": "late@example.com", "password": "password123"}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_backend_share_the_budget(clock: ManualClock) -> None:
+    shared = FakeSharedBackend(clock)
+    workers = [LoginThrottle(shared, PER_IP, PER_EMAIL) for _ in range(2)]
+
+    rejected = 0
+    for attempt in range(2 * PER_EMAIL.capacity):
+        try:
+            await workers[attempt % 2].check("login", f"192.0.2.{attempt}", "someone@example.com")
+        except HTTPException:
+            rejected += 1
+
+    assert rejected == PER_EMAIL.capacity
+    assert shared.calls == 4 * PER_EMAIL.capacity
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_drops_least_recently_used_buckets(clock: ManualClock) -> None:
+    backend = InMemoryTokenBucketBackend(max_keys=2, clock=clock)
+    single = TokenBucket(capacity=1, refill_per_second=1)
+
+    assert await backend.take("a", single) == 0
+    assert await backend.take("a", single) == pytest.approx(1)
+    await backend.take("b", single)
+    await backend.take("c", single)
+
+    assert await backend.take("a", single) == 0
+
+
+def test_a_zero_refill_rate_turns_the_bucket_off(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "auth_rate_limit_email_per_minute", 0.0)
+
+    throttle = LoginThrottle.from_settings()
+
+    assert throttle.per_email is None
+    assert throttle.per_ip is not None
+    with pytest.raises(ValueError, match="refill rate"):
+        TokenBucket(capacity=5, refill_per_second=0)
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import AsyncIterator
+from datetime import date
+from decimal import Decimal
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.categories import category_registry
+from app.database import create_engine
+from app.dependencies import get_db_session, get_db_sessionmaker, get_session_router
+from app.main import app
+from app.models import Base, Category, Expense, User
+from app.principals import principal_cache
+from app.replicas import WRITE_MARKER_COOKIE, SessionRouter
+
+READ_YOUR_WRITES_SECONDS = 5
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def sqlite_database(path: Path) -> AsyncEngine:
+    engine = create_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+def sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path: Path) -> AsyncIterator[tuple[AsyncEngine, AsyncEngine]]:
+    primary = await sqlite_database(tmp_path / "primary.db")
+    replica = await sqlite_database(tmp_path / "replica.db")
+    try:
+        yield primary, replica
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+async def replicate(primary: AsyncEngine, replica: AsyncEngine) -> None:
+    async with primary.connect() as source, replica.begin() as target:
+        for table in Base.metadata.sorted_tables:
+            await target.execute(table.delete())
+        for table in Base.metadata.sorted_tables:
+            rows = (await source.execute(select(table))).mappings().all()
+            if rows:
+                await target.execute(insert(table), [dict(row) for row in rows])
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_except_right_after_own_writes(
+    databases: tuple[AsyncEngine, AsyncEngine],
+) -> None:
+    primary, replica = databases
+    clock = Clock()
+    router = SessionRouter(
+        [sessionmaker(replica)], read_your_writes_seconds=READ_YOUR_WRITES_SECONDS, clock=clock
+    )
+    primary_sessions = sessionmaker(primary)
+
+    async def override_get_session() -> AsyncIterator[AsyncSession]:
+        async with primary_sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = override_get_session
+    app.dependency_overrides[get_db_sessionmaker] = lambda: primary_sessions
+    app.dependency_overrides[get_session_router] = lambda: router
+    principal_cache.clear()
+    category_registry.invalidate()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            async with primary_sessions() as session:
+                category = Category(name="Mercado", slug="mercado")
+                session.add(category)
+                await session.commit()
+
+            registered = await client.post(
+                "/auth/register", json={"email": "replica@example.com", "password": "password123"}
+            )
+            headers = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+            user_id = uuid.UUID(registered.json()["user"]["id"])
+            principal_cache.clear()
+
+            # The replica has not seen the new user yet, but the registration pins reads to
+            # the primary.
+            assert (await client.get("/auth/me", headers=headers)).status_code == HTTPStatus.OK
+
+            await replicate(primary, replica)
+            clock.now += READ_YOUR_WRITES_SECONDS
+            # A write the replica has not received yet and that the caller did not make.
+            async with primary_sessions() as session:
+                await session.execute(
+                    insert(Expense).values(
+                        user_id=user_id,
+                        category_id=category.id,
+                        amount=Decimal("1.00"),
+                        currency="BRL",
+                        description="Lagging",
+                        transaction_date=date(2024, 1, 1),
+                    )
+                )
+                await session.commit()
+
+            from_replica = await client.get("/expenses", headers=headers)
+            assert from_replica.json()["items"] == []
+
+            created = await client.post(
+                "/expenses",
+                json={
+                    "amount": "2.00",
+                    "currency": "BRL",
+                    "description": "Own write",
+                    "transaction_date": "2024-01-02",
+                    "category_id": category.id,
+                },
+                headers=headers,
+            )
+            assert created.status_code == HTTPStatus.CREATED
+            own_writes = await client.get("/expenses", headers=headers)
+            assert {item["description"] for item in own_writes.json()["items"]} == {
+                "Lagging",
+                "Own write",
+            }
+
+            clock.now += READ_YOUR_WRITES_SECONDS
+            assert (await client.get("/expenses", headers=headers)).json()["items"] == []
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back_to_primary(
+    databases: tuple[AsyncEngine, AsyncEngine], tmp_path: Path
+) -> None:
+    primary, replica = databases
+    broken = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = SessionRouter(
+        [sessionmaker(broken), sessionmaker(replica)], read_your_writes_seconds=0
+    )
+    user_id = uuid.uuid4()
+
+    async with sessionmaker(replica)() as session:
+        session.add(User(id=user_id, email="healthy@example.com", hashed_password="x"))
+        await session.commit()
+
+    assert await router.open_replica_session(user_id) is None
+    assert router.healthy_replicas == 1
+
+    session = await router.open_replica_session(user_id)
+    assert session is not None
+    async with session:
+        assert await session.scalar(select(User.email)) == "healthy@example.com"
+
+    await router.check_health()
+    assert router.healthy_replicas == 1
+    await broken.dispose()
+
+
+def test_replicas_rotate_and_recent_writers_stay_on_primary() -> None:
+    clock = Clock()
+    first, second = async_sessionmaker(), async_sessionmaker()
+    router = SessionRouter([first, second], read_your_writes_seconds=1, clock=clock)
+    reader, writer = uuid.uuid4(), uuid.uuid4()
+
+    router.record_write(writer)
+
+    assert [router.replica_for(reader) for _ in range(3)] == [first, second, first]
+    assert router.replica_for(writer) is None
+    clock.now = 1
+    assert router.replica_for(writer) is second
+
+
+@pytest.mark.asyncio
+async def test_a_write_pins_reads_to_the_primary_on_every_worker(
+    databases: tuple[AsyncEngine, AsyncEngine],
+) -> None:
+    primary, replica = databases
+    clock = Clock()
+    # Two workers: the client's write lands on one, its next read on the other.
+    workers = [
+        SessionRouter(
+            [sessionmaker(replica)],
+            read_your_writes_seconds=READ_YOUR_WRITES_SECONDS,
+            secret="shared",
+            clock=clock,
+        )
+        for _ in range(2)
+    ]
+    primary_sessions = sessionmaker(primary)
+
+    async def override_get_session() -> AsyncIterator[AsyncSession]:
+        async with primary_sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = override_get_session
+    app.dependency_overrides[get_db_sessionmaker] = lambda: primary_sessions
+    principal_cache.clear()
+    category_registry.invalidate()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            app.dependency_overrides[get_session_router] = lambda: workers[0]
+            registered = await client.post(
+                "/auth/register", json={"email": "workers@example.com", "password": "password123"}
+            )
+            assert WRITE_MARKER_COOKIE in registered.cookies
+            headers = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+            principal_cache.clear()
+
+            app.dependency_overrides[get_session_router] = lambda: workers[1]
+            # The replica has not seen the user; only the cookie keeps the read on the primary.
+            assert (await client.get("/auth/me", headers=headers)).status_code == HTTPStatus.OK
+
+            clock.now += READ_YOUR_WRITES_SECONDS
+            principal_cache.clear()
+            # The client still sends the cookie, but it has expired.
+            response = await client.get("/auth/me", headers=headers)
+            assert response.status_code == HTTPStatus.UNAUTHORIZED
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_write_markers_only_count_for_their_user_and_secret() -> None:
+    clock = Clock()
+    router = SessionRouter(
+        [async_sessionmaker()], read_your_writes_seconds=1, secret="shared", clock=clock
+    )
+    other_worker = SessionRouter(
+        [async_sessionmaker()], read_your_writes_seconds=1, secret="shared", clock=clock
+    )
+    stranger = SessionRouter(
+        [async_sessionmaker()], read_your_writes_seconds=1, secret="other", clock=clock
+    )
+    writer, reader = uuid.uuid4(), uuid.uuid4()
+
+    cookie = router.record_write(writer)
+    assert cookie is not None
+    marker = SimpleCookie(cookie)[WRITE_MARKER_COOKIE].value
+
+    assert other_worker.wrote_recently(writer, marker)
+    assert not other_worker.wrote_recently(reader, marker)
+    assert not stranger.wrote_recently(writer, marker)
+    payload, _, digest = marker.rpartition(".")
+    owner, _, until = payload.partition(".")
+    assert not other_worker.wrote_recently(writer, f"{owner}.{float(until) + 60}.{digest}")
+
+    clock.now = 1
+    assert not other_worker.wrote_recently(writer, marker)
@@ -0,0 +1,238 @@
+"""The production launcher (app.serve), driven as a real multi-process server."""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app import serve
+from app.database import create_engine, prewarm_pool
+from app.models import Base
+from app.serve import STARTUP_FAILURE, ServeOptions, Supervisor
+
+STARTUP_TIMEOUT_SECONDS = 30
+RECYCLE_AFTER = 5
+
+OPTIONS = ServeOptions(
+    host="127.0.0.1",
+    port=8000,
+    workers=2,
+    max_requests=100,
+    max_requests_jitter=10,
+    graceful_timeout_seconds=5,
+)
+
+
+def test_worker_configs_spread_max_requests() -> None:
+    rng = random.Random(7)
+    limits = {OPTIONS.worker_config(rng).limit_max_requests for _ in range(50)}
+    assert limits <= set(range(100, 111))
+    assert len(limits) > 1
+
+    never = dataclasses.replace(OPTIONS, max_requests=0)
+    assert never.worker_config(rng).limit_max_requests is None
+
+
+@pytest.mark.asyncio
+async def test_prewarm_pool_opens_connections(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'prewarm.db'}", pool_size=4)
+    try:
+        await prewarm_pool(engine, 3)
+        assert engine.sync_engine.pool.checkedin() == 3  # noqa: PLR2004
+    finally:
+        await engine.dispose()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeWorker:
+    """Stands in for a worker process that ignores SIGTERM until it is killed."""
+
+    def __init__(self, clock: FakeClock, exitcode: int | None = None) -> None:
+        self.clock = clock
+        self.exitcode = exitcode
+        self.terminated_at: float | None = None
+
+    def is_alive(self) -> bool:
+        return self.exitcode is None
+
+    def terminate(self) -> None:
+        self.terminated_at = self.clock.now
+
+    def join(self, timeout: float | None = None) -> None:
+        if self.is_alive() and timeout is not None:
+            self.clock.now += timeout
+
+    def kill(self) -> None:
+        self.exitcode = -signal.SIGKILL
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(serve.time, "monotonic", clock)
+    return clock
+
+
+def test_startup_failure_is_fatal_only_until_every_worker_has_come_up(
+    monkeypatch: pytest.MonkeyPatch, clock: FakeClock
+) -> None:
+    supervisor = Supervisor(OPTIONS)
+    started: list[FakeWorker] = []
+
+    def start_worker() -> FakeWorker:
+        started.append(FakeWorker(clock))
+        return started[-1]
+
+    monkeypatch.setattr(supervisor, "_start_worker", start_worker)
+
+    # Every worker has come up; the database then goes away and a recycled worker's
+    # replacement fails its startup.
+    supervisor._started_count.value = OPTIONS.workers
+    workers = [FakeWorker(clock, STARTUP_FAILURE), FakeWorker(clock)]
+    supervisor._workers = workers  # type: ignore[assignment]
+    supervisor._replace_exited_workers()
+    assert not supervisor._stopping
+    assert not started
+
+    clock.now += serve.RESTART_BACKOFF_SECONDS
+    supervisor._replace_exited_workers()
+    assert supervisor._workers[0] is started[0]
+
+    # Failing again doubles the delay.
+    started[0].exitcode = STARTUP_FAILURE
+    supervisor._replace_exited_workers()
+    clock.now += serve.RESTART_BACKOFF_SECONDS
+    supervisor._replace_exited_workers()
+    assert len(started) == 1
+    clock.now += serve.RESTART_BACKOFF_SECONDS
+    supervisor._replace_exited_workers()
+    assert len(started) == 2  # noqa: PLR2004
+
+    fresh = Supervisor(OPTIONS)
+    fresh._started_count.value = OPTIONS.workers - 1
+    workers = [FakeWorker(clock, STARTUP_FAILURE), FakeWorker(clock)]
+    fresh._workers = workers  # type: ignore[assignment]
+    fresh._replace_exited_workers()
+    assert fresh._stopping
+    assert fresh.exit_code == STARTUP_FAILURE
+
+
+def test_shutdown_waits_on_one_deadline_for_all_workers(clock: FakeClock) -> None:
+    workers = [FakeWorker(clock) for _ in range(3)]
+    began = clock.now
+
+    Supervisor(OPTIONS)._stop_workers(workers)  # type: ignore[arg-type]
+
+    assert {worker.terminated_at for worker in workers} == {began}
+    assert all(not worker.is_alive() for worker in workers)
+    assert clock.now - began == OPTIONS.graceful_timeout_seconds + 5
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def wait_until_serving(base_url: str, server: subprocess.Popen[bytes]) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        assert server.poll() is None, "server exited during startup"
+        try:
+            if httpx.get(f"{base_url}/health").status_code == httpx.codes.OK:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError("server did not start")
+
+
+def get(url: str) -> httpx.Response:
+    # A connection accepted just as its worker begins shutting down is reset, as with uvicorn's
+    # own --limit-max-requests; clients (or the proxy in front) retry it.
+    try:
+        return httpx.get(url, timeout=10)
+    except httpx.TransportError:
+        return httpx.get(url, timeout=10)
+
+
+@pytest.mark.asyncio
+async def test_server_recycles_and_restarts_workers_without_dropping_requests(
+    tmp_path: Path,
+) -> None:
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'serve.db'}"
+    engine = create_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(Path(__file__).resolve().parents[1] / "src"),
+        "DATABASE_URL": database_url,
+        "ARCHIVE_INTERVAL_SECONDS": "0",
+        "SERVER_MAX_REQUESTS": str(RECYCLE_AFTER),
+        "SERVER_MAX_REQUESTS_JITTER": "0",
+        "SERVER_GRACEFUL_TIMEOUT_SECONDS": "5",
+    }
+    command = [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port)]
+    server = subprocess.Popen([*command, "--workers", "2"], env=env)
+    try:
+        wait_until_serving(base_url, server)
+        # Each worker exits after RECYCLE_AFTER requests and is replaced; connections that
+        # arrive meanwhile wait in the shared listening socket's backlog.
+        for _ in range(RECYCLE_AFTER * 6):
+            assert get(f"{base_url}/health").status_code == httpx.codes.OK
+
+        server.send_signal(signal.SIGHUP)
+        for _ in range(RECYCLE_AFTER * 2):
+            assert get(f"{base_url}/categories").status_code == httpx.codes.OK
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=STARTUP_TIMEOUT_SECONDS) == 0
+    finally:
+        if server.poll() is None:
+            # SIGTERM first, so the supervisor takes its workers down with it.
+            server.terminate()
+            try:
+                server.wait(timeout=STARTUP_TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+
+def test_server_exits_when_the_app_cannot_be_imported() -> None:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(Path(__file__).resolve().parents[1] / "src"),
+        # app.database fails to parse it at import time, before uvicorn has an app to serve.
+        "DATABASE_URL": "not a database url",
+    }
+    command = [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(free_port())]
+    server = subprocess.Popen([*command, "--workers", "2"], env=env, stderr=subprocess.DEVNULL)
+    try:
+        assert server.wait(timeout=STARTUP_TIMEOUT_SECONDS) == STARTUP_FAILURE
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()